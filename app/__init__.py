@@ -3,6 +3,7 @@ from logging.config import dictConfig
 
 from flask import Flask
 
+from app.cli import achievements_cli, dataset_cli, discord_bot_cli, export_cli, import_cli, setup_cli, stats_cli
 from app.config import ConfigClass
 from app.constants import SCAV_CASE_TYPES
 from app.extensions import db, migrate, login_manager, bcrypt, csrf
@@ -10,6 +11,7 @@ from app.database.manager import db_manager
 from app.discord_bot.manager import discord_manager
 from app.models import User
 from app.filters import timeago, get_item_cdn_image_url, get_category_cdn_image_url
+from app.services.catalog_index_service import catalog_index_url
 
 from app.main.routes import main_bp
 from app.api.routes import api_bp
@@ -42,8 +44,8 @@ def create_app(config_class=ConfigClass):
     _register_template_filters(app)
     _register_template_context(app)
     _register_blueprints(app)
+    _register_cli_commands(app)
     _init_database(app)
-    _init_discord_bot(app)
 
     return app
 
@@ -135,6 +137,9 @@ def _register_template_context(app: Flask) -> None:
     def inject_template_globals():
         return {"scav_case_types": SCAV_CASE_TYPES}
 
+    # lazily resolved, only the pages with an item typeahead call it
+    app.jinja_env.globals["catalog_index_url"] = catalog_index_url
+
 def _register_blueprints(app: Flask) -> None:
     """Register application blueprints (route mappings)"""
     app.register_blueprint(main_bp)
@@ -148,26 +153,28 @@ def _register_blueprints(app: Flask) -> None:
     app.register_blueprint(leaderboards_bp)
     app.register_blueprint(achievements_bp)
 
+def _register_cli_commands(app: Flask) -> None:
+    """Register `flask ...` maintenance commands"""
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(achievements_cli)
+    app.cli.add_command(discord_bot_cli)
+    app.cli.add_command(setup_cli)
+    app.cli.add_command(dataset_cli)
+
 def _init_database(app: Flask) -> None:
     """Initialise and optionally, seed, the database"""
+    if _is_flask_cli():
+        app.logger.info("Skipping DB seeding for Flask CLI commands")
+        return
+    # production runs `flask setup database` once per deploy instead, so workers boot without touching the DB
+    if not app.config.get("INIT_DATABASE_ON_STARTUP", True):
+        return
+
     with app.app_context():
         app.logger.info("Initialising database...")
-        if _is_flask_cli():
-            app.logger.info("Skipping DB seeding for Flask CLI commands")
-            return
-
-        db_manager.create_tables()
-
-        db_manager.seed_discord_bot_user()
-        db_manager.seed_tarkov_items(app.config.get("REFRESH_TARKOV_ITEMS", False))
-        db_manager.seed_weapon_attachments(app.config.get("REFRESH_TARKOV_ITEMS", False))
-
-        if app.config.get("SEED_ENTRIES"):
-            count = app.config.get("SEED_ENTRIES_COUNT", 100)
-            db_manager.seed_sample_entries(count)
-
-        app.logger.info("Database initialisation complete")
-
-def _init_discord_bot(app):
-    """initialise the discord bot if configured to do so"""
-    discord_manager.start_bot()
\ No newline at end of file
+        db_manager.initialise(
+            refresh_items=app.config.get("REFRESH_TARKOV_ITEMS", False),
+            sample_entries=app.config.get("SEED_ENTRIES_COUNT", 100) if app.config.get("SEED_ENTRIES") else 0,
+        )
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+Declarative achievement rules (constants.ACHIEVEMENT_RULES).
+
+A rule is an aggregate over a user's cases or case items, optionally filtered, compared with a threshold:
+
+    {"aggregate": "count", "over": "cases", "where": {"type": "Moonshine"}, "op": ">", "value": 10}
+
+- aggregate - count, exists, sum, max, min or distinct_count
+- over - "cases" or "items" (see CASE_FIELDS / ITEM_FIELDS). Item name and category are the
+  catalog's, compared lower case
+- field - what sum / max / min / distinct_count aggregate
+- where - {field: value or [values]}, every one has to match
+- per - "user" (default), or "case": the aggregate is taken per case and the rule holds if any case passes
+- op / value - the threshold (">=" 1 by default, exists takes neither)
+
+Each rule compiles to SQL (value_select / qualifying_users) so it can be evaluated for every user
+in one set-based query, and to a per-case delta (case_delta) so AchievementService can keep the
+same value as a running counter.
+"""
+import operator
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, literal, select
+
+from app.models import ScavCase, ScavCaseItem, TarkovItem
+
+AGGREGATES = ("count", "exists", "sum", "max", "min", "distinct_count")
+
+OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "==": operator.eq}
+
+CASE_FIELDS = {
+    "type": ScavCase.type,
+    "profit": ScavCase.profit,
+    "cost": ScavCase.cost,
+    "number_of_items": ScavCase.number_of_items,
+}
+
+ITEM_FIELDS = {
+    "name": func.lower(TarkovItem.name),
+    "category": func.lower(TarkovItem.category),
+    "tarkov_id": ScavCaseItem.tarkov_id,
+    "amount": ScavCaseItem.amount,
+    "price": ScavCaseItem.price,
+}
+
+# fields compared lower case (on both sides)
+_LOWER_CASE_FIELDS = {"name", "category"}
+# fields distinct_count can take - the seen values are stored as strings
+_DISTINCT_FIELDS = {"type", "name", "category", "tarkov_id"}
+
+# how a running counter takes a new case's value
+ADD, MAX, MIN, DISTINCT = "add", "max", "min", "distinct"
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    name: str
+    aggregate: str
+    over: str = "cases"
+    field: Optional[str] = None
+    where: tuple[tuple[str, tuple], ...] = ()
+    per: str = "user"
+    op: str = ">="
+    value: float = 1
+
+    @classmethod
+    def from_spec(cls, name: str, spec: dict[str, Any]) -> "AchievementRule":
+        """Validate a rule spec - raises ValueError naming the achievement if it's malformed"""
+        unknown = set(spec) - {"aggregate", "over", "field", "where", "per", "op", "value"}
+        if unknown:
+            raise ValueError(f"Achievement {name!r}: unknown rule keys {sorted(unknown)}")
+
+        aggregate = spec.get("aggregate")
+        over = spec.get("over", "cases")
+        per = spec.get("per", "user")
+        field = spec.get("field")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Achievement {name!r}: aggregate must be one of {AGGREGATES}")
+        if over not in ("cases", "items"):
+            raise ValueError(f"Achievement {name!r}: over must be 'cases' or 'items'")
+        if per not in ("user", "case"):
+            raise ValueError(f"Achievement {name!r}: per must be 'user' or 'case'")
+
+        fields = CASE_FIELDS if over == "cases" else ITEM_FIELDS
+        if aggregate in ("count", "exists"):
+            if field is not None:
+                raise ValueError(f"Achievement {name!r}: {aggregate} doesn't take a field")
+        elif field not in fields:
+            raise ValueError(f"Achievement {name!r}: {aggregate} needs a field of {over}: {sorted(fields)}")
+        if aggregate == "distinct_count" and field not in _DISTINCT_FIELDS:
+            raise ValueError(f"Achievement {name!r}: distinct_count takes one of {sorted(_DISTINCT_FIELDS)}")
+
+        if aggregate == "exists":
+            if "op" in spec or "value" in spec or per == "case":
+                raise ValueError(f"Achievement {name!r}: exists takes no threshold and is per user")
+            op, value = ">=", 1
+        else:
+            op, value = spec.get("op", ">="), spec.get("value", 1)
+            if op not in OPERATORS:
+                raise ValueError(f"Achievement {name!r}: op must be one of {sorted(OPERATORS)}")
+
+        where = []
+        for where_field, values in sorted((spec.get("where") or {}).items()):
+            if where_field not in fields:
+                raise ValueError(f"Achievement {name!r}: can't filter {over} on {where_field!r}")
+            values = tuple(values) if isinstance(values, (list, tuple, set)) else (values,)
+            if where_field in _LOWER_CASE_FIELDS:
+                values = tuple(v.lower() for v in values)
+            where.append((where_field, tuple(sorted(values))))
+
+        return cls(name, aggregate, over, field, tuple(where), per, op, value)
+
+    @property
+    def counter(self) -> str:
+        """Name of the running counter holding this rule's value - rules measuring the same thing share one"""
+        aggregate = "count" if self.aggregate == "exists" else self.aggregate
+        target = f"{self.over}.{self.field or '*'}"
+        for field, values in self.where:
+            target += f"|{field}={','.join(map(str, values))}"
+        counter = f"{aggregate}({target})"
+        if self.per == "case":
+            counter += f" per case {self.op} {self.value:g}"
+        return counter
+
+    @property
+    def combine(self) -> str:
+        """How the counter takes a new case's delta"""
+        if self.per == "case" or self.aggregate in ("count", "exists", "sum"):
+            return ADD
+        return {"max": MAX, "min": MIN, "distinct_count": DISTINCT}[self.aggregate]
+
+    def passes(self, value: Optional[float]) -> bool:
+        """Does a counter value earn the achievement? No value (nothing matched) never does."""
+        if value is None:
+            return False
+        if self.per == "case":
+            # the counter holds the number of cases that passed
+            return value >= 1
+        return OPERATORS[self.op](value, self.value)
+
+    # -- SQL
+
+    def value_select(self, user_ids: Optional[list[int]] = None):
+        """SELECT (user_id, value) - one row per user the rule has a value for, straight from the case tables"""
+        if self.per == "case":
+            per_case = self._restrict(
+                self._filtered(ScavCase.user_id, self._aggregate_expr().label("value"))
+                .group_by(ScavCase.id, ScavCase.user_id),
+                user_ids,
+            ).subquery()
+            return (
+                select(per_case.c.user_id, func.count().label("value"))
+                .where(OPERATORS[self.op](per_case.c.value, self.value))
+                .group_by(per_case.c.user_id)
+            )
+
+        return self._restrict(
+            self._filtered(ScavCase.user_id, self._aggregate_expr().label("value")).group_by(ScavCase.user_id),
+            user_ids,
+        )
+
+    def counter_select(self, user_ids: Optional[list[int]] = None):
+        """SELECT (user_id, counter name, value) - the rows AchievementService rebuilds its counters from"""
+        values = self.value_select(user_ids).subquery()
+        return select(values.c.user_id, literal(self.counter), values.c.value)
+
+    def distinct_values_select(self, user_ids: Optional[list[int]] = None):
+        """SELECT DISTINCT (user_id, counter name, value) - the values a distinct_count has seen"""
+        column = self._fields()[self.field]
+        return self._restrict(
+            self._filtered(ScavCase.user_id, literal(self.counter), column).where(column.is_not(None)).distinct(),
+            user_ids,
+        )
+
+    def qualifying_users(self):
+        """SELECT user_id of every user who has earned the achievement"""
+        if self.per == "case":
+            # value_select only has users with at least one passing case
+            return select(self.value_select().subquery().c.user_id)
+        values = self.value_select().subquery()
+        return select(values.c.user_id).where(OPERATORS[self.op](values.c.value, self.value))
+
+    def _fields(self) -> dict:
+        return CASE_FIELDS if self.over == "cases" else ITEM_FIELDS
+
+    def _filtered(self, *columns):
+        statement = select(*columns)
+        if self.over == "items":
+            statement = (
+                statement.select_from(ScavCaseItem)
+                .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+                .join(TarkovItem, TarkovItem.tarkov_id == ScavCaseItem.tarkov_id)
+            )
+        else:
+            statement = statement.select_from(ScavCase)
+
+        fields = self._fields()
+        for field, values in self.where:
+            column = fields[field]
+            statement = statement.where(column == values[0] if len(values) == 1 else column.in_(values))
+        return statement
+
+    def _aggregate_expr(self):
+        if self.aggregate in ("count", "exists"):
+            return func.count()
+        column = self._fields()[self.field]
+        if self.aggregate == "sum":
+            return func.coalesce(func.sum(column), 0)
+        if self.aggregate == "distinct_count":
+            return func.count(column.distinct())
+        return func.max(column) if self.aggregate == "max" else func.min(column)
+
+    @staticmethod
+    def _restrict(statement, user_ids: Optional[list[int]]):
+        return statement.where(ScavCase.user_id.in_(user_ids)) if user_ids is not None else statement
+
+    # -- one case, in Python
+
+    def case_delta(self, case_row: dict[str, Any], item_rows: Iterable[dict[str, Any]]):
+        """
+        What one new case adds to the counter (see case_rows) - a number, or a set of values for
+        distinct_count. None when the SQL wouldn't produce a row for it either (nothing matched).
+        """
+        rows = [case_row] if self.over == "cases" else item_rows
+        rows = [row for row in rows if all(row[field] in values for field, values in self.where)]
+        if not rows:
+            return None
+
+        if self.per == "case":
+            return 1 if OPERATORS[self.op](self._aggregate(rows), self.value) else None
+        return self._aggregate(rows)
+
+    def _aggregate(self, rows: list[dict[str, Any]]):
+        if self.aggregate in ("count", "exists"):
+            return len(rows)
+        values = [row[self.field] for row in rows if row[self.field] is not None]
+        if self.aggregate == "sum":
+            return sum(values)
+        if self.aggregate == "distinct_count":
+            return {str(v) for v in values}
+        if not values:
+            return None
+        return max(values) if self.aggregate == "max" else min(values)
+
+
+def case_rows(scav_case: ScavCase, items: Iterable[ScavCaseItem], catalog: dict[str, tuple[str, Optional[str]]]):
+    """
+    The rows case_delta works on, shaped like the SQL's. `catalog` maps tarkov_id -> (name, category);
+    items missing from it are left out, as the SQL's join to tarkov_item would.
+    """
+    case_row = {field: getattr(scav_case, field) for field in CASE_FIELDS}
+    item_rows = []
+    for item in items:
+        if item.tarkov_id not in catalog:
+            continue
+        name, category = catalog[item.tarkov_id]
+        item_rows.append({
+            "name": name.lower(),
+            "category": category.lower() if category is not None else None,
+            "tarkov_id": item.tarkov_id,
+            "amount": item.amount,
+            "price": item.price,
+        })
+    return case_row, item_rows
+
+
+def compile_rules(specs: dict[str, dict[str, Any]]) -> dict[str, AchievementRule]:
+    return {name: AchievementRule.from_spec(name, spec) for name, spec in specs.items()}
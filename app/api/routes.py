@@ -1,8 +1,10 @@
+import codecs
 import json
 from datetime import datetime, timedelta
 
 import humanize
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, Response, current_app, jsonify, request, abort, redirect, stream_with_context, url_for
+from flask_login import current_user, login_required
 
 from app.models import ScavCase, ScavCaseItem, User
 from app.extensions import db
@@ -10,12 +12,25 @@ from app.filters import get_item_cdn_image_url
 from app.market.utils import get_price
 from app.http.responses import success_response, error_response
 from app.http.errors import ValidationError, NotFoundError
+from app.http.caching import conditional_get, get_data_version
+from app.events import case_events
 from app.constants import SCAV_CASE_TYPES
 from app.services.scav_case_service import ScavCaseService
+from app.services.export_service import ExportService, EXPORT_MIMETYPES
+from app.services.import_service import ImportService
+from app.services.profit_distribution_service import ProfitDistributionService
+from app.services.case_simulation_service import CaseSimulationService, DEFAULT_SIMULATIONS, SIMULATION_CHOICES
+from app.services.catalog_index_service import CatalogIndexService
+from app.services.discord_stats_service import DiscordStatsService
 
 
 api_bp = Blueprint("api", __name__)
 _scav_case_service = ScavCaseService()
+_export_service = ExportService()
+_profit_distribution_service = ProfitDistributionService()
+_case_simulation_service = CaseSimulationService()
+_catalog_index_service = CatalogIndexService()
+_discord_stats_service = DiscordStatsService()
 
 
 def _since_date(days: int):
@@ -23,8 +38,20 @@ def _since_date(days: int):
     return datetime.utcnow() - timedelta(days=days) if days > 0 else None
 
 
+def _datetime_arg(name: str):
+    """Parse an optional ISO date / datetime query param"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValidationError(f"Invalid {name}, expected an ISO date (YYYY-MM-DD)") from e
+
+
 # queried by case_distribution_chart template (within dashboard)
 @api_bp.route("/api/scav-case-type-distribution")
+@conditional_get(max_age=60)
 def fetch_scav_case_type_distribution():
     days = request.args.get("days", 0, type=int)
     q = db.session.query(ScavCase.type, db.func.count(ScavCase.id)).group_by(ScavCase.type)
@@ -38,6 +65,7 @@ def fetch_scav_case_type_distribution():
 
 # queried by earnings_overview_chart template (within dashboard)
 @api_bp.route("/api/get-chart-data")
+@conditional_get(max_age=60)
 def get_chart_data_route():
     case_type = request.args.get("type", "all")
     days = request.args.get("days", 0, type=int)
@@ -73,6 +101,7 @@ def get_chart_data_route():
 
 # queried by dashboard KPI cards when the time-range slider or case-type dropdown changes
 @api_bp.route("/api/dashboard-kpis")
+@conditional_get(max_age=60)
 def dashboard_kpis():
     days = request.args.get("days", 0, type=int)
     case_type = request.args.get("case_type", "all")
@@ -109,19 +138,154 @@ def dashboard_kpis():
     )
 
 
+# profit percentiles / win rate / histogram for all cases, a case type or a user
+@api_bp.route("/api/profit-distribution")
+@conditional_get()
+def profit_distribution():
+    case_type = request.args.get("case_type", "all")
+    user_id = request.args.get("user_id", type=int)
+
+    if case_type.lower() != "all" and case_type not in SCAV_CASE_TYPES:
+        return error_response(message="Invalid case type", error_code="VALIDATION_ERROR", status_code=422)
+
+    data = _profit_distribution_service.get_distribution(case_type=case_type, user_id=user_id)
+    if case_type.lower() == "all" and user_id is None:
+        data["by_type"] = _profit_distribution_service.get_distributions_by_type()
+
+    return success_response(data=data, message="Profit distribution fetched")
+
+
+# monte carlo expected value of each case type at current prices - anyone gets the default
+# (cached) simulation size, logged in users may pick one of the others
+@api_bp.route("/api/case-simulation")
+@conditional_get()
+def case_simulation():
+    case_type = request.args.get("case_type", "all")
+    simulations = request.args.get("simulations", DEFAULT_SIMULATIONS, type=int)
+
+    if case_type.lower() != "all" and case_type not in SCAV_CASE_TYPES:
+        return error_response(message="Invalid case type", error_code="VALIDATION_ERROR", status_code=422)
+    if simulations not in SIMULATION_CHOICES:
+        return error_response(
+            message=f"simulations must be one of {', '.join(map(str, SIMULATION_CHOICES))}",
+            error_code="VALIDATION_ERROR",
+            status_code=422,
+        )
+    if simulations != DEFAULT_SIMULATIONS and not current_user.is_authenticated:
+        return error_response(
+            message="Log in to choose the number of simulations", error_code="AUTHENTICATION_ERROR", status_code=401,
+        )
+
+    if case_type.lower() == "all":
+        data = _case_simulation_service.simulate_all_types(simulations)
+    else:
+        data = {case_type: _case_simulation_service.simulate(case_type, simulations)}
+
+    return success_response(data=data, message="Case simulation complete")
+
+
+# item catalog for the client side typeahead - always points at the current content-hashed file
+@api_bp.route("/api/catalog/index")
+def catalog_index():
+    index = _catalog_index_service.get_index()
+    response = redirect(url_for("api.catalog_index_file", version=index.version))
+    response.cache_control.no_cache = True
+    return response
+
+
+@api_bp.route("/api/catalog/index/<version>.json")
+def catalog_index_file(version: str):
+    index = _catalog_index_service.get_index()
+    if version != index.version:
+        # an old page asking for a previous catalog - send it to the current one
+        return catalog_index()
+
+    if "gzip" in request.accept_encodings:
+        response = Response(index.gzipped, mimetype="application/json")
+        response.content_encoding = "gzip"
+    else:
+        response = Response(index.body, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    response.set_etag(index.version)
+    # the content at this URL never changes
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 60 * 60
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+# live dashboard updates - one long-lived connection instead of polling the KPI endpoints
+@api_bp.route("/api/stream/cases")
+def stream_case_events():
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    app = current_app._get_current_object()
+
+    def cases_version():
+        # the stream outlives the request, so each read gets its own (short) app context and session
+        with app.app_context():
+            return get_data_version()[0]
+
+    return Response(
+        case_events.stream(last_event_id, data_version=cases_version),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# bulk export for offline analysis - streamed, so memory use doesn't grow with the row count
+@api_bp.route("/api/export/cases")
+@login_required
+def export_cases():
+    fmt = request.args.get("format", "csv")
+    level = request.args.get("level", "cases")
+    compress = request.args.get("gzip", "0").lower() in ("1", "true", "yes")
+
+    chunks = _export_service.export(
+        fmt,
+        level,
+        user_id=request.args.get("user_id", type=int),
+        case_type=request.args.get("case_type"),
+        since=_datetime_arg("since"),
+        until=_datetime_arg("until"),
+        compress=compress,
+    )
+
+    filename = f"scav_{level}.{fmt}" + (".gz" if compress else "")
+    return Response(
+        stream_with_context(chunks),
+        mimetype="application/gzip" if compress else EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+# bulk import of the logged in user's historical cases (JSON Lines or CSV upload)
+@api_bp.route("/api/import/cases", methods=["POST"])
+@login_required
+def import_cases():
+    upload = request.files.get("file")
+    if upload is None:
+        raise ValidationError("No file uploaded")
+
+    fmt = request.form.get("format") or ("csv" if (upload.filename or "").endswith(".csv") else "jsonl")
+    # decode line by line from the (spooled) upload, never read the whole thing into memory
+    lines = codecs.iterdecode(upload.stream, "utf-8-sig")
+
+    result = ImportService().import_cases(
+        lines,
+        fmt,
+        owner_id=current_user.id,
+        resolve_prices=request.form.get("resolve_prices", "1").lower() in ("1", "true", "yes"),
+        strict=request.form.get("strict", "0").lower() in ("1", "true", "yes"),
+    )
+    return success_response(data=result.to_dict(), message=f"Imported {result.cases} case(s)")
+
+
 # queried by discord bot
 @api_bp.route("/api/discord-stats")
+@conditional_get()
 def discord_stats():
-    """Stats results to be fetched by the discord bot"""
-    total_profit = ScavCase.query.with_entities(db.func.sum(ScavCase.profit)).scalar() or 0
-    total_cases = ScavCase.query.count()
-    total_spend = ScavCase.query.with_entities(db.func.sum(ScavCase.cost)).scalar() or 0
-
+    """Site-wide totals with per case type / top user breakdowns (what the discord bot's !stats shows)"""
     return success_response(
-        data = {
-            "total_profit": total_profit,
-            "total_cases": total_cases,
-            "total_spend": total_spend
-        },
+        data = _discord_stats_service.get_stats(),
         message = "Discord stats fetched"
     )
\ No newline at end of file
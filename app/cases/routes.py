@@ -1,12 +1,11 @@
 import os
 import json
-import requests
 from collections import defaultdict
 
 from flask import Blueprint, request, render_template, redirect, url_for, flash, current_app, jsonify, abort
 from flask_login import login_required, current_user
 
-from app.models import ScavCase, ScavCaseItem, TarkovItem
+from app.models import ScavCase, ScavCaseItem
 from app.constants import SCAV_CASE_TYPES, CLOUDINARY_BASE_URL
 from app.cases.forms import CreateScavCaseForm, UpdateScavCaseForm
 from app.cases.utils import is_discord_bot_request
@@ -14,6 +13,8 @@ from app.extensions import csrf
 from app.services.scav_case_service import ScavCaseService
 from app.http.errors import AuthorizationError
 from app.http.responses import success_response
+from app.http.caching import conditional_get
+from app.database import search as item_search
 
 # TODO: Db ops not directly in here
 from app.extensions import db
@@ -29,7 +30,7 @@ def search_items():
     if not query or len(query) < 2:
         return render_template("partials/_scav_case_search_item_list.html", items=[])
 
-    items = TarkovItem.query.filter(TarkovItem.name.ilike(f"%{query}%")).limit(15).all()
+    items = item_search.search_items(query, limit=15)
     return render_template("partials/_scav_case_search_item_list.html", items=items)
 
 @cases_bp.route("/cases/global-dashboard/layout")
@@ -54,6 +55,7 @@ def dashboard():
 
 @cases_bp.route("/cases/items")
 @login_required
+@conditional_get(per_user=True)
 def cases_items():
     page = request.args.get("page", 1, type=int)
     case_type = request.args.get("case_type", "all")
@@ -98,13 +100,14 @@ def cases_items():
 @cases_bp.route("/cases/all", methods=["GET"])
 @login_required
 def all_scav_cases():
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     sort_by = request.args.get("sort_by", "created_at")
     sort_order = request.args.get("sort_order", "desc")
     case_type = request.args.get("case_type", "all")
 
-    pagination = scav_case_service.get_all_cases_paginated(
-        page=page, sort_by=sort_by, sort_order=sort_order, case_type=case_type
+    # keyset pagination - deep pages cost the same as the first one
+    pagination = scav_case_service.get_all_cases_keyset(
+        cursor=cursor, sort_by=sort_by, sort_order=sort_order, case_type=case_type
     )
 
     return render_template(
@@ -118,6 +121,7 @@ def all_scav_cases():
 
 
 @cases_bp.route("/cases/insights-data")
+@conditional_get()
 def insights_data():
     case_type = request.args.get("case_type", "all")
     insights = scav_case_service.calculate_insights_data(case_type)
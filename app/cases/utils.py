@@ -3,19 +3,24 @@ import re
 import json
 import secrets
 from collections import defaultdict
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Optional, Union
 
-import requests
-import pytesseract
-from PIL import Image, ImageFilter, ImageOps
 from flask import flash, current_app
-from rapidfuzz import process, fuzz
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 
-from app.constants import ACHIEVEMENT_CHECKS, ACHIEVEMENT_METADATA
-from app.models import Insight, TarkovItem, ScavCase, ScavCaseItem, UserAchievement, User
+from app.constants import ACHIEVEMENT_METADATA
+from app.models import Insight, TarkovItem, ScavCaseItem, UserAchievement
 from app.extensions import db
+from app.services.achievement_service import AchievementService
+from app.services.catalog_sync_service import catalog_cached
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# pytesseract, PIL and rapidfuzz are imported where they're used - only OCR needs them, and they'd
+# otherwise be loaded by every worker at boot
 
 
 class ItemNotFoundException(Exception):
@@ -37,7 +42,11 @@ def generate_image_query(item_id):
     )
 
 
-def _preprocess_image(image_path: str) -> Image.Image:
+# a path on disk, or an open binary file (e.g. io.BytesIO of an image held in memory)
+ImageSource = Union[str, BinaryIO]
+
+
+def _preprocess_image(image_path: ImageSource) -> "Image.Image":
     """
     Preprocess an EFT screenshot for OCR.
 
@@ -48,6 +57,11 @@ def _preprocess_image(image_path: str) -> Image.Image:
     3. Invert (white-on-dark → dark-on-white)
     4. Hard binarize at threshold 128 (no blur — it destroys small quantity text)
     """
+    from PIL import Image, ImageOps
+
+    if hasattr(image_path, "seek"):
+        # in memory images get read more than once (validation, then item extraction)
+        image_path.seek(0)
     img = Image.open(image_path)
     w, h = img.size
     # 3× upscale — Tesseract needs resolution for small text like the (1) quantity indicator
@@ -68,7 +82,10 @@ def _normalize_for_matching(text: str) -> str:
     return text
 
 
-def validate_scav_case_image(image_path: str) -> bool:
+def validate_scav_case_image(image_path: ImageSource) -> bool:
+    import pytesseract
+    from rapidfuzz import fuzz
+
     img = _preprocess_image(image_path)
     text_data = pytesseract.image_to_string(img, config="--psm 6 --oem 3")
     confidence = fuzz.partial_ratio("scavs have brought you", text_data.lower())
@@ -77,32 +94,48 @@ def validate_scav_case_image(image_path: str) -> bool:
     return False
 
 
+@catalog_cached
+def _ocr_catalog() -> dict[str, tuple[str, str]]:
+    """
+    Normalised name -> (tarkov_id, name) of every item still in the catalog - built once, and again
+    only after the catalog changes, instead of on every screenshot
+    """
+    catalog = {}
+    rows = db.session.execute(
+        select(TarkovItem.tarkov_id, TarkovItem.name).where(TarkovItem.removed_at.is_(None)).order_by(TarkovItem.id)
+    )
+    for tarkov_id, name in rows:
+        # the first item wins where names collide, as the old per-match lookup by name did
+        catalog.setdefault(_normalize_for_matching(name), (tarkov_id, name))
+    return catalog
+
+
 def fuzzy_match_ocr_to_database(
-    ocr_text: str, item_names: list[str], score_cutoff: int = 70
-) -> "TarkovItem | None":
+    ocr_text: str, catalog: dict[str, tuple[str, str]], score_cutoff: int = 70
+) -> Optional[tuple[str, str]]:
     """
-    Fuzzy-match an OCR'd item name against the database.
+    Fuzzy-match an OCR'd item name against the catalog (see _ocr_catalog), returning (tarkov_id, name).
 
     Uses WRatio (handles word reordering, partial matches) with normalised text
     on both sides. score_cutoff is 70 for confirmed item lines, 85 for fallback lines.
     """
-    normalized_ocr = _normalize_for_matching(ocr_text)
-    normalized_map = {_normalize_for_matching(n): n for n in item_names}
+    from rapidfuzz import fuzz, process
 
     best_match = process.extractOne(
-        normalized_ocr,
-        list(normalized_map.keys()),
+        _normalize_for_matching(ocr_text),
+        catalog.keys(),
         scorer=fuzz.WRatio,
         score_cutoff=score_cutoff,
     )
 
     if best_match:
-        original_name = normalized_map[best_match[0]]
-        return TarkovItem.query.filter_by(name=original_name).first()
+        return catalog[best_match[0]]
     return None
 
 
-def process_image_for_items(image_path: str) -> str:
+def process_image_for_items(image_path: ImageSource) -> str:
+    import pytesseract
+
     img = _preprocess_image(image_path)
     text = pytesseract.image_to_string(img, config="--psm 6 --oem 3")
     return text
@@ -131,8 +164,7 @@ def extract_items_from_ocr(text: str):
     """
     current_app.logger.info(f"[DEBUG] Raw OCR text:\n{text}")
 
-    all_items = TarkovItem.query.with_entities(TarkovItem.tarkov_id, TarkovItem.name).all()
-    item_names = [name for _, name in all_items]
+    catalog = _ocr_catalog()
 
     # Matches <anything> (<integer>) — non-greedy
     item_line_pattern = re.compile(r"^(.+?)\s+\((\d+)\)")
@@ -187,13 +219,14 @@ def extract_items_from_ocr(text: str):
         current_app.logger.info(
             f"[DEBUG] Trying to match: '{item_name}' qty={quantity} definite={is_definite_item}"
         )
-        matched_item = fuzzy_match_ocr_to_database(item_name, item_names, score_cutoff)
+        matched_item = fuzzy_match_ocr_to_database(item_name, catalog, score_cutoff)
 
         if matched_item:
-            current_app.logger.info(f"[DEBUG] Matched '{item_name}' → '{matched_item.name}'")
+            tarkov_id, matched_name = matched_item
+            current_app.logger.info(f"[DEBUG] Matched '{item_name}' → '{matched_name}'")
             items.append({
-                "id": matched_item.tarkov_id,
-                "name": matched_item.name,
+                "id": tarkov_id,
+                "name": matched_name,
                 "quantity": quantity,
             })
         elif is_definite_item:
@@ -217,7 +250,7 @@ def save_uploaded_image(uploaded_image):
     return file_path
 
 
-def process_scav_case_image(file_path):
+def process_scav_case_image(file_path: ImageSource):
     """
     Validate and process an image of a scav case to extract item data using OCR.
 
@@ -227,7 +260,8 @@ def process_scav_case_image(file_path):
     3. Extracts item information from the OCR text.
 
     Args:
-        file_path (str): The path to the image file to be processed.
+        file_path (str | BinaryIO): The path to the image file to be processed, or the image
+            itself as an open binary file (nothing needs writing to disk).
 
     Returns:
         list: A list of dictionaries containing extracted item information.
@@ -401,30 +435,30 @@ def calculate_avg_return_by_case_type(scav_cases):
         },
     }
 
-def check_achievements(user):
-    """Check which achievements a user qualifies for and unlock them"""
-    # Eagerly load scav_cases + items in 2 queries to avoid N+1 inside the lambda checks
-    user_loaded = (
-        db.session.query(User)
-        .options(selectinload(User.scav_cases).selectinload(ScavCase.items))
-        .filter(User.id == user.id)
-        .one()
-    )
-    unlocked_achievements = {a.achievement_name for a in user_loaded.achievements}
-    # TODO: What if a scav case is deleted, or the items changed. Achievements should be removed
-    # TODO: Create new lock_achievement (or similar) function
-    # TODO: Will need to add checks in the scav_case_service.py
-    for achievement_name, check_func in ACHIEVEMENT_CHECKS.items():
-        if achievement_name not in unlocked_achievements and check_func(user_loaded):
-            unlock_achievement(user_loaded, achievement_name)
-
-def unlock_achievement(user, achievement_name):
+def check_achievements(user, notify: bool = True):
+    """Check which achievements a user qualifies for and unlock them (`notify` flashes a message, needs a request)"""
+    # the rules only read the user's running counters (kept up to date by every case write), so this
+    # costs the same however many cases the user has. Edits / deletes revoke in the service layer.
+    unlocked_achievements = {
+        name for (name,) in db.session.query(UserAchievement.achievement_name).filter_by(user_id=user.id)
+    }
+    newly_earned = sorted(AchievementService().earned(user.id) - unlocked_achievements)
+    for achievement_name in newly_earned:
+        unlock_achievement(user, achievement_name, notify=notify)
+
+def unlock_achievement(user, achievement_name, notify: bool = True):
     """Unlock an achievement and store it in the database."""
     new_achievement = UserAchievement(user_id=user.id, achievement_name=achievement_name)
     db.session.add(new_achievement)
-    db.session.commit()
-
-    flash(f"🎉 Achievement Unlocked: {achievement_name}!", "success")
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent submission by the same user unlocked it first
+        db.session.rollback()
+        return
+
+    if notify:
+        flash(f"🎉 Achievement Unlocked: {achievement_name}!", "success")
 
 def is_discord_bot_request(request):
     """Check if a request is from discord bot with valid credentials"""
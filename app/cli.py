@@ -0,0 +1,179 @@
+"""Flask CLI commands (`flask <group> <command>`) for maintenance jobs that shouldn't run per request"""
+import click
+from flask.cli import AppGroup
+
+from app.database.manager import db_manager
+from app.discord_bot.manager import discord_manager
+from app.http.errors import ValidationError
+from app.models import User
+from app.services.achievement_service import AchievementService
+from app.services.export_service import EXPORT_FORMATS, EXPORT_LEVELS, ExportService
+from app.services.import_service import IMPORT_FORMATS, ImportService
+from app.services.item_stats_service import ItemStatsService
+from app.services.profit_distribution_service import ProfitDistributionService
+from app.services.synthetic_dataset_service import (
+    DEFAULT_SEED, DEFAULT_USERNAME_PREFIX, SyntheticDatasetService, load_fixture_prices,
+)
+from app.services.user_stats_service import UserStatsService
+
+stats_cli = AppGroup("stats", help="Maintain the precomputed statistics tables.")
+export_cli = AppGroup("export", help="Bulk export data for offline analysis.")
+import_cli = AppGroup("import", help="Bulk import historical data.")
+achievements_cli = AppGroup("achievements", help="Evaluate achievement rules for every user.")
+discord_bot_cli = AppGroup("discord-bot", help="Run and monitor the Discord bot.")
+setup_cli = AppGroup("setup", help="One-off deployment steps.")
+dataset_cli = AppGroup("dataset", help="Generate synthetic data for benchmarks.")
+
+
+@setup_cli.command("database")
+@click.option("--refresh-items", is_flag=True, help="Reload the item catalog and weapon attachments even if seeded.")
+@click.option("--sample-entries", type=int, default=0, show_default=True,
+              help="Also generate this many random scav cases (for local development).")
+def setup_database(refresh_items, sample_entries):
+    """
+    Create the schema and seed the bot user, item catalog and weapon attachments - run once per
+    deploy (after `flask db upgrade`) instead of in every worker at boot.
+    """
+    db_manager.initialise(refresh_items=refresh_items, sample_entries=sample_entries)
+    click.echo("Database initialised")
+
+
+@dataset_cli.command("generate")
+@click.option("--users", type=int, default=100, show_default=True, help="Users to spread the cases over.")
+@click.option("--cases", type=int, default=10_000, show_default=True, help="Scav cases to add.")
+@click.option("--seed", type=int, default=DEFAULT_SEED, show_default=True, help="Same seed, same dataset.")
+@click.option("--prices", "prices_file", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="JSON {tarkov_id: price} fixture, instead of the built-in synthetic prices.")
+@click.option("--username-prefix", default=DEFAULT_USERNAME_PREFIX, show_default=True)
+@click.option("--password", default=None, help="Password for new users (default: a random, unusable one).")
+@click.option("--until", type=click.DateTime(), default=None,
+              help="Latest case date (default: midnight today) - fix it for byte-identical datasets.")
+@click.option("--days", type=int, default=365, show_default=True, help="Days of history before --until.")
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Cases per insert transaction.")
+@click.option("--skip-stats", is_flag=True, help="Don't rebuild the stats tables afterwards (run `flask stats rebuild`).")
+def generate_dataset(users, cases, seed, prices_file, username_prefix, password, until, days, batch_size, skip_stats):
+    """Add a reproducible synthetic dataset (users, scav cases and their items) - offline, from the item catalog."""
+    try:
+        result = SyntheticDatasetService(batch_size=batch_size).generate(
+            users,
+            cases,
+            seed=seed,
+            prices=load_fixture_prices(prices_file) if prices_file else None,
+            username_prefix=username_prefix,
+            password=password,
+            end=until,
+            days=days,
+            rebuild_stats=not skip_stats,
+            progress=lambda done: click.echo(f"  {done}/{cases} cases", err=True),
+        )
+    except ValidationError as e:
+        raise click.ClickException(e.message)
+    click.echo(
+        f"Generated {result.cases} case(s) / {result.items} item(s) for {result.users} user(s) "
+        f"({result.users_created} new) in {result.seconds:.1f}s"
+    )
+
+
+@stats_cli.command("rebuild")
+def rebuild_stats():
+    """
+    Recompute the user_stats tables, profit sketches, item_stats and achievement counters from every
+    scav case (run it after changing ACHIEVEMENT_RULES).
+    """
+    count = UserStatsService().rebuild()
+    ProfitDistributionService().rebuild()
+    item_count = ItemStatsService().rebuild()
+    AchievementService().rebuild()
+    click.echo(f"Rebuilt stats for {count} user(s) and {item_count} item(s)")
+
+
+@achievements_cli.command("evaluate")
+@click.option("--achievement", "names", multiple=True, help="Only this achievement (repeatable, default: all).")
+@click.option("--revoke", is_flag=True, help="Also take achievements back from users who no longer earn them.")
+def evaluate_achievements(names, revoke):
+    """Award (and optionally revoke) achievements for every user - one set-based query per rule."""
+    service = AchievementService()
+    try:
+        awarded = service.award(names or None)
+        revoked = service.revoke(names or None) if revoke else {}
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--achievement")
+
+    for name, count in awarded.items():
+        line = f"{name}: +{count}"
+        if revoke:
+            line += f" / -{revoked[name]}"
+        click.echo(line)
+
+
+@discord_bot_cli.command("run")
+@click.option("--max-restarts", type=int, default=None, help="Give up after this many restarts (default: never).")
+def run_discord_bot(max_restarts):
+    """Run the Discord bot in the foreground, restarting it with backoff if it dies."""
+    try:
+        discord_manager.run(max_restarts=max_restarts)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+
+@discord_bot_cli.command("health")
+@click.option("--max-age", type=float, default=None,
+              help="Seconds since the last heartbeat (default: three heartbeat intervals).")
+def discord_bot_health(max_age):
+    """Exit non-zero unless the bot has written a heartbeat recently (for container health checks)."""
+    heartbeat = discord_manager.heartbeat()
+    if not discord_manager.is_healthy(max_age):
+        raise click.ClickException("Discord bot is not healthy" + ("" if heartbeat else " (no heartbeat)"))
+    click.echo(f"Discord bot is healthy (latency {heartbeat['latency'] * 1000:.0f}ms, {heartbeat['queued']} queued)")
+
+
+@export_cli.command("cases")
+@click.option("--format", "fmt", type=click.Choice(EXPORT_FORMATS), default="csv", show_default=True)
+@click.option("--level", type=click.Choice(EXPORT_LEVELS), default="cases", show_default=True,
+              help="One row per case, or one row per case item.")
+@click.option("--user-id", type=int, default=None, help="Only export this user's cases.")
+@click.option("--case-type", default=None, help="Only export this case type.")
+@click.option("--since", type=click.DateTime(), default=None, help="Cases created on/after this date.")
+@click.option("--until", type=click.DateTime(), default=None, help="Cases created before this date.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Rows fetched per round trip.")
+@click.option("-o", "--output", type=click.File("wb"), default="-", help="Output file (default stdout).")
+def export_cases(fmt, level, user_id, case_type, since, until, compress, batch_size, output):
+    """Stream scav cases (or their items) to a file as CSV, JSON Lines or Parquet."""
+    chunks = ExportService(batch_size=batch_size).export(
+        fmt, level, user_id=user_id, case_type=case_type, since=since, until=until, compress=compress,
+    )
+    written = 0
+    for chunk in chunks:
+        output.write(chunk)
+        written += len(chunk)
+    output.flush()
+    click.echo(f"Exported {written} bytes", err=True)
+
+
+@import_cli.command("cases")
+@click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "fmt", type=click.Choice(IMPORT_FORMATS), default=None,
+              help="Input format (default: from the file extension).")
+@click.option("--user", "username", default=None, help="Assign every case to this user instead of the 'user' field.")
+@click.option("--no-price-lookup", is_flag=True, help="Don't look up missing prices - records without them fail.")
+@click.option("--strict", is_flag=True, help="Abort (and write nothing) if any record is invalid.")
+@click.option("--batch-size", type=int, default=5000, show_default=True)
+def import_cases(source, fmt, username, no_price_lookup, strict, batch_size):
+    """Bulk import scav cases (with items) from a JSON Lines or CSV file ('-' for stdin)."""
+    fmt = fmt or ("csv" if source.name.endswith(".csv") else "jsonl")
+    owner_id = None
+    if username:
+        owner = User.query.filter_by(username=username).first()
+        if owner is None:
+            raise click.BadParameter(f"No such user: {username}", param_hint="--user")
+        owner_id = owner.id
+
+    result = ImportService(batch_size=batch_size).import_cases(
+        source, fmt, owner_id=owner_id, resolve_prices=not no_price_lookup, strict=strict,
+    )
+    click.echo(f"Imported {result.cases} case(s) / {result.items} item(s) for {result.users} user(s)")
+    if result.error_count:
+        click.echo(f"Skipped {result.error_count} invalid record(s):", err=True)
+        for error in result.errors:
+            click.echo(f"  line {error['line']}: {error['message']}", err=True)
@@ -7,10 +7,13 @@ SEED_ENTRIES: when this is set to true, the application will auto-generate some
 REFRESH_TARKOV_ITEMS: when this is set to true, the application will read a new JSON list
                       list of items from ../items.json. I need to include the code for scraping this
                       into the repository, or better yet, add it into the program.
+INIT_DATABASE_ON_STARTUP: create the tables and run the seeds above in create_app. Off in production,
+                          where `flask setup database` does it once per deploy so workers boot quickly.
 """
 
 import os
 import secrets
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -30,14 +33,26 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
 
     DISCORD_CHANNEL_ID = os.getenv("DISCORD_SCAV_CASE_CHANNEL_ID")
-    DISCORD_DOWNLOAD_DIR = "app/static/uploads/discord_bot"
+    # screenshots the bot processes at once, and the threads it OCRs / submits them on (see ImageDownloaderClient)
+    DISCORD_SUBMISSION_WORKERS = int(os.getenv("DISCORD_SUBMISSION_WORKERS", "10"))
+    # the bot runs on its own (`flask discord-bot run`) - restart backoff in seconds, doubling up to the max
+    DISCORD_RESTART_BACKOFF = float(os.getenv("DISCORD_RESTART_BACKOFF", "1"))
+    DISCORD_RESTART_BACKOFF_MAX = float(os.getenv("DISCORD_RESTART_BACKOFF_MAX", "300"))
+    # written by the bot every DISCORD_HEARTBEAT_INTERVAL seconds while connected (`flask discord-bot health`)
+    DISCORD_HEARTBEAT_FILE = os.getenv(
+        "DISCORD_HEARTBEAT_FILE", os.path.join(tempfile.gettempdir(), "scav_case_tracker_discord_bot.heartbeat")
+    )
+    DISCORD_HEARTBEAT_INTERVAL = float(os.getenv("DISCORD_HEARTBEAT_INTERVAL", "30"))
+
+    # start date (YYYY-MM-DD) of the current wipe, for the "This wipe" leaderboard
+    CURRENT_WIPE_START = os.getenv("CURRENT_WIPE_START")
 
 
 class DevelopmentConfig(Config):
     """Config for development"""
 
     DEBUG = True
-    START_DISCORD_BOT = False
+    INIT_DATABASE_ON_STARTUP = os.getenv("INIT_DATABASE_ON_STARTUP", "true").lower() == "true"
     SEED_ENTRIES = False
     SEED_ENTRIES_COUNT = 1000
     REFRESH_TARKOV_ITEMS = False
@@ -47,7 +62,7 @@ class ProductionConfig(Config):
     """Config for production"""
 
     DEBUG = False
-    START_DISCORD_BOT = True
+    INIT_DATABASE_ON_STARTUP = os.getenv("INIT_DATABASE_ON_STARTUP", "false").lower() == "true"
     SEED_ENTRIES = False
     SEED_ENTRIES_COUNT = 1000
     REFRESH_TARKOV_ITEMS = False
@@ -1,96 +1,15 @@
-CATEGORY_MAPPING = {
-    "Headphones": "Headsets",
-    "Headwear": "Helmets",
-    "Map": "Barter Items",
-    "Face Cover": "Helmets",
-    "Vis. observ. device": "Face Cover",
-    "Armor": "Armors",
-    "Armored equipment": "Armors",
-    "Armor Plate": "Armors",
-    "Chest rig": "Rigs",
-    "Backpack": "Backpacks",
-    "Assault rifle": "Guns",
-    "Handgun": "Guns",
-    "Shotgun": "Guns",
-    "Sniper rifle": "Guns",
-    "Magazine": "Mods",
-    "SMG": "Guns",
-    "Assault carbine": "Guns",
-    "Marksman rifle": "Guns",
-    "Machinegun": "Guns",
-    "Revolver": "Guns",
-    "Grenade launcher": "Guns",
-    "Flashhider": "Mods",
-    "Assault scope": "Mods",
-    "Reflex sight": "Mods",
-    "Foregrip": "Mods",
-    "Receiver": "Mods",
-    "Charging handle": "Mods",
-    "Handguard": "Mods",
-    "Mount": "Mods",
-    "Stock": "Mods",
-    "Ironsight": "Mods",
-    "Auxiliary Mod": "Mods",
-    "Scope": "Mods",
-    "Bipod": "Mods",
-    "Gas block": "Mods",
-    "Night Vision": "Mods",
-    "Compact reflex sight": "Mods",
-    "Special scope": "Mods",
-    "Thermal Vision": "Mods",
-    "UBGL": "Mods",
-    "Comb. muzzle device": "Mods",
-    "Comb. tact. device": "Mods",
-    "Knife": "Guns",
-    "Barrel": "Mods",
-    "Pistol grip": "Mods",
-    "Silencer": "Suppressors",
-    "Throwable weapon": "Grenades",
-    "Ammo container": "Ammo",
-    "Port. container": "Containers",
-    "Locking container": "Containers",
-    "Common container": "Containers",
-    "Random Loot Container": "Containers",
-    "Money": "Barter Items",
-    "Battery": "Barter Items",
-    "Electronics": "Barter Items",
-    "Lubricant": "Barter Items",
-    "Jewelry": "Barter Items",
-    "Other": "Barter Items",
-    "Building material": "Barter Items",
-    "Stimulant": "Medical",
-    "Tool": "Barter Items",
-    "Fuel": "Barter Items",
-    "Flashlight": "Mods",
-    "Household goods": "Barter Items",
-    "Flyer": "Barter Items",
-    "Multitools": "Barter Items",
-    "Compass": "Barter Items",
-    "Info": "Barter Items",
-    "Repair Kits": "Barter Items",
-    "Special item": "Barter Items",
-    "Arm Band": "Barter Items",
-    "Spring Driven Cylinder": "Mods",
-    "Cylinder Magazine": "Mods",
-    "Portable Range Finder": "Barter Items",
-    "Radio Transmitter": "Barter Items",
-    "Cultist Amulet": "Barter Items",
-    "Mark of the Unheard": "Barter Items",
-    "Planting Kits": "Barter Items",
-    "Mechanical Key": "Keys",
-    "Keycard": "Keys",
-    "Drink": "Provisions",
-    "Food": "Provisions",
-    "Medical item": "Medical",
-    "Drug": "Medical",
-    "Medikit": "Medical",
-    "Medical supplies": "Medical",
-    "Ammo": "Ammo",
-    "Ammo packs": "Ammo",
-}
+# tarkov.dev category -> the broad category items are filed under (kept with the catalog sync, which also
+# runs outside the app)
+from catalog_sync import CATEGORY_MAPPING  # noqa: F401
 
 SCAV_CASE_TYPES = ["₽2500", "₽15000", "₽95000", "Moonshine", "Intelligence"]
 
+# the item-priced case types cost whatever the item is worth (bottle of moonshine / intelligence folder)
+CASE_COST_ITEM_IDS = {
+    "Moonshine": "5d1b376e86f774252519444e",
+    "Intelligence": "5c12613b86f7743bbe2c3f76",
+}
+
 DEFAULT_TRACKED_ITEMS = [
     "Pack of sugar",
     "Bottle of Fierce Hatchling moonshine",
@@ -133,46 +52,37 @@ MESSAGES_500 = [
     "This page hit an invisible Sturman guard. Try again.",
 ]
 
-ACHIEVEMENT_CHECKS = {
-    "First Case": lambda user: len(user.scav_cases) >= 1,
-    "Scav Veteran": lambda user: len(user.scav_cases) >= 50,
-    "Scav Elite": lambda user: len(user.scav_cases) >= 100,
-    "Millionaire": lambda user: sum((case._return - case.cost) for case in user.scav_cases) >= 1_000_000,
-    "Multi-Millionaire": lambda user: sum((case._return - case.cost) for case in user.scav_cases) >= 10_000_000,
-    "Hoarder": lambda user: sum((case._return - case.cost) for case in user.scav_cases) >= 100_000_000,
-    "Moonshine Master": lambda user: sum(1 for case in user.scav_cases if case.type == "Moonshine") > 10,
-    "Intelligence Operator": lambda user: sum(1 for case in user.scav_cases if case.type == "Intelligence") > 10,
-    "Moonshine Tycoon": lambda user: sum(1 for case in user.scav_cases if case.type == "Moonshine") > 50,
-    "Intel Mogul": lambda user: sum(1 for case in user.scav_cases if case.type == "Intelligence") > 50,
-    "Bitcoin Finder": lambda user: any(
-        any(item.tarkov_item and item.tarkov_item.name == "Physical Bitcoin" for item in case.items)
-        for case in user.scav_cases if case.items
-    ),
-    "Tech Scavenger": lambda user: any(
-        any(item.tarkov_item and item.tarkov_item.name.lower() in {"graphics card", "tetriz portable game console"} 
-            for item in case.items)
-        for case in user.scav_cases if case.items
-    ),
-    "Weapon Collector": lambda user: len({
-        item.tarkov_item.name for case in user.scav_cases if case.items
-        for item in case.items if item.tarkov_item and item.tarkov_item.category.lower() == "guns"
-    }) >= 10,
-    "Keymaster": lambda user: sum(
-        1 for case in user.scav_cases if case.items  # Ensure case has items
-        for item in case.items 
-        if item.tarkov_item and item.tarkov_item.category.lower() == "keys"
-    ) >= 5,
-    "Rare Loot Hunter": lambda user: any((case._return - case.cost) >= 1_000_000 for case in user.scav_cases),
-    "Jackpot!": lambda user: any(
-        sum(1 for item in case.items if item.tarkov_item.name == "Physical Bitcoin") >= 3
-        for case in user.scav_cases
-    ),
-    "Nothing But Trash": lambda user: any((case._return - case.cost) <= 5000 for case in user.scav_cases),
-    "Lone Survivor": lambda user: any(len(case.items) == 1 for case in user.scav_cases),
-    "Combat Medic": lambda user: any(
-        sum(1 for item in case.items if item.tarkov_item.name == "LEDX Skin Transilluminator") >= 1
-        for case in user.scav_cases
-    ),
+# declarative, so every rule compiles to SQL (see app/achievements/rules.py for the format)
+ACHIEVEMENT_RULES = {
+    "First Case": {"aggregate": "count", "over": "cases", "op": ">=", "value": 1},
+    "Scav Veteran": {"aggregate": "count", "over": "cases", "op": ">=", "value": 50},
+    "Scav Elite": {"aggregate": "count", "over": "cases", "op": ">=", "value": 100},
+    "Millionaire": {"aggregate": "sum", "over": "cases", "field": "profit", "op": ">=", "value": 1_000_000},
+    "Multi-Millionaire": {"aggregate": "sum", "over": "cases", "field": "profit", "op": ">=", "value": 10_000_000},
+    "Hoarder": {"aggregate": "sum", "over": "cases", "field": "profit", "op": ">=", "value": 100_000_000},
+    "Moonshine Master": {"aggregate": "count", "over": "cases", "where": {"type": "Moonshine"}, "op": ">", "value": 10},
+    "Intelligence Operator": {
+        "aggregate": "count", "over": "cases", "where": {"type": "Intelligence"}, "op": ">", "value": 10,
+    },
+    "Moonshine Tycoon": {"aggregate": "count", "over": "cases", "where": {"type": "Moonshine"}, "op": ">", "value": 50},
+    "Intel Mogul": {"aggregate": "count", "over": "cases", "where": {"type": "Intelligence"}, "op": ">", "value": 50},
+    "Bitcoin Finder": {"aggregate": "exists", "over": "items", "where": {"name": "Physical Bitcoin"}},
+    "Tech Scavenger": {
+        "aggregate": "exists", "over": "items", "where": {"name": ["Graphics card", "Tetriz portable game console"]},
+    },
+    "Weapon Collector": {
+        "aggregate": "distinct_count", "over": "items", "field": "name", "where": {"category": "Guns"},
+        "op": ">=", "value": 10,
+    },
+    "Keymaster": {"aggregate": "count", "over": "items", "where": {"category": "Keys"}, "op": ">=", "value": 5},
+    "Rare Loot Hunter": {"aggregate": "max", "over": "cases", "field": "profit", "op": ">=", "value": 1_000_000},
+    "Jackpot!": {
+        "aggregate": "count", "over": "items", "where": {"name": "Physical Bitcoin"}, "per": "case",
+        "op": ">=", "value": 3,
+    },
+    "Nothing But Trash": {"aggregate": "min", "over": "cases", "field": "profit", "op": "<=", "value": 5000},
+    "Lone Survivor": {"aggregate": "count", "over": "items", "per": "case", "op": "==", "value": 1},
+    "Combat Medic": {"aggregate": "exists", "over": "items", "where": {"name": "LEDX Skin Transilluminator"}},
 }
 
 ACHIEVEMENT_METADATA = {
@@ -220,4 +130,14 @@ LEADERBOARD_METRICS = {
     },
 }
 
+# time windows for the leaderboards, answered from the per-user daily rollups
+LEADERBOARD_WINDOWS = {
+    "all": "All time",
+    "7d": "Last 7 days",
+    "30d": "Last 30 days",
+    "week": "This week",
+    "month": "This month",
+    "season": "This wipe",
+}
+
 DISCORD_BOT_USER_USERNAME = "Discord Bot"
\ No newline at end of file
@@ -1,13 +1,22 @@
 """Contains database intiialisation class and methods. The methods herein are primarily used for ad-hoc database
 operations and primarily used for testing... Many of the functions are legacy and generally unused"""
-import random
 import json
 import os
+import time
+
+from sqlalchemy import bindparam, insert, select, update
 
 from app.extensions import db, bcrypt
-from app.models import User, TarkovItem, WeaponAttachment, ScavCase
+from app.models import User, TarkovItem, WeaponAttachment
 from app.constants import CATEGORY_MAPPING, DISCORD_BOT_USER_USERNAME
-from app.market.utils import get_price
+from app.http.errors import ValidationError
+from app.services.catalog_sync_service import CatalogItem, sync_catalog
+from app.services.synthetic_dataset_service import SyntheticDatasetService
+# importing the search module hooks its index into db.create_all() / drop_all()
+from app.database import search as _search  # noqa: F401
+
+# owners of the SEED_ENTRIES / `flask setup database --sample-entries` cases
+SAMPLE_USERS = 5
 
 class DatabaseManager:
     """Handles database initialisation and seeding operations, if enabled"""
@@ -23,6 +32,22 @@ class DatabaseManager:
         with self.app.app_context():
             db.create_all()
 
+    def initialise(self, refresh_items: bool = False, sample_entries: int = 0) -> None:
+        """
+        Create the schema and seed the bot user, item catalog and weapon attachments (each seed is a
+        no-op once done, unless refresh_items). Run once per deploy by `flask setup database`, or at
+        boot when INIT_DATABASE_ON_STARTUP is set.
+        """
+        started = time.perf_counter()
+        self.create_tables()
+
+        self.seed_discord_bot_user()
+        self.seed_catalog(refresh_items)
+
+        if sample_entries:
+            self.seed_sample_entries(sample_entries)
+        self.app.logger.info(f"Database initialisation complete in {time.perf_counter() - started:.2f}s")
+
     def seed_discord_bot_user(self):
         """Create the user for the discord bot, if it doesn't exist"""
         # check if the user already exists
@@ -49,11 +74,23 @@ class DatabaseManager:
         db.session.commit()
         self.app.logger.info("Discord Bot user created successfully")
 
+    def seed_catalog(self, force_refresh=False):
+        """Load the tarkov items and the weapon attachments that point at them, in one transaction"""
+        try:
+            self.seed_tarkov_items(force_refresh)
+            self.seed_weapon_attachments(force_refresh)
+            db.session.commit()
+        except Exception as e:
+            # neither is written - attachments are never left pointing at half a catalog
+            self.app.logger.error(f"Failed to seed the item catalog: {e}")
+            db.session.rollback()
+
     def seed_tarkov_items(self, force_refresh=False):
-        """Load tarkov items from JSON file - legacy function"""
+        """Load tarkov items from JSON file, in the caller's transaction (see seed_catalog)"""
         # if there are already some items in the DB, and we aren't forcing the refresh
-        if TarkovItem.query.count() > 0 and not force_refresh:
+        if not force_refresh and db.session.query(TarkovItem.id).first() is not None:
             return
+        started = time.perf_counter()
 
         items_file = self._get_data_file_path("all_items.json")
         self.app.logger.info(f"Loading Tarkov items from {items_file}...")
@@ -61,24 +98,25 @@ class DatabaseManager:
         try:
             with open(items_file, "r") as f:
                 item_data = json.load(f)
-
-            for item in item_data["items"]:
-                self._process_tarkov_item(item)
-
-            db.session.commit()
-            self.app.logger.info(f"Successfully loaded {len(item_data["items"])} Tarkov Items")
-
         except FileNotFoundError:
             self.app.logger.warning(f"Items file not found: {items_file}")
-        except Exception as e:
-            self.app.logger.error(f"Failed to load tarkov items: {e}")
-            db.session.rollback()
+            return
+
+        # the file may be older than what fetch_new_items.py has added since, so nothing is removed
+        result = sync_catalog(
+            db.session.connection(), (self._catalog_item(item) for item in item_data["items"]), remove_missing=False
+        )
+        self.app.logger.info(
+            f"Successfully loaded {len(item_data["items"])} Tarkov Items ({result.counts()}) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
 
     def seed_weapon_attachments(self, force_refresh=False):
-        """Load weapon attachments from JSON file - legacy function"""
+        """Load weapon attachments from JSON file, in the caller's transaction (see seed_catalog)"""
         # only run if empty
-        if WeaponAttachment.query.count() > 0 and not force_refresh:
+        if not force_refresh and db.session.query(WeaponAttachment.id).first() is not None:
             return
+        started = time.perf_counter()
 
         attachments_file = self._get_data_file_path("attachments.json")
         self.app.logger.info(f"Loading weapon attachments from {attachments_file}...")
@@ -86,51 +124,24 @@ class DatabaseManager:
         try:
             with open(attachments_file, "r") as f:
                 attachment_data = json.load(f)
-
-            count = 0
-            for _attachment in attachment_data:
-                if self._process_weapon_attachment(_attachment):
-                    count += 1
-            
-            db.session.commit()
-            self.app.logger.info(f"Successfully loaded {count} weapon attachments")
         except FileNotFoundError:
             self.app.logger.warning(f"Attachments file not found: {attachments_file}")
-        except Exception as e:
-            self.app.logger.error(f"Failed to load weapon attachments: {e}")
-            db.session.rollback()
+            return
+
+        counts = self._upsert_weapon_attachments(attachment_data)
+        self.app.logger.info(
+            f"Successfully loaded weapon attachments ({counts}) in {time.perf_counter() - started:.2f}s"
+        )
 
     def seed_sample_entries(self, count: int) -> None:
-        """Generate sample scav case entries for testing"""
+        """Generate sample scav case entries (with items, offline prices) for a handful of sample users"""
         self.app.logger.info(f"Generating {count} sample scav case entries...")
-
-        costs = {
-            2500: "₽2500",
-            15000: "₽15000", 
-            95000: "₽95000",
-            get_price("5d1b376e86f774252519444e"): "Moonshine",
-            get_price("5c12613b86f7743bbe2c3f76"): "Intelligence",
-        }
-
-        for _ in range(count):
-            # generate a random 'type' of case e.g. moonshine
-            cost = random.choice(list(costs.keys()))
-            # generate a random return value, somwhere between 50% and 150% of the cost
-            base_return = random.uniform(cost * 0.5, cost * 1.5)
-            # 20% chance for an extra high return - between 90% and 550%
-            if random.choice(range(5)) == 3:
-                base_return = random.uniform(cost * 0.9, cost * 5.5)
-            
-            scav_case = ScavCase(
-                cost = cost,
-                _return = base_return,
-                type = costs[cost],
-                user_id = 1
-            )
-            db.session.add(scav_case)
-        
-        db.session.commit()
-        self.app.logger.info(f"Successfully generated {count} sample entries")
+        try:
+            result = SyntheticDatasetService().generate(SAMPLE_USERS, count, username_prefix="sample_")
+        except ValidationError as e:
+            self.app.logger.warning(f"Skipping sample entries: {e.message}")
+            return
+        self.app.logger.info(f"Successfully generated {count} sample entries ({result.to_dict()})")
 
     def _get_data_file_path(self, filename: str) -> str:
         """Get the full path for a data file"""
@@ -138,8 +149,8 @@ class DatabaseManager:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
         return os.path.join(base_dir, filename)
 
-    def _process_tarkov_item(self, item_json: str) -> None:
-        """Process a single tarkov item, passed in as JSON"""
+    def _catalog_item(self, item_json: dict) -> CatalogItem:
+        """A catalog sync entry for one tarkov item from the JSON file"""
         tarkov_id, item_name, subcategory = item_json.values()
         # actual item categories are stupid, map them to something sensible
         broad_category = CATEGORY_MAPPING.get(subcategory, "Unknown")
@@ -148,39 +159,59 @@ class DatabaseManager:
         if broad_category == "Unknown":
             self.app.logger.warning(f"Unknown category for {item_name}: {subcategory}")
 
-        # does this item already exist in the database? 
-        existing_item = TarkovItem.query.filter_by(tarkov_id=tarkov_id).first()
-    
-        # if the item exists, check that the category uses the new 'broad' mappings
-        if existing_item:
-            if existing_item.category != broad_category:
-                existing_item.category = broad_category
-                self.app.logger.info(f"{item_name} ({tarkov_id}): Category changed to {broad_category}")
-        else:
-            # otherwise, create the item
-            new_item = TarkovItem(
-                name=item_name,
-                tarkov_id=tarkov_id, 
-                category=broad_category
+        return CatalogItem(tarkov_id, item_name, broad_category)
+
+    def _upsert_weapon_attachments(self, attachment_data: list[dict]) -> dict[str, int]:
+        """
+        Insert / update every attachment in bulk - items are matched by name from one preloaded map,
+        and only new or changed modifiers are written, so running it again changes nothing
+        """
+        item_ids = {}
+        for item_id, name in db.session.execute(select(TarkovItem.id, TarkovItem.name).order_by(TarkovItem.id)):
+            # the first item with a name wins, as the old per-attachment lookup by name did
+            item_ids.setdefault(name, item_id)
+        existing = {
+            attachment_id: (recoil, ergonomics)
+            for attachment_id, recoil, ergonomics in db.session.execute(
+                select(WeaponAttachment.id, WeaponAttachment.recoil_modifier, WeaponAttachment.ergonomics_modifier)
+            )
+        }
+
+        rows = {}
+        unmatched = 0
+        for attachment in attachment_data:
+            item_id = item_ids.get(attachment["name"])
+            if item_id is None:
+                unmatched += 1
+                continue
+            rows[item_id] = (attachment.get("recoilModifier"), attachment.get("ergonomicsModifier"))
+
+        inserts = [
+            {"id": item_id, "recoil_modifier": recoil, "ergonomics_modifier": ergonomics}
+            for item_id, (recoil, ergonomics) in rows.items() if item_id not in existing
+        ]
+        updates = [
+            {"b_id": item_id, "b_recoil": recoil, "b_ergonomics": ergonomics}
+            for item_id, (recoil, ergonomics) in rows.items()
+            if item_id in existing and existing[item_id] != (recoil, ergonomics)
+        ]
+        if inserts:
+            db.session.execute(insert(WeaponAttachment), inserts)
+        if updates:
+            table = WeaponAttachment.__table__
+            db.session.connection().execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(recoil_modifier=bindparam("b_recoil"), ergonomics_modifier=bindparam("b_ergonomics")),
+                updates,
             )
-            db.session.add(new_item)
 
-    def _process_weapon_attachment(self, attachment_json: str) -> bool:
-        """Process a single weapon attachment"""
-        tarkov_item = TarkovItem.query.filter_by(
-            name=attachment_json["name"]
-        ).first()
-        
-        if not tarkov_item:
-            return False
-            
-        attachment = WeaponAttachment(
-            id=tarkov_item.id,
-            recoil_modifier=attachment_json.get("recoilModifier"),
-            ergonomics_modifier=attachment_json.get("ergonomicsModifier"),
-        )
-        db.session.add(attachment)
-        return True
+        return {
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "unchanged": len(rows) - len(inserts) - len(updates),
+            "unmatched": unmatched,
+        }
 
 # singleton instance
 db_manager = DatabaseManager()
\ No newline at end of file
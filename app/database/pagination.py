@@ -0,0 +1,188 @@
+"""Keyset (a.k.a. seek) pagination for the large, sortable case lists.
+
+Flask-SQLAlchemy's `paginate` uses LIMIT/OFFSET plus a COUNT(*) on every page, so page N has to
+walk past every row on pages 1..N-1. Keyset pagination instead remembers the (sort value, id) of the
+last row that was shown and asks the database for rows strictly after it, which is an index seek
+no matter how deep into the list you are.
+
+The position is handed to the browser as an opaque, signed cursor token. The total row count (if
+wanted) is worked out once on the first page and then carried along inside the cursor.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.http.errors import ValidationError
+
+CURSOR_SALT = "keyset-pagination-cursor"
+
+# how the total row count is worked out (on the first page only - later pages re-use it)
+COUNT_MODES = ("none", "estimate", "exact")
+
+
+@dataclass
+class KeysetPage:
+    """A single page of keyset-paginated results (quacks like the bits of Pagination the templates use)"""
+    items: list
+    per_page: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt=CURSOR_SALT)
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON can't carry datetimes, so tag them"""
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(payload: dict) -> str:
+    return _serializer().dumps(payload)
+
+
+def decode_cursor(token: str, scope: str) -> dict:
+    """Decode (and verify) a cursor token. Cursors are only valid for the list/sort/filter they came from"""
+    try:
+        payload = _serializer().loads(token)
+    except BadSignature as e:
+        raise ValidationError("Invalid pagination cursor") from e
+
+    if not isinstance(payload, dict) or payload.get("scope") != scope or payload.get("dir") not in ("next", "prev"):
+        raise ValidationError("Pagination cursor does not match this list")
+
+    return payload
+
+
+def _estimate_count(query) -> Optional[int]:
+    """Ask the query planner for a row estimate (postgres only). Returns None if we can't."""
+    engine = db.session.get_bind()
+    if engine.dialect.name != "postgresql":
+        return None
+
+    statement = query.order_by(None).statement.compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.session.execute(db.text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def _count(query, count_mode: str) -> tuple[Optional[int], bool]:
+    """Return (total, is_estimate) for the given count mode"""
+    if count_mode == "none":
+        return None, False
+
+    if count_mode == "estimate":
+        estimate = _estimate_count(query)
+        if estimate is not None:
+            return estimate, True
+
+    # exact, or no estimate available on this backend. only ever runs on the first page.
+    return query.order_by(None).count(), False
+
+
+def keyset_paginate(
+    query,
+    sort_expr,
+    id_col,
+    *,
+    scope: str,
+    cursor: Optional[str] = None,
+    per_page: int = 10,
+    sort_order: str = "desc",
+    count_mode: str = "none",
+) -> KeysetPage:
+    """
+    Paginate `query` by (sort_expr, id_col) using a seek predicate rather than OFFSET.
+
+    - `scope` identifies the list + sort + filter; cursors from a different scope are rejected
+    - `cursor` is the token from a previous page's next_cursor / prev_cursor, or None for the first page
+    - `count_mode` is one of COUNT_MODES, the count is only computed on the first page
+    """
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"Invalid count_mode: {count_mode!r}")
+
+    descending = sort_order != "asc"
+    payload = decode_cursor(cursor, scope) if cursor else None
+    direction = payload["dir"] if payload else "next"
+
+    if payload:
+        total, total_is_estimate = payload.get("total"), payload.get("est", False)
+    else:
+        total, total_is_estimate = _count(query, count_mode)
+
+    # walking backwards is the same as walking forwards over the reversed ordering
+    reverse = direction == "prev"
+    seek_desc = descending != reverse
+
+    if payload:
+        last_value = _decode_value(payload["v"])
+        last_id = payload["id"]
+        if seek_desc:
+            query = query.filter(or_(sort_expr < last_value, and_(sort_expr == last_value, id_col < last_id)))
+        else:
+            query = query.filter(or_(sort_expr > last_value, and_(sort_expr == last_value, id_col > last_id)))
+
+    if seek_desc:
+        query = query.order_by(db.desc(sort_expr), db.desc(id_col))
+    else:
+        query = query.order_by(db.asc(sort_expr), db.asc(id_col))
+
+    # fetch one extra row to find out if there's anything beyond this page
+    rows = query.add_columns(sort_expr.label("_keyset_sort_value")).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+
+    def _make_cursor(row, row_direction: str) -> str:
+        item, sort_value = row
+        return encode_cursor({
+            "scope": scope,
+            "dir": row_direction,
+            "v": _encode_value(sort_value),
+            "id": item.id,
+            "total": total,
+            "est": total_is_estimate,
+        })
+
+    # going forwards: there's a next page if we over-fetched, a previous one if we came from a cursor
+    # going backwards: the other way round
+    has_next = has_more if not reverse else True
+    has_prev = bool(payload) if not reverse else has_more
+
+    return KeysetPage(
+        items=[item for item, _ in rows],
+        per_page=per_page,
+        next_cursor=_make_cursor(rows[-1], "next") if rows and has_next else None,
+        prev_cursor=_make_cursor(rows[0], "prev") if rows and has_prev else None,
+        total=total,
+        total_is_estimate=total_is_estimate,
+    )
@@ -0,0 +1,185 @@
+"""Indexed, typo tolerant search over item names (the HTMX typeaheads and the item frequency filter).
+
+`name ILIKE '%q%'` can't use an index, so every keystroke was a scan of the item catalog. Instead:
+- SQLite: an FTS5 table with the trigram tokenizer over tarkov_item.name. It's an external content
+  table (no second copy of the names) kept in sync by triggers, so every catalog write path - the
+  ORM, bulk Core inserts, raw SQL - keeps it current.
+- Postgres: a pg_trgm GIN index on lower(name), which serves both LIKE '%q%' and similarity.
+- Anything else falls back to ILIKE.
+
+A trigram index answers "which names contain q" directly. For typos, names sharing *some* of the
+query's trigrams are pulled in as extra candidates, and the short candidate list is reranked in
+python (per word: a prefix match, else the rapidfuzz edit similarity).
+"""
+from typing import Optional
+
+from sqlalchemy import event, func, or_, select, text
+
+from app.extensions import db
+from app.models import TarkovItem
+
+ITEM_SEARCH_TABLE = "tarkov_item_search"
+
+# how many index hits are reranked - plenty for a 15 row dropdown, small enough to score in ~1ms
+CANDIDATE_LIMIT = 60
+
+_SQLITE_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {ITEM_SEARCH_TABLE} USING fts5("
+    "name, content='tarkov_item', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {ITEM_SEARCH_TABLE}_ai AFTER INSERT ON tarkov_item BEGIN
+        INSERT INTO {ITEM_SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {ITEM_SEARCH_TABLE}_ad AFTER DELETE ON tarkov_item BEGIN
+        INSERT INTO {ITEM_SEARCH_TABLE}({ITEM_SEARCH_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {ITEM_SEARCH_TABLE}_au AFTER UPDATE OF name ON tarkov_item BEGIN
+        INSERT INTO {ITEM_SEARCH_TABLE}({ITEM_SEARCH_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {ITEM_SEARCH_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    # index whatever is already in the catalog
+    f"INSERT INTO {ITEM_SEARCH_TABLE}({ITEM_SEARCH_TABLE}) VALUES ('rebuild')",
+)
+_SQLITE_DROP = (
+    f"DROP TRIGGER IF EXISTS {ITEM_SEARCH_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {ITEM_SEARCH_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {ITEM_SEARCH_TABLE}_au",
+    f"DROP TABLE IF EXISTS {ITEM_SEARCH_TABLE}",
+)
+_POSTGRES_CREATE = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_tarkov_item_name_trgm ON tarkov_item USING gin (lower(name) gin_trgm_ops)",
+)
+_POSTGRES_DROP = ("DROP INDEX IF EXISTS ix_tarkov_item_name_trgm",)
+
+
+def create_search_index(connection) -> None:
+    """Create (and fill) the item name search index for this database, if the dialect has one"""
+    statements = {"sqlite": _SQLITE_CREATE, "postgresql": _POSTGRES_CREATE}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def drop_search_index(connection) -> None:
+    statements = {"sqlite": _SQLITE_DROP, "postgresql": _POSTGRES_DROP}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+# db.create_all() / drop_all() (dev, tests) manage the index along with the table, migrations do it themselves
+@event.listens_for(TarkovItem.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(TarkovItem.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def item_name_filter(query: str):
+    """
+    WHERE clause on TarkovItem for "name contains query" (case insensitive) - the same rows as
+    `name ILIKE '%query%'`, but answered from the search index where there is one
+    """
+    query = query.strip()
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite" and len(query) >= 3:
+        matches = text(
+            f"SELECT rowid FROM {ITEM_SEARCH_TABLE} WHERE {ITEM_SEARCH_TABLE} MATCH :phrase"
+        ).bindparams(phrase=_fts_phrase(query))
+        return TarkovItem.id.in_(matches)
+    if dialect == "postgresql":
+        return func.lower(TarkovItem.name).like(f"%{_escape_like(query.lower())}%", escape="\\")
+    return TarkovItem.name.ilike(f"%{query}%")
+
+
+def search_items(query: str, limit: int = 15) -> list[TarkovItem]:
+    """Best matching catalog items for a (partial, possibly misspelt) name, best first"""
+    query = query.strip()
+    if not query:
+        return []
+
+    candidates = _candidates(query, limit)
+    if not candidates:
+        return []
+
+    ranked = sorted(candidates, key=lambda row: (-_score(query, row.name), len(row.name), row.name))
+    ids = [row.id for row in ranked[:limit]]
+    # items dropped from the catalog stay indexed (old cases still use them) but aren't offered
+    items = {item.id: item for item in TarkovItem.query.filter(TarkovItem.id.in_(ids), TarkovItem.removed_at.is_(None))}
+    return [items[item_id] for item_id in ids if item_id in items]
+
+
+def _candidates(query: str, limit: int) -> list:
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite" and len(query) >= 3:
+        return _sqlite_candidates(query, limit)
+
+    if dialect == "postgresql":
+        lowered = func.lower(TarkovItem.name)
+        statement = (
+            select(TarkovItem.id, TarkovItem.name)
+            .where(or_(lowered.like(f"%{_escape_like(query.lower())}%", escape="\\"), lowered.op("%")(query.lower())))
+            .order_by(func.similarity(lowered, query.lower()).desc())
+            .limit(CANDIDATE_LIMIT)
+        )
+        return db.session.execute(statement).all()
+
+    # too short for trigrams (or no index) - a prefix / word prefix match over the catalog
+    statement = (
+        select(TarkovItem.id, TarkovItem.name)
+        .where(or_(TarkovItem.name.ilike(f"{query}%"), TarkovItem.name.ilike(f"% {query}%")))
+        .limit(CANDIDATE_LIMIT)
+    )
+    return db.session.execute(statement).all()
+
+
+def _sqlite_candidates(query: str, limit: int) -> list:
+    search = text(
+        f"SELECT tarkov_item.id, tarkov_item.name FROM {ITEM_SEARCH_TABLE} "
+        f"JOIN tarkov_item ON tarkov_item.id = {ITEM_SEARCH_TABLE}.rowid "
+        f"WHERE {ITEM_SEARCH_TABLE} MATCH :match ORDER BY rank LIMIT :limit"
+    )
+    rows = db.session.execute(search, {"match": _fts_phrase(query), "limit": CANDIDATE_LIMIT}).all()
+
+    # too few substring hits to fill the list - pull in names sharing the most trigrams with the query (typos)
+    trigrams = _fts_trigrams(query)
+    if len(rows) < limit and trigrams:
+        seen = {row.id for row in rows}
+        fuzzy = db.session.execute(search, {"match": trigrams, "limit": CANDIDATE_LIMIT}).all()
+        rows.extend(row for row in fuzzy if row.id not in seen)
+    return rows
+
+
+def _score(query: str, name: str) -> float:
+    """
+    Average, over the query's words, of how well each one matches its best word in the name -
+    100 for a prefix ("moon" -> "Moonshine"), otherwise edit similarity ("grpahics" -> "Graphics")
+    """
+    from rapidfuzz import fuzz, utils
+
+    name_words = utils.default_process(name).split()
+    query_words = utils.default_process(query).split()
+    if not name_words or not query_words:
+        return 0.0
+
+    total = 0.0
+    for word in query_words:
+        total += max(100.0 if candidate.startswith(word) else fuzz.ratio(word, candidate) for candidate in name_words)
+    return total / len(query_words)
+
+
+def _fts_phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _fts_trigrams(query: str) -> Optional[str]:
+    lowered = query.lower()
+    trigrams = sorted({lowered[i:i + 3] for i in range(len(lowered) - 2)})
+    # a trigram containing whitespace only ever matches across word boundaries - skip them
+    trigrams = [t for t in trigrams if not any(c.isspace() for c in t)]
+    return " OR ".join(_fts_phrase(t) for t in trigrams) or None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
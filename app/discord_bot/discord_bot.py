@@ -1,12 +1,24 @@
+import asyncio
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import aiohttp
 import discord
 from discord.ext import commands
 
+from app.discord_bot.queue import SubmissionDispatcher
 from app.discord_bot.utils import get_matching_type, valid_types, create_basic_embed
 from app.constants import SCAV_CASE_TYPES
 from app.models import ScavCase
+from app.services.discord_stats_service import DiscordStatsService
+from app.services.scav_case_service import ScavCaseService
+
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30)
+# !stats answers from the last result for this long without touching the database
+STATS_TTL = 10
 
 
 @commands.command(name="case_types")
@@ -36,17 +48,10 @@ async def case_types(ctx):
 
 @commands.command(name="stats")
 async def stats(ctx):
-    api_url = "http://localhost:5000/api/discord-stats"
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api_url) as response:
-            if response.status == 200:
-                data = await response.json()
-                total_profit = data.get("total_profit", "N/A")
-                total_cases = data.get("total_cases", "N/A")
-                total_spend = data.get("total_spend", "N/A")
-            else:
-                total_profit, total_cases, total_spend = "Error", "Error", "Error"
+    try:
+        data = await ctx.bot.get_stats()
+    except Exception:
+        return await ctx.send(embed=create_basic_embed("Couldn't fetch stats right now, try again later"))
 
     embed = discord.Embed(
         title="Scav Case Tracker Stats",
@@ -55,12 +60,30 @@ async def stats(ctx):
     )
 
     embed.add_field(
-        name="📈 Total Profit", value=f"₽{round(total_profit):,}", inline=False
+        name="📈 Total Profit", value=f"₽{round(data['total_profit']):,}", inline=False
     )
-    embed.add_field(name="📦 Total Cases", value=f"{total_cases}", inline=False)
+    embed.add_field(name="📦 Total Cases", value=f"{data['total_cases']}", inline=False)
     embed.add_field(
-        name="💸 Total Spend", value=f"₽{round(total_spend):,}", inline=False
+        name="💸 Total Spend", value=f"₽{round(data['total_spend']):,}", inline=False
     )
+    if data["by_type"]:
+        embed.add_field(
+            name="🗂️ By Case Type",
+            value="\n".join(
+                f"**{row['type']}**: {row['cases']} cases, ₽{round(row['profit']):,}"
+                for row in data["by_type"]
+            ),
+            inline=False,
+        )
+    if data["top_users"]:
+        embed.add_field(
+            name="🏆 Top Users",
+            value="\n".join(
+                f"{i}. **{row['username']}**: ₽{round(row['profit']):,} ({row['cases']} cases)"
+                for i, row in enumerate(data["top_users"], start=1)
+            ),
+            inline=False,
+        )
 
     embed.set_footer(text="Scav Case Tracker Bot")
     embed.set_thumbnail(
@@ -70,14 +93,78 @@ async def stats(ctx):
 
 
 class ImageDownloaderClient(commands.Bot):
-    def __init__(self, download_dir, channel_id, *args, **kwargs):
+    def __init__(
+        self,
+        app,
+        channel_id,
+        *args,
+        submission_workers: int = 10,
+        heartbeat_file: str = None,
+        heartbeat_interval: float = 30,
+        **kwargs,
+    ):
         super().__init__(command_prefix="!", *args, **kwargs)
-        self.download_dir = download_dir
+        # submissions go straight through ScavCaseService in this process (no HTTP hop to the web app),
+        # on worker threads so OCR doesn't block the event loop
+        self.app = app
         self.channel_id = channel_id
+        self.scav_case_service = ScavCaseService()
+        self.stats_service = DiscordStatsService()
+        self._stats = None
+        self._stats_at = 0.0
+        self._stats_lock = asyncio.Lock()
+        self.submission_executor = ThreadPoolExecutor(
+            max_workers=submission_workers, thread_name_prefix="discord-submission"
+        )
+        # !stats gets a thread of its own, so it isn't stuck behind a burst of OCR jobs
+        self.stats_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="discord-stats")
+        # attachments (in one message and across messages) run concurrently, up to submission_workers
+        # at once, taken round-robin per guild
+        self.submissions = SubmissionDispatcher(limit=submission_workers)
+        self.http_session = None
+        # while connected, the bot touches heartbeat_file every heartbeat_interval seconds (see DiscordBotManager)
+        self.heartbeat_file = heartbeat_file
+        self.heartbeat_interval = heartbeat_interval
+        self._heartbeat_task = None
 
         self.add_command(case_types)
         self.add_command(stats)
 
+    async def setup_hook(self):
+        # one pooled session for the bot's lifetime - connections (DNS / TLS) are reused across requests
+        self.http_session = aiohttp.ClientSession(timeout=HTTP_TIMEOUT)
+        self.submissions.start()
+        if self.heartbeat_file:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def close(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        await self.submissions.stop()
+        await super().close()
+        if self.http_session is not None:
+            await self.http_session.close()
+        self.submission_executor.shutdown(wait=False, cancel_futures=True)
+        self.stats_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _heartbeat(self):
+        while True:
+            if self.is_ready():
+                self.write_heartbeat()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def write_heartbeat(self):
+        heartbeat = {
+            "timestamp": time.time(),
+            "latency": self.latency,
+            "queued": len(self.submissions.queue),
+        }
+        # written aside and renamed, so a health check never reads half a file
+        tmp_file = f"{self.heartbeat_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(heartbeat, f)
+        os.replace(tmp_file, self.heartbeat_file)
+
     async def on_ready(self):
         print(f"Discord Bot Logged in as: {self.user}")
 
@@ -106,15 +193,19 @@ class ImageDownloaderClient(commands.Bot):
                 for attachment in message.attachments:
                     if attachment.url.split("?")[0].endswith(("jpg", "jpeg", "png")):
                         status_embed = create_basic_embed(
-                            f"Received submission for type {matched_type}. Starting processing..."
+                            f"Received submission for type {matched_type}. Queued for processing..."
                         )
                         status_message = await message.channel.send(embed=status_embed)
-                        await self.download_image(
-                            message,
-                            attachment,
-                            matched_type,
-                            status_embed,
-                            status_message,
+                        await self.submissions.submit(
+                            message.guild.id,
+                            partial(
+                                self.download_image,
+                                message,
+                                attachment,
+                                matched_type,
+                                status_embed,
+                                status_message,
+                            ),
                         )
 
         await self.process_commands(message)
@@ -122,115 +213,115 @@ class ImageDownloaderClient(commands.Bot):
     async def download_image(
         self, message, attachment, scav_case_type, status_embed, status_message
     ):
+        """Download an attachment into memory and submit it"""
         try:
-            # Update the message with current progress
-            status_embed.description = (
-                "Image downloaded. Performing OCR and retrieving prices..."
-            )
-            await status_message.edit(embed=status_embed)
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(attachment.url) as response:
-                    if response.status == 200:
-                        file_path = os.path.join(self.download_dir, attachment.filename)
-                        with open(file_path, "wb") as f:
-                            f.write(await response.read())
-
-                        status_embed.description = (
-                            "Image downloaded. Performing OCR and retrieving prices..."
-                        )
-                        await status_message.edit(embed=status_embed)
-
-                        # Submit the image to Flask asynchronously
-                        await self.submit_image_to_flask(
-                            message,
-                            file_path,
-                            scav_case_type,
-                            status_embed,
-                            status_message,
-                        )
-                    else:
-                        status_embed.description = (
-                            f"Failed to download image: {attachment.filename}"
-                        )
-                        await status_message.edit(embed=status_embed)
+            async with self.http_session.get(attachment.url) as response:
+                if response.status != 200:
+                    status_embed.description = (
+                        f"Failed to download image: {attachment.filename}"
+                    )
+                    await status_message.edit(embed=status_embed)
+                    return
+                image_bytes = await response.read()
         except Exception as e:
-            raise e
             status_embed.description = f"Error downloading image: {str(e)}"
             await status_message.edit(embed=status_embed)
+            return
+
+        status_embed.description = (
+            "Image downloaded. Performing OCR and retrieving prices..."
+        )
+        await status_message.edit(embed=status_embed)
 
-    async def submit_image_to_flask(
-        self, message, image_path, scav_case_type, status_embed, status_message
+        await self.submit_scav_case(
+            message,
+            image_bytes,
+            scav_case_type,
+            status_embed,
+            status_message,
+        )
+
+    async def submit_scav_case(
+        self, message, image_bytes, scav_case_type, status_embed, status_message
     ):
-        """Submit scav case to Flask using the single unified route"""
-        url = "http://localhost:5000/cases/submit" 
-        headers = {
-            "X-BOT-REQUEST": "true",
-            "X-BOT-KEY": os.getenv('DISCORD_BOT_API_KEY', 'blank') # fallback to non-None, because None cannot be serialised
-        }
-        
+        """Submit a scav case through ScavCaseService on a worker thread, and report the result"""
+        loop = asyncio.get_running_loop()
         try:
-            async with aiohttp.ClientSession() as session:
-                with open(image_path, "rb") as image_file:
-                    form_data = aiohttp.FormData()
-                    form_data.add_field("image", image_file, 
-                                    filename=os.path.basename(image_path))
-                    form_data.add_field("scav_case_type", scav_case_type)
-
-                    async with session.post(url, headers=headers, data=form_data) as response:
-                        response_data = await response.json()
-                        
-                        if response.status == 200:
-                            items = response_data.get("items", [])
-                            total_return = response_data.get("total_return") or 0
-                            cost = response_data.get("cost") or 0
-                            profit = total_return - cost
-
-                            item_lines = []
-                            for item in items:
-                                qty = item["quantity"]
-                                total = (item["price"] or 0) * qty
-                                item_lines.append(
-                                    f"• **{item['name']}** ×{qty} — ₽{total:,.0f}"
-                                )
-
-                            embed = discord.Embed(
-                                title="✅ Scav Case Added!",
-                                description="\n".join(item_lines) or "No items recorded.",
-                                color=discord.Color.green(),
-                            )
-                            embed.add_field(
-                                name="💰 Return", value=f"₽{total_return:,.0f}", inline=True
-                            )
-                            embed.add_field(
-                                name="💸 Cost", value=f"₽{cost:,.0f}", inline=True
-                            )
-                            embed.add_field(
-                                name="📈 Profit" if profit >= 0 else "📉 Profit",
-                                value=f"₽{profit:,.0f}",
-                                inline=True,
-                            )
-                            embed.set_footer(text="Scav Case Tracker")
-                            await status_message.edit(embed=embed)
-                        else:
-                            error_msg = response_data.get("error", f"HTTP {response.status}")
-                            await status_message.edit(
-                                embed=discord.Embed(
-                                    title="❌ Error",
-                                    description=f"Failed to submit: {error_msg}",
-                                    color=discord.Color.red()
-                                )
-                            )
-                            
+            response_data, status = await loop.run_in_executor(
+                self.submission_executor, self._submit_in_app_context, image_bytes, scav_case_type
+            )
         except Exception as e:
+            response_data, status = {"error": str(e)}, 500
+
+        if status == 200:
+            await status_message.edit(embed=build_submission_embed(response_data))
+        else:
+            error_msg = response_data.get("error", f"status {status}")
             await status_message.edit(
                 embed=discord.Embed(
-                    title="❌ Connection Error",
-                    description=f"Could not connect to Flask app: {str(e)}",
+                    title="❌ Error",
+                    description=f"Failed to submit: {error_msg}",
                     color=discord.Color.red()
                 )
             )
 
+    async def get_stats(self) -> dict:
+        """
+        Stats for !stats - a burst of commands shares one lookup (the rest wait on the lock, then reuse
+        its result), and DiscordStatsService only re-aggregates once a case has been written
+        """
+        async with self._stats_lock:
+            if self._stats is None or time.monotonic() - self._stats_at > STATS_TTL:
+                self._stats = await asyncio.get_running_loop().run_in_executor(
+                    self.stats_executor, self._stats_in_app_context
+                )
+                self._stats_at = time.monotonic()
+            return self._stats
+
+    def _stats_in_app_context(self) -> dict:
+        with self.app.app_context():
+            return self.stats_service.get_stats()
+
+    def _submit_in_app_context(self, image_bytes: bytes, scav_case_type: str):
+        """Runs on a submission worker thread - each submission gets its own app context (and DB session)"""
+        with self.app.app_context():
+            return self.scav_case_service.submit_discord_case(scav_case_type, image_bytes)
+
+
+def build_submission_embed(response_data: dict) -> discord.Embed:
+    """The "case added" embed for a successful submission (ScavCaseService.submit_discord_case's payload)"""
+    items = response_data.get("items", [])
+    total_return = response_data.get("total_return") or 0
+    cost = response_data.get("cost") or 0
+    profit = total_return - cost
+
+    item_lines = []
+    for item in items:
+        qty = item["quantity"]
+        total = (item["price"] or 0) * qty
+        item_lines.append(
+            f"• **{item['name']}** ×{qty} — ₽{total:,.0f}"
+        )
+
+    embed = discord.Embed(
+        title="✅ Scav Case Added!",
+        description="\n".join(item_lines) or "No items recorded.",
+        color=discord.Color.green(),
+    )
+    embed.add_field(
+        name="💰 Return", value=f"₽{total_return:,.0f}", inline=True
+    )
+    embed.add_field(
+        name="💸 Cost", value=f"₽{cost:,.0f}", inline=True
+    )
+    embed.add_field(
+        name="📈 Profit" if profit >= 0 else "📉 Profit",
+        value=f"₽{profit:,.0f}",
+        inline=True,
+    )
+    embed.set_footer(text="Scav Case Tracker")
+    return embed
+
 
 intents = discord.Intents.default()
 intents.messages = True
@@ -1,65 +1,99 @@
+import asyncio
+import json
 import os
-import threading
-import logging
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from app.discord_bot.discord_bot import ImageDownloaderClient
+
+# a run that lasted this long counts as healthy - the next crash starts the backoff over
+STABLE_RUN_SECONDS = 600
 
-from app.discord_bot.discord_bot import ImageDownloaderClient, intents
 
 class DiscordBotManager:
-    """Manages discord bot lifecycle"""
+    """
+    Runs the discord bot as its own process (`flask discord-bot run`) - web workers never start it, so
+    there's one bot however many workers serve the site, and its OCR doesn't compete with requests.
+    The supervisor restarts the bot with exponential backoff when it dies, and the bot writes a
+    heartbeat file while it's connected (`flask discord-bot health` checks it).
+
+    discord.py (and aiohttp) are only imported once the bot is actually run, so the web workers -
+    which import this module through the CLI and app factory - never load them.
+    """
 
     def __init__(self, app = None) -> None:
         self.app =app
-        self.bot_thread = None
 
     def init_app(self, app) -> None:
         """initialise with flask app instance"""
         self.app = app
 
-    def should_start_bot(self) -> bool:
-        """detemrine whether the discord bot should be started from the config"""
-        if not self.app.config.get("START_DISCORD_BOT"):
-            return False
+    def run(self, max_restarts: Optional[int] = None, sleep: Callable[[float], None] = time.sleep) -> None:
+        """Run the bot in the foreground until it's closed, restarting it (with backoff) whenever it fails"""
+        import discord
 
-        # only start in main process when debugging
-        if self.app.debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
-            return False
+        token = os.getenv("DISCORD_TOKEN")
+        if not token:
+            raise RuntimeError("DISCORD_TOKEN environment variable not set")
 
-        return True
+        initial_backoff = self.app.config["DISCORD_RESTART_BACKOFF"]
+        backoff = initial_backoff
+        restarts = 0
+        while True:
+            started = time.monotonic()
+            try:
+                asyncio.run(self._run_once(token))
+                self.app.logger.info("Discord bot closed")
+                return
+            except discord.LoginFailure:
+                # a bad token won't fix itself
+                raise
+            except Exception as e:
+                self.app.logger.error(f"Discord bot error: {e}", exc_info=e)
 
-    def start_bot(self) -> None:
-        """Start the discord bot in a separate thread"""
-        if not self.should_start_bot():
-            self.app.logger.info("Discord bot startup skipped")
-            return
+            if time.monotonic() - started >= STABLE_RUN_SECONDS:
+                backoff = initial_backoff
+            if max_restarts is not None and restarts >= max_restarts:
+                raise RuntimeError(f"Discord bot failed {restarts + 1} time(s), giving up")
 
-        token = os.getenv("DISCORD_TOKEN")
-        if not token:
-            self.app.logger.error("DISCORD_TOKEN environment variable not set")
-            return
-            
-        try:
-            with self.app.app_context():
-                self.bot_thread = threading.Thread(target=self._run_discord_bot)
-                self.bot_thread.daemon = True  # Dies when main thread dies
-                self.bot_thread.start()
-                self.app.logger.info("Discord bot started successfully")
-                
-        except Exception as e:
-            self.app.logger.error(f"Failed to start Discord bot: {e}")
-
-    def _run_discord_bot(self):
-        """Internal method to run the Discord bot"""
+            restarts += 1
+            self.app.logger.info(f"Restarting discord bot in {backoff:g}s (restart {restarts})")
+            sleep(backoff)
+            backoff = min(backoff * 2, self.app.config["DISCORD_RESTART_BACKOFF_MAX"])
+
+    def heartbeat(self) -> Optional[dict]:
+        """The bot's last heartbeat (see ImageDownloaderClient), or None if it hasn't written one"""
         try:
-            discord_bot = ImageDownloaderClient(
-                download_dir=self.app.config["DISCORD_DOWNLOAD_DIR"],
-                channel_id=int(self.app.config["DISCORD_CHANNEL_ID"]),
-                intents=intents,
-            )
-            discord_bot.run(os.getenv("DISCORD_TOKEN"))
-            
-        except Exception as e:
-            self.app.logger.error(f"Discord bot error: {e}")
-
-
-# singleton instance  
-discord_manager = DiscordBotManager()
\ No newline at end of file
+            with open(self.app.config["DISCORD_HEARTBEAT_FILE"], encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_healthy(self, max_age: Optional[float] = None) -> bool:
+        """Has the bot written a heartbeat recently? (default: within three heartbeat intervals)"""
+        heartbeat = self.heartbeat()
+        if heartbeat is None:
+            return False
+        max_age = max_age if max_age is not None else 3 * self.app.config["DISCORD_HEARTBEAT_INTERVAL"]
+        return time.time() - heartbeat["timestamp"] <= max_age
+
+    async def _run_once(self, token: str) -> None:
+        async with self._create_bot() as discord_bot:
+            await discord_bot.start(token)
+
+    def _create_bot(self) -> "ImageDownloaderClient":
+        from app.discord_bot.discord_bot import ImageDownloaderClient, intents
+
+        return ImageDownloaderClient(
+            app=self.app,
+            channel_id=int(self.app.config["DISCORD_CHANNEL_ID"]),
+            submission_workers=self.app.config["DISCORD_SUBMISSION_WORKERS"],
+            heartbeat_file=self.app.config["DISCORD_HEARTBEAT_FILE"],
+            heartbeat_interval=self.app.config["DISCORD_HEARTBEAT_INTERVAL"],
+            intents=intents,
+        )
+
+
+# singleton instance
+discord_manager = DiscordBotManager()
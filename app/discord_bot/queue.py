@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class FairQueue:
+    """
+    Per-key FIFO queues served round-robin - each key (a guild) gets one job in turn, so a burst
+    from one guild can't starve the others. Jobs for the same key keep their order.
+    """
+
+    def __init__(self) -> None:
+        self._queues: dict[Hashable, deque] = {}
+        self._rotation: deque = deque()
+        self._ready = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def put(self, key: Hashable, job: Any) -> None:
+        async with self._ready:
+            if key not in self._queues:
+                self._queues[key] = deque()
+                self._rotation.append(key)
+            self._queues[key].append(job)
+            self._ready.notify()
+
+    async def get(self) -> Any:
+        async with self._ready:
+            await self._ready.wait_for(lambda: bool(self._rotation))
+            key = self._rotation.popleft()
+            queue = self._queues[key]
+            job = queue.popleft()
+            if queue:
+                self._rotation.append(key)
+            else:
+                del self._queues[key]
+            return job
+
+
+class SubmissionDispatcher:
+    """
+    Runs queued jobs (coroutine functions) from a FairQueue, at most `limit` at once - the semaphore
+    is taken before a job is picked, so whichever guild is next in turn when a slot frees up goes next.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.queue = FairQueue()
+        self._slots = asyncio.Semaphore(limit)
+        self._running: set[asyncio.Task] = set()
+        self._task = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def submit(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> None:
+        await self.queue.put(key, job)
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                job = await self.queue.get()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(job())
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Discord submission failed", exc_info=task.exception())
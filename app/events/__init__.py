@@ -0,0 +1,4 @@
+"""In-process pub/sub for pushing live updates (server-sent events) to connected browsers."""
+from app.events.broker import EventBroker, case_events
+
+__all__ = ["EventBroker", "case_events"]
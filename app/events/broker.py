@@ -0,0 +1,150 @@
+"""A small, local (per-process) event broker that fans events out to SSE subscribers.
+
+Each connected client gets its own bounded queue. Publishing never blocks the writer - if a client
+is too slow to drain its queue the oldest events are dropped and the client is told to resync.
+A short replay buffer lets a reconnecting EventSource (which sends Last-Event-ID) catch up on what
+it missed.
+
+The broker lives in process memory, so it only hears about writes made by the process it runs in -
+not the other web workers, the Discord bot (`flask discord-bot run`) or the import / dataset CLI
+commands. To catch those, stream() re-reads the data version every `heartbeat` seconds and sends a
+resync when it moved without a local event accounting for it.
+
+Every connected client holds its worker (or thread) for as long as it stays connected, so the web
+server needs a worker class that can park lots of idle connections - see the README.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# events queued on a session are published once its transaction commits (and dropped on rollback)
+_PENDING_KEY = "pending_broker_events"
+
+
+class EventBroker:
+    def __init__(self, max_queue: int = 100, replay_size: int = 200, heartbeat: float = 15.0) -> None:
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self._subscribers: set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._replay: deque[tuple[int, str]] = deque(maxlen=replay_size)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict) -> int:
+        """Send an event to every subscriber, returns the event id"""
+        with self._lock:
+            event_id = next(self._ids)
+            message = _format_event(event_id, event_type, data)
+            self._replay.append((event_id, message))
+            subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # slow consumer - throw away its backlog and have it refetch everything instead
+                _drain(q)
+                q.put_nowait(_format_event(event_id, "resync", {}))
+        return event_id
+
+    def publish_on_commit(self, session: Session, event_type: str, data: dict) -> None:
+        """Publish once the session's current transaction commits, so clients never see rolled back writes"""
+        session.info.setdefault(_PENDING_KEY, []).append((self, event_type, data))
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                missed = [message for event_id, message in self._replay if event_id > last_event_id]
+                oldest = self._replay[0][0] if self._replay else None
+                if oldest is not None and last_event_id < oldest - 1:
+                    # gap is bigger than the replay buffer
+                    q.put_nowait(_format_event(self._replay[-1][0], "resync", {}))
+                else:
+                    for message in missed[-self.max_queue:]:
+                        q.put_nowait(message)
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def stream(
+        self, last_event_id: Optional[int] = None, data_version: Optional[Callable[[], Any]] = None,
+    ) -> Iterator[str]:
+        """SSE body generator for a single client. Sends a comment every `heartbeat` seconds when idle
+        so proxies keep the connection open and dead clients are noticed on the next write.
+
+        `data_version` (if given) is read every `heartbeat` seconds - when it has moved and no event
+        came through this broker in the meantime, something outside this process wrote, and the
+        client is told to resync."""
+        q = self.subscribe(last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            version = data_version() if data_version is not None else None
+            delivered = False  # events sent since the version was last read
+            check_at = time.monotonic() + self.heartbeat
+            while True:
+                try:
+                    message = q.get(timeout=max(0.0, check_at - time.monotonic()))
+                except queue.Empty:
+                    message = None
+                if message is not None:
+                    delivered = True
+                    yield message
+                    if time.monotonic() < check_at:
+                        continue
+
+                check_at = time.monotonic() + self.heartbeat
+                if data_version is not None:
+                    current = data_version()
+                    if current != version and not delivered:
+                        yield _format_event(self._last_id(), "resync", {})
+                    version = current
+                delivered = False
+                if message is None:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+    def _last_id(self) -> int:
+        with self._lock:
+            return self._replay[-1][0] if self._replay else 0
+
+
+def _format_event(event_id: int, event_type: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _drain(q: queue.Queue) -> None:
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
+
+
+case_events = EventBroker()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session):
+    for broker, event_type, data in session.info.pop(_PENDING_KEY, []):
+        broker.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,8 +1,11 @@
 from datetime import datetime
 
 import humanize
+from sqlalchemy import select
 
+from app.extensions import db
 from app.models import TarkovItem
+from app.services.catalog_sync_service import catalog_cached
 from app.constants import CLOUDINARY_BASE_URL
 
 
@@ -27,13 +30,23 @@ def get_actual_item(item):
     else:
         category = item.tarkov_item.category
     if category == "Guns":
-        real_image_item = TarkovItem.query.filter_by(
-            name=f"{item.name} Default"
-        ).first()
-        if real_image_item:
-            return f"{real_image_item.tarkov_id}"
+        real_image_id = _default_image_ids().get(item.name)
+        if real_image_id:
+            return f"{real_image_id}"
     return f"{item.tarkov_id}"
 
+
+@catalog_cached
+def _default_image_ids() -> dict[str, str]:
+    """gun name -> tarkov_id of its '<name> Default' item, for every gun page without a query per item"""
+    rows = db.session.execute(
+        select(TarkovItem.name, TarkovItem.tarkov_id).where(TarkovItem.name.endswith(" Default")).order_by(TarkovItem.id)
+    )
+    default_ids = {}
+    for name, tarkov_id in rows:
+        default_ids.setdefault(name[:-len(" Default")], tarkov_id)
+    return default_ids
+
 def get_category_cdn_image_url(query: str) -> str:
     if isinstance(query, TarkovItem):
         query = query.category.lower()
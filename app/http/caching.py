@@ -0,0 +1,84 @@
+"""Conditional GET support (ETag / Last-Modified) for the polled JSON endpoints and HTMX partials.
+
+Every write to scav cases (or their items) bumps a counter in the data_version table inside the
+same transaction. The ETag for a response is a hash of that counter plus the request's query
+params, so a matching If-None-Match can be answered with a 304 *before* the view runs any of its
+aggregation queries - the only query on that path is a primary key lookup.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+from app.extensions import db
+from app.models import CASES_DATA_VERSION, DataVersion
+
+
+def get_data_version(name: str = CASES_DATA_VERSION) -> tuple[int, Optional[datetime]]:
+    """Return (version, updated_at) for a change counter, (0, None) if nothing has been written yet"""
+    row = db.session.query(DataVersion.version, DataVersion.updated_at).filter_by(name=name).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def _make_etag(version: int, *, per_user: bool, max_age: Optional[int]) -> str:
+    parts = [
+        request.endpoint or "",
+        str(version),
+        # sorted so ?a=1&b=2 and ?b=2&a=1 share an etag
+        "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True))),
+        "hx" if request.headers.get("HX-Request") else "",
+    ]
+    if per_user:
+        parts.append(str(current_user.get_id() or "anon"))
+    if max_age:
+        # responses with time-relative content ("5 minutes ago", "last 7 days") go stale on their own
+        parts.append(str(int(time.time() // max_age)))
+
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def conditional_get(*, name: str = CASES_DATA_VERSION, per_user: bool = False, max_age: Optional[int] = None):
+    """
+    Decorate a GET view so it is served with an ETag (and Last-Modified) derived from a data version.
+
+    - `per_user` - the response differs per logged in user (e.g. full pages with the navbar)
+    - `max_age` - seconds after which the etag changes anyway, for responses that depend on the clock
+    Put it *below* @login_required so unauthenticated requests are still redirected.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, updated_at = get_data_version(name)
+            etag = _make_etag(version, per_user=per_user, max_age=max_age)
+
+            not_modified = request.if_none_match.contains(etag)
+            # If-Modified-Since is only trusted when the etag can't change without a write
+            if not request.if_none_match and not max_age and updated_at and request.if_modified_since:
+                not_modified = updated_at.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if updated_at and not max_age:
+                response.last_modified = updated_at
+            # allow caching, but always revalidate
+            response.cache_control.no_cache = True
+            response.vary.add("HX-Request")
+            return response
+
+        return wrapper
+
+    return decorator
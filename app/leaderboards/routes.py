@@ -1,54 +1,43 @@
 from flask import (
     Blueprint,
-    flash,
-    redirect,
     render_template,
     request,
-    url_for,
 )
-from sqlalchemy import func
 
-from app.models import User, ScavCase, ScavCaseItem
-from app.constants import LEADERBOARD_METRICS
-from app.extensions import db
-from app.leaderboards.utils import leaderboard_base_query
+from app.constants import LEADERBOARD_METRICS, LEADERBOARD_WINDOWS
+from app.leaderboards.utils import leaderboard_rows, leaderboard_window_bounds
+from app.services.user_stats_service import UserStatsService
 
 
 leaderboards_bp = Blueprint("leaderboards", __name__)
+user_stats_service = UserStatsService()
 
 @leaderboards_bp.route("/leaderboards")
 def index():
     metric = request.args.get("metric", "total_profit")
     if metric not in LEADERBOARD_METRICS:
         metric = "total_profit"
+    window = request.args.get("window", "all")
+    if window not in LEADERBOARD_WINDOWS:
+        window = "all"
+    page = request.args.get("page", 1, type=int)
+    q = request.args.get("q", "").strip()
 
-    rows = []
-    for r in leaderboard_base_query().all():
-        avg_profit = (r.total_profit / r.case_count) if r.case_count else 0
-
-        rows.append({
-            "user_id": r.user_id,
-            "username": r.username,
-            "image_file": r.image_file,
-            "total_profit": float(r.total_profit),
-            "case_count": int(r.case_count),
-            "avg_profit": float(avg_profit),
-            "most_expensive_item": float(r.most_expensive_item),
-            "no_of_cases": int(r.case_count),
-        })
-
-    rows.sort(
-        key=lambda x: x.get(metric, 0),
-        reverse=True
-    )
+    # all-time is ranked off the indexed user_stats table, windows only sum the daily rollups in range
+    since, until = leaderboard_window_bounds(window)
+    pagination = user_stats_service.get_leaderboard(metric, page=page, since=since, until=until, search=q or None)
 
     m = LEADERBOARD_METRICS[metric]
 
     return render_template(
         "leaderboards.html",
-        data=rows,
+        data=leaderboard_rows(pagination.items),
+        pagination=pagination,
         metric=metric,
         metric_title=m["title"],
         metric_desc=m["desc"],
         metrics=[(k, v["title"], v["desc"]) for k, v in LEADERBOARD_METRICS.items()],
+        window=window,
+        windows=list(LEADERBOARD_WINDOWS.items()),
+        q=q,
     )
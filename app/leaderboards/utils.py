@@ -1,41 +1,48 @@
-from sqlalchemy import func
+from datetime import date, datetime, timedelta
+from typing import Optional
 
-from app.extensions import db
-from app.models import ScavCase, ScavCaseItem, User
+from flask import current_app
 
-def leaderboard_base_query():
-    profit_sq = (
-        db.session.query(
-            ScavCase.user_id.label("user_id"),
-            func.sum(
-                func.coalesce(ScavCase._return, 0) -
-                func.coalesce(ScavCase.cost, 0)
-            ).label("total_profit"),
-            func.count(ScavCase.id).label("case_count"),
-        )
-        .group_by(ScavCase.user_id)
-        .subquery()
-    )
 
-    item_sq = (
-        db.session.query(
-            ScavCase.user_id.label("user_id"),
-            func.max(func.coalesce(ScavCaseItem.price, 0)).label("most_expensive_item"),
-        )
-        .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
-        .group_by(ScavCase.user_id)
-        .subquery()
-    )
+def leaderboard_rows(results) -> list[dict]:
+    """Shape leaderboard query rows into the dicts the leaderboards template expects"""
+    return [
+        {
+            "user_id": r.user_id,
+            "username": r.username,
+            "image_file": r.image_file,
+            "total_profit": float(r.total_profit),
+            "case_count": int(r.case_count),
+            "avg_profit": float(r.avg_profit),
+            "most_expensive_item": float(r.most_expensive_item),
+            "no_of_cases": int(r.case_count),
+            # only set on searches, otherwise it's the row's position
+            "rank": getattr(r, "rank", None),
+        }
+        for r in results
+    ]
 
-    return (
-        db.session.query(
-            User.id.label("user_id"),
-            User.username.label("username"),
-            User.image_file.label("image_file"),
-            func.coalesce(profit_sq.c.total_profit, 0).label("total_profit"),
-            func.coalesce(profit_sq.c.case_count, 0).label("case_count"),
-            func.coalesce(item_sq.c.most_expensive_item, 0).label("most_expensive_item"),
-        )
-        .outerjoin(profit_sq, profit_sq.c.user_id == User.id)
-        .outerjoin(item_sq, item_sq.c.user_id == User.id)
-    )
+
+def leaderboard_window_bounds(window: str, today: Optional[date] = None) -> tuple[Optional[date], Optional[date]]:
+    """
+    Translate a LEADERBOARD_WINDOWS key into a [since, until) pair of UTC days.
+    (None, None) means all-time. Rolling windows include today.
+    """
+    today = today or datetime.utcnow().date()
+
+    if window == "7d":
+        return today - timedelta(days=6), None
+    if window == "30d":
+        return today - timedelta(days=29), None
+    if window == "week":
+        # calendar week, monday first
+        return today - timedelta(days=today.weekday()), None
+    if window == "month":
+        return today.replace(day=1), None
+    if window == "season":
+        wipe_start = current_app.config.get("CURRENT_WIPE_START")
+        if wipe_start:
+            return date.fromisoformat(wipe_start), None
+        current_app.logger.warning("CURRENT_WIPE_START is not set, wipe leaderboard falls back to all-time")
+
+    return None, None
@@ -3,12 +3,8 @@ import re
 import secrets
 from collections import defaultdict
 
-import requests
-import pytesseract
 from werkzeug.utils import secure_filename
-from PIL import Image, ImageFilter
 from flask import current_app
-from rapidfuzz import process, fuzz
 from sqlalchemy.sql import func
 
 from app.models import Insight, TarkovItem, ScavCase, ScavCaseItem, User
@@ -51,6 +47,8 @@ def generate_image_query(item_id):
 
 
 def run_query(query):
+    import requests
+
     headers = {"Content-Type": "application/json"}
     response = requests.post(
         "https://api.tarkov.dev/graphql", headers=headers, json={"query": query}
@@ -66,6 +64,10 @@ def run_query(query):
 
 
 def validate_scav_case_image(image_path: str) -> bool:
+    import pytesseract
+    from PIL import Image, ImageFilter
+    from rapidfuzz import fuzz
+
     img = Image.open(image_path)
     img = img.convert("L")
     img = img.filter(ImageFilter.SHARPEN)
@@ -79,6 +81,8 @@ def validate_scav_case_image(image_path: str) -> bool:
 def fuzzy_match_ocr_to_database(ocr_text: str):
     all_items = TarkovItem.query.with_entities(TarkovItem.name).all()
     item_names = [item[0] for item in all_items]
+    from rapidfuzz import fuzz, process
+
     best_match = process.extractOne(ocr_text, item_names, scorer=fuzz.ratio)
 
     if best_match and best_match[1] > 50:
@@ -89,6 +93,9 @@ def fuzzy_match_ocr_to_database(ocr_text: str):
 
 
 def process_image_for_items(image_path: str) -> str:
+    import pytesseract
+    from PIL import Image, ImageFilter
+
     img = Image.open(image_path)
     img = img.convert("L")
     img = img.filter(ImageFilter.SHARPEN)
@@ -179,10 +186,10 @@ def get_most_profitable_case():
     return (
         ScavCase.query.with_entities(
             ScavCase.type,
-            func.avg(ScavCase._return - ScavCase.cost).label("avg_profit"),
+            func.avg(ScavCase.profit).label("avg_profit"),
         )
         .group_by(ScavCase.type)
-        .order_by(func.avg(ScavCase._return - ScavCase.cost).desc())
+        .order_by(func.avg(ScavCase.profit).desc())
         .first()
     )
 
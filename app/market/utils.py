@@ -1,7 +1,6 @@
 import json
 from typing import Optional, Iterable
 
-import requests
 from flask import current_app
 
 def generate_item_price_query(tarkov_item_id: int) -> str:
@@ -61,6 +60,9 @@ def generate_prices_query(
     """
 
 def run_query(query):
+    # imported here (and in get_market_information) so workers don't load requests until the first lookup
+    import requests
+
     try:
         response = requests.post(
             "https://api.tarkov.dev/graphql", 
@@ -229,6 +231,8 @@ def get_price(tarkov_item_id: str) -> int:
     return prices.get(tarkov_item_id)
 
 def get_market_information(tarkov_item_id: int):
+    import requests
+
     query = generate_item_price_query(tarkov_item_id)
 
     response = requests.post(
@@ -1,9 +1,8 @@
 from datetime import datetime
 from dataclasses import dataclass
 
-from sqlalchemy import event, insert
+from sqlalchemy import event, insert, update
 from sqlalchemy.orm import Session
-from sqlalchemy.ext.hybrid import hybrid_property
 from flask_login import UserMixin
 
 from app.extensions import db
@@ -20,20 +19,37 @@ class Insight:
 
 class ScavCase(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     cost = db.Column(db.Float, nullable=False, default=0)
     # can't call it 'return', bloody python
     _return = db.Column(db.Float, nullable=False, default=0)
     type = db.Column(db.String(50), nullable=False)
     number_of_items = db.Column(db.Integer, nullable=False, default=0)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    # stored (_return - cost), kept up to date by the before_insert / before_update listeners below.
+    # indexed so "top profitable" queries are index scans rather than full table sorts
+    profit = db.Column(db.Float, nullable=False, default=0, server_default="0", index=True)
     items = db.relationship("ScavCaseItem", backref="scav_case", cascade="all, delete")
 
-    @hybrid_property
-    def profit(self):
-        if self._return:
-            return self._return - self.cost
-        return 0  # If _return is None, profit is 0
+    # (sort key, id) indexes so the keyset-paginated case lists are index seeks
+    __table_args__ = (
+        db.Index("ix_scav_case_created_at_id", "created_at", "id"),
+        db.Index("ix_scav_case_user_id_created_at_id", "user_id", "created_at", "id"),
+        db.Index("ix_scav_case_user_id_profit", "user_id", "profit"),
+        db.Index("ix_scav_case_type_profit", "type", "profit"),
+    )
+
+
+def compute_profit(_return, cost) -> float:
+    """Profit of a case - anything writing scav_case rows without the ORM should use this too"""
+    return (_return or 0) - (cost or 0)
+
+
+@event.listens_for(ScavCase, "before_insert")
+@event.listens_for(ScavCase, "before_update")
+def sync_scav_case_profit(mapper, connection, target):
+    """Keep the stored profit column in step with _return / cost"""
+    target.profit = compute_profit(target._return, target.cost)
 
 
 class ScavCaseItem(db.Model):
@@ -66,6 +82,10 @@ class TarkovItem(db.Model):
     name = db.Column(db.String(100), nullable=False)  # item name
     tarkov_id = db.Column(db.String(50), nullable=False, unique=True, index=True)
     category = db.Column(db.String(64), nullable=True)
+    # hash of (name, category) as of the last catalog sync (see catalog_sync.py)
+    fingerprint = db.Column(db.String(40), nullable=True)
+    # set when the item drops out of the catalog - kept (old cases still point at it) but not offered any more
+    removed_at = db.Column(db.DateTime, nullable=True)
 
 
 class WeaponAttachment(db.Model):
@@ -123,6 +143,109 @@ def add_default_items(mapper, connection, target):
         )
 
 
+class UserStats(db.Model):
+    """Per-user aggregates behind the leaderboards, maintained by UserStatsService on every case write"""
+    __tablename__ = "user_stats"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    total_profit = db.Column(db.Float, nullable=False, default=0, index=True)
+    case_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    avg_profit = db.Column(db.Float, nullable=False, default=0, index=True)
+    most_expensive_item = db.Column(db.Float, nullable=False, default=0, index=True)
+    last_case_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship("User", backref=db.backref("stats", uselist=False, cascade="all, delete-orphan"))
+
+
+class UserDailyStats(db.Model):
+    """Per-user, per-day (UTC) rollup buckets - windowed leaderboards only sum the buckets in range"""
+    __tablename__ = "user_daily_stats"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    case_count = db.Column(db.Integer, nullable=False, default=0)
+    total_profit = db.Column(db.Float, nullable=False, default=0)
+    most_expensive_item = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_user_daily_stats_day_user_id", "day", "user_id"),
+    )
+
+
+class ProfitSketchBucket(db.Model):
+    """
+    Log-bucketed profit histograms (one per scope: all cases / a case type / a user), maintained on
+    every case write. Buckets are additive, so percentiles for any scope come from summing counts.
+    """
+    __tablename__ = "profit_sketch_bucket"
+
+    scope = db.Column(db.String(16), primary_key=True)  # "all", "type" or "user"
+    scope_key = db.Column(db.String(50), primary_key=True)  # "" / case type / user id
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ItemStats(db.Model):
+    """
+    Per item, per case type occurrence counts behind the item frequency pages, maintained on every
+    case write by ItemStatsService. case_type "all" holds the totals across every case type.
+    """
+    __tablename__ = "item_stats"
+
+    tarkov_id = db.Column(db.String(50), primary_key=True)
+    case_type = db.Column(db.String(50), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    times_found = db.Column(db.Integer, nullable=False, default=0)  # scav_case_item rows, not quantity
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    last_case_id = db.Column(db.Integer, nullable=True)
+    last_seen_at = db.Column(db.DateTime, nullable=True)
+
+    # the frequency pages are "WHERE case_type = ? ORDER BY times_found, name LIMIT ?"
+    __table_args__ = (
+        db.Index("ix_item_stats_case_type_times_found_name", "case_type", "times_found", "name"),
+    )
+
+
+class DataVersion(db.Model):
+    """Monotonic change counters (e.g. "cases"), used to build ETags for conditional GETs"""
+    __tablename__ = "data_version"
+
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+CASES_DATA_VERSION = "cases"
+CATALOG_DATA_VERSION = "catalog"
+
+
+def bump_data_version(connection, name: str = CASES_DATA_VERSION) -> None:
+    """Increment a change counter on the given connection (i.e. inside the writer's transaction)"""
+    now = datetime.utcnow()
+    table = DataVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=1, updated_at=now))
+
+
+# any flush that touches scav cases or their items invalidates every cached aggregate built from them.
+@event.listens_for(Session, "after_flush")
+def bump_cases_data_version(session, flush_context):
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, (ScavCase, ScavCaseItem)) for obj in changed):
+        bump_data_version(session.connection())
+
+
+# same for the item catalog (the client side catalog index is rebuilt when this moves)
+@event.listens_for(Session, "after_flush")
+def bump_catalog_data_version(session, flush_context):
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, TarkovItem) for obj in changed):
+        bump_data_version(session.connection(), CATALOG_DATA_VERSION)
+
+
 class UserAchievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
@@ -130,4 +253,25 @@ class UserAchievement(db.Model):
     achieved_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # make sure user cannot get same achievement twice
-    __table_args__ = (db.UniqueConstraint("user_id", "achievement_name"), )
\ No newline at end of file
+    __table_args__ = (db.UniqueConstraint("user_id", "achievement_name"), )
+
+
+class UserAchievementCounter(db.Model):
+    """
+    Per-user running value of each achievement rule (case counts, total profit, keys found, ...),
+    maintained on every case write by AchievementService.
+    """
+    __tablename__ = "user_achievement_counter"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    name = db.Column(db.String(150), primary_key=True)  # "cases", or an AchievementRule.counter
+    value = db.Column(db.Float, nullable=False, default=0)
+
+
+class UserAchievementSeen(db.Model):
+    """The values each user's distinct_count achievement counters have seen (e.g. the guns they've found)"""
+    __tablename__ = "user_achievement_seen"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    counter = db.Column(db.String(150), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
\ No newline at end of file
@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, exists, func, insert, literal, select, update
+
+from app.achievements.rules import ADD, DISTINCT, MAX, MIN, AchievementRule, case_rows, compile_rules
+from app.constants import ACHIEVEMENT_RULES
+from app.models import ScavCase, TarkovItem, UserAchievement, UserAchievementCounter, UserAchievementSeen
+from app.services import BaseService
+
+RULES: dict[str, AchievementRule] = compile_rules(ACHIEVEMENT_RULES)
+
+# every user with cases has this counter - a user without it hasn't had their counters built yet
+CASES_COUNTER = "cases"
+
+
+class AchievementService(BaseService):
+    """
+    Achievements, driven by the declarative rules in constants.ACHIEVEMENT_RULES.
+
+    Per submission, each rule's value is kept as a running per-user counter (user_achievement_counter,
+    one row per distinct AchievementRule.counter), so checking a user is one small query however much
+    history they have. A new case is folded in from just its own items. Edits and deletes can lower a
+    max / min, so those recompute the owner's counters (set-based, from each rule's SQL) and take back
+    anything no longer earned. Nothing in the per-case hooks commits.
+
+    award() / revoke() evaluate rules for every user at once - one INSERT ... SELECT or DELETE per rule,
+    straight from the case tables.
+    """
+
+    def get_counters(self, user_id: int) -> dict[str, float]:
+        return dict(self.db.session.execute(
+            select(UserAchievementCounter.name, UserAchievementCounter.value)
+            .where(UserAchievementCounter.user_id == user_id)
+        ).all())
+
+    def earned(self, user_id: int) -> set[str]:
+        """Names of every achievement the user's counters currently earn"""
+        counters = self.get_counters(user_id)
+        return {name for name, rule in RULES.items() if rule.passes(counters.get(rule.counter))}
+
+    def record_case_created(self, scav_case: ScavCase, items: Iterable) -> None:
+        """Fold a newly inserted (flushed) case into its owner's counters"""
+        user_id = scav_case.user_id
+        if not self._apply(user_id, CASES_COUNTER, 1, insert_missing=False):
+            # no counters yet (first case, or history from before the counters existed) - build them from scratch
+            self.refresh_users([user_id])
+            return
+
+        items = list(items)
+        catalog = {
+            tarkov_id: (name, category)
+            for tarkov_id, name, category in self.db.session.execute(
+                select(TarkovItem.tarkov_id, TarkovItem.name, TarkovItem.category)
+                .where(TarkovItem.tarkov_id.in_({item.tarkov_id for item in items}))
+            )
+        }
+        case_row, item_rows = case_rows(scav_case, items, catalog)
+
+        for rule in self._counter_rules():
+            delta = rule.case_delta(case_row, item_rows)
+            if delta is None:
+                continue
+            if rule.combine == DISTINCT:
+                self._apply_seen(user_id, rule.counter, delta)
+            else:
+                self._apply(user_id, rule.counter, delta, rule.combine)
+
+    def refresh_users(self, user_ids: Iterable[int]) -> None:
+        """Recompute these users' counters from their cases, inside the caller's transaction (no commit)"""
+        user_ids = sorted(set(user_ids))
+        if user_ids:
+            self._rebuild_rows(user_ids)
+
+    def revoke_unearned(self, user_id: int) -> None:
+        """Take back any of the user's achievements their (up to date) counters no longer earn (no commit)"""
+        unearned = set(RULES) - self.earned(user_id)
+        if unearned:
+            self.db.session.execute(
+                delete(UserAchievement).where(
+                    UserAchievement.user_id == user_id, UserAchievement.achievement_name.in_(unearned)
+                )
+            )
+
+    def rebuild(self) -> int:
+        """Recompute every user's counters, set-based. Returns the number of users with counters."""
+        try:
+            self._rebuild_rows()
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+        return self.db.session.query(func.count(UserAchievementCounter.user_id)).filter(
+            UserAchievementCounter.name == CASES_COUNTER
+        ).scalar()
+
+    def award(self, names: Optional[Iterable[str]] = None) -> dict[str, int]:
+        """
+        Unlock rules for every user who has earned them and doesn't have them yet, one INSERT ... SELECT
+        per rule. Returns the number of users awarded, per achievement.
+        """
+        awarded = {}
+        now = datetime.utcnow()
+        try:
+            for rule in self._rules(names):
+                qualifying = rule.qualifying_users().subquery()
+                already_unlocked = exists().where(
+                    UserAchievement.user_id == qualifying.c.user_id,
+                    UserAchievement.achievement_name == rule.name,
+                )
+                result = self.db.session.execute(
+                    insert(UserAchievement).from_select(
+                        ["user_id", "achievement_name", "achieved_at"],
+                        select(qualifying.c.user_id, literal(rule.name), literal(now)).where(~already_unlocked),
+                    )
+                )
+                awarded[rule.name] = result.rowcount
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+        return awarded
+
+    def revoke(self, names: Optional[Iterable[str]] = None) -> dict[str, int]:
+        """
+        Take rules back from every user who no longer meets them (e.g. after cases were edited or
+        deleted), one DELETE per rule. Returns the number of users revoked, per achievement.
+        """
+        revoked = {}
+        try:
+            for rule in self._rules(names):
+                result = self.db.session.execute(
+                    delete(UserAchievement).where(
+                        UserAchievement.achievement_name == rule.name,
+                        UserAchievement.user_id.not_in(rule.qualifying_users()),
+                    )
+                )
+                revoked[rule.name] = result.rowcount
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+        return revoked
+
+    @staticmethod
+    def _rules(names: Optional[Iterable[str]]) -> list[AchievementRule]:
+        if names is None:
+            return list(RULES.values())
+        unknown = set(names) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown achievement(s): {', '.join(sorted(unknown))}")
+        return [RULES[name] for name in names]
+
+    @staticmethod
+    def _counter_rules() -> list[AchievementRule]:
+        """One rule per distinct counter (rules measuring the same thing share it)"""
+        return list({rule.counter: rule for rule in RULES.values()}.values())
+
+    def _apply(self, user_id: int, name: str, value: float, op: str = ADD, insert_missing: bool = True) -> bool:
+        """Apply one delta SQL-side. Returns False if the counter didn't exist yet."""
+        current = UserAchievementCounter.value
+        new_value = {
+            ADD: current + value,
+            MAX: case((current < value, value), else_=current),
+            MIN: case((current > value, value), else_=current),
+        }[op]
+
+        result = self.db.session.execute(
+            update(UserAchievementCounter)
+            .where(UserAchievementCounter.user_id == user_id, UserAchievementCounter.name == name)
+            .values(value=new_value)
+        )
+        if result.rowcount:
+            return True
+        if insert_missing:
+            self.db.session.execute(insert(UserAchievementCounter).values(user_id=user_id, name=name, value=value))
+        return False
+
+    def _apply_seen(self, user_id: int, counter: str, values: set[str]) -> None:
+        """Add a distinct_count counter's newly seen values (the counter is how many there are)"""
+        known = set(self.db.session.scalars(
+            select(UserAchievementSeen.value).where(
+                UserAchievementSeen.user_id == user_id,
+                UserAchievementSeen.counter == counter,
+                UserAchievementSeen.value.in_(values),
+            )
+        ))
+        new_values = values - known
+        if new_values:
+            self.db.session.execute(
+                insert(UserAchievementSeen),
+                [{"user_id": user_id, "counter": counter, "value": value} for value in sorted(new_values)],
+            )
+            self._apply(user_id, counter, len(new_values))
+
+    def _rebuild_rows(self, user_ids: Optional[list[int]] = None) -> None:
+        counters_delete = delete(UserAchievementCounter)
+        seen_delete = delete(UserAchievementSeen)
+        if user_ids is not None:
+            counters_delete = counters_delete.where(UserAchievementCounter.user_id.in_(user_ids))
+            seen_delete = seen_delete.where(UserAchievementSeen.user_id.in_(user_ids))
+        self.db.session.execute(counters_delete)
+        self.db.session.execute(seen_delete)
+
+        cases = select(ScavCase.user_id, literal(CASES_COUNTER), func.count()).group_by(ScavCase.user_id)
+        if user_ids is not None:
+            cases = cases.where(ScavCase.user_id.in_(user_ids))
+        statements = [cases]
+
+        for rule in self._counter_rules():
+            if rule.combine == DISTINCT:
+                self.db.session.execute(
+                    insert(UserAchievementSeen).from_select(
+                        ["user_id", "counter", "value"], rule.distinct_values_select(user_ids)
+                    )
+                )
+            statements.append(rule.counter_select(user_ids))
+
+        for statement in statements:
+            self.db.session.execute(
+                insert(UserAchievementCounter).from_select(["user_id", "name", "value"], statement)
+            )
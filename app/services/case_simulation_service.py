@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+from sqlalchemy import func, select
+
+from app.constants import SCAV_CASE_TYPES
+from app.http.caching import get_data_version
+from app.models import ScavCase, ScavCaseItem
+from app.services import BaseService
+
+# numpy is imported by the functions that use it, so workers only load it on the first simulation
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_SIMULATIONS = 1_000_000
+MAX_SIMULATIONS = 5_000_000
+# the simulation sizes the API accepts - a fixed few, so callers can't mint a new cache entry per request
+SIMULATION_CHOICES = (10_000, 100_000, DEFAULT_SIMULATIONS, MAX_SIMULATIONS)
+# fixed so every worker gives the same answer for the same data (the API responses are etagged on it)
+DEFAULT_SEED = 1337
+
+# virtual cases simulated per numpy pass - bounds the size of the per-drop temporary arrays
+_CHUNK_SIZE = 250_000
+
+# (case_type, simulations, seed) ->
+#     (data version last checked, the type's history marker, prices of the items it drops, result)
+_results_cache: dict[tuple, tuple[int, tuple, dict[str, float], Optional[dict[str, Any]]]] = {}
+_results_lock = threading.Lock()
+
+
+class CaseSimulationService(BaseService):
+    """
+    Monte Carlo expected value of running each case type at current prices.
+
+    For a case type the history gives two empirical distributions: how many items a case drops, and
+    which item (and stack size) a drop is. Every drop is repriced at the item's latest recorded price,
+    the item-priced case types (Moonshine / Intelligence) cost their latest recorded cost, and N
+    virtual cases are drawn from those distributions in a handful of vectorised numpy passes.
+
+    Drops within a case are treated as independent. Results are cached per process, and while the
+    cases data version stands still they're served without a query. Once it moves, each case type
+    is checked against what its result was simulated from - its history (see _history_markers) and
+    the latest prices of the items it drops - and only the types where either changed are rerun.
+    """
+
+    def simulate(
+        self, case_type: str, simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = DEFAULT_SEED,
+    ) -> Optional[dict[str, Any]]:
+        """EV / variance / probability of profit for one case type, None if it has no history yet"""
+        return self.simulate_types([case_type], simulations, seed)[case_type]
+
+    def simulate_all_types(
+        self, simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = DEFAULT_SEED,
+    ) -> dict[str, dict[str, Any]]:
+        """Simulation results for every case type that has history, best expected value first"""
+        results = self.simulate_types(SCAV_CASE_TYPES, simulations, seed)
+        return dict(sorted(
+            ((case_type, result) for case_type, result in results.items() if result),
+            key=lambda pair: pair[1]["expected_value"],
+            reverse=True,
+        ))
+
+    def simulate_types(
+        self, case_types: list[str], simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = DEFAULT_SEED,
+    ) -> dict[str, Optional[dict[str, Any]]]:
+        version, _ = get_data_version()
+        results, missing = {}, []
+        markers = prices = None
+        for case_type in case_types:
+            key = (case_type, simulations, seed)
+            cached = _results_cache.get(key) if seed is not None else None
+            if cached is not None and cached[0] != version:
+                # something was written since - still good if none of this type's inputs changed
+                if markers is None:
+                    markers, prices = self._history_markers(), self._latest_prices()
+                unchanged = cached[1] == markers.get(case_type) and all(
+                    prices.get(tarkov_id, 0.0) == price for tarkov_id, price in cached[2].items()
+                )
+                if unchanged:
+                    cached = (version, *cached[1:])
+                    with _results_lock:
+                        _results_cache[key] = cached
+                else:
+                    cached = None
+
+            if cached is not None:
+                results[case_type] = cached[3]
+            else:
+                missing.append(case_type)
+
+        if missing:
+            if markers is None:
+                markers, prices = self._history_markers(), self._latest_prices()
+            simulated = {}
+            for case_type in missing:
+                results[case_type], simulated[case_type] = self._simulate_type(case_type, prices, simulations, seed)
+            if seed is not None:
+                with _results_lock:
+                    _results_cache.update(
+                        (
+                            (case_type, simulations, seed),
+                            (version, markers.get(case_type), drop_prices, results[case_type]),
+                        )
+                        for case_type, drop_prices in simulated.items()
+                    )
+
+        return {case_type: results[case_type] for case_type in case_types}
+
+    def _history_markers(self) -> dict[str, tuple]:
+        """
+        Per case type, a summary of its cases and drops that changes whenever they do: adding or
+        deleting a case or drop moves a count and/or max id (edits add new item rows, they never
+        repoint old ones), and edited quantities, returns or costs move the sums.
+        """
+        cases = self.db.session.execute(
+            select(
+                ScavCase.type, func.count(), func.max(ScavCase.id), func.sum(ScavCase.number_of_items),
+                func.sum(ScavCase._return), func.sum(ScavCase.cost),
+            ).group_by(ScavCase.type)
+        ).all()
+        drops = {
+            case_type: tuple(row)
+            for case_type, *row in self.db.session.execute(
+                select(ScavCase.type, func.count(), func.max(ScavCaseItem.id), func.sum(ScavCaseItem.amount))
+                .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+                .group_by(ScavCase.type)
+            )
+        }
+        return {case_type: (tuple(row), drops.get(case_type)) for case_type, *row in cases}
+
+    def _latest_prices(self) -> dict[str, float]:
+        """Most recently recorded price of every item that has ever dropped"""
+        latest = select(func.max(ScavCaseItem.id)).group_by(ScavCaseItem.tarkov_id)
+        return dict(self.db.session.execute(
+            select(ScavCaseItem.tarkov_id, ScavCaseItem.price).where(ScavCaseItem.id.in_(latest))
+        ).all())
+
+    def _simulate_type(
+        self, case_type: str, prices: dict[str, float], simulations: int, seed: Optional[int],
+    ) -> tuple[Optional[dict[str, Any]], dict[str, float]]:
+        """The type's simulation result (None without history), and the prices its drops were valued at"""
+        import numpy as np
+
+        item_counts = np.fromiter(
+            self.db.session.execute(
+                select(ScavCase.number_of_items).where(ScavCase.type == case_type)
+            ).scalars(),
+            dtype=np.int64,
+        )
+        if not item_counts.size:
+            return None, {}
+
+        drops = self.db.session.execute(
+            select(ScavCaseItem.tarkov_id, ScavCaseItem.amount, func.count())
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .where(ScavCase.type == case_type)
+            .group_by(ScavCaseItem.tarkov_id, ScavCaseItem.amount)
+        ).all()
+        drop_prices = {tarkov_id: prices.get(tarkov_id, 0.0) for tarkov_id, _, _ in drops}
+        drop_values = np.array([drop_prices[tarkov_id] * amount for tarkov_id, amount, _ in drops], dtype=float)
+        drop_weights = np.array([count for _, _, count in drops], dtype=float)
+
+        cost = self._current_cost(case_type)
+        profits = simulate_profits(item_counts, drop_values, drop_weights, cost, simulations, np.random.default_rng(seed))
+
+        return {
+            "case_type": case_type,
+            "simulations": simulations,
+            "sample_cases": int(item_counts.size),
+            "cost": cost,
+            "expected_return": float(profits.mean()) + cost,
+            "expected_value": float(profits.mean()),
+            "variance": float(profits.var()),
+            "std_dev": float(profits.std()),
+            "std_error": float(profits.std() / np.sqrt(simulations)),
+            "probability_of_profit": float(np.count_nonzero(profits > 0) / simulations),
+            "percentiles": dict(zip(("p5", "p50", "p95"), map(float, np.percentile(profits, (5, 50, 95))))),
+        }, drop_prices
+
+    def _current_cost(self, case_type: str) -> float:
+        if case_type.startswith("₽"):
+            return float(case_type.replace("₽", "").replace(",", ""))
+        # item-priced cases cost whatever the bottle / folder went for last time
+        latest = self.db.session.execute(
+            select(ScavCase.cost).where(ScavCase.type == case_type).order_by(ScavCase.id.desc()).limit(1)
+        ).scalar()
+        return float(latest or 0.0)
+
+
+def simulate_profits(
+    item_counts: np.ndarray,
+    drop_values: np.ndarray,
+    drop_weights: np.ndarray,
+    cost: float,
+    simulations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Profit of `simulations` virtual cases: each draws its item count from `item_counts` (observed
+    counts, sampled uniformly) and then that many drops from `drop_values` weighted by `drop_weights`
+    """
+    import numpy as np
+
+    count_choices, count_weights = np.unique(item_counts, return_counts=True)
+    if not drop_values.size:
+        # cases on record but no items - every virtual case is empty
+        count_choices, count_weights = np.zeros(1, dtype=np.int64), np.ones(1)
+    count_table = alias_table(count_weights)
+    drop_table = alias_table(drop_weights) if drop_values.size else None
+
+    profits = np.empty(simulations)
+    for start in range(0, simulations, _CHUNK_SIZE):
+        size = min(_CHUNK_SIZE, simulations - start)
+        counts = count_choices[alias_sample(count_table, size, rng)]
+        ends = np.cumsum(counts)
+
+        totals = np.zeros(int(ends[-1]) + 1)
+        if ends[-1]:
+            np.cumsum(drop_values[alias_sample(drop_table, int(ends[-1]), rng)], out=totals[1:])
+
+        # per-case return is a difference of the running total at the case's first and last drop
+        profits[start:start + size] = totals[ends] - totals[ends - counts] - cost
+
+    return profits
+
+
+def alias_table(weights) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Walker / Vose alias table for a discrete distribution, so each draw is O(1) - a binary search
+    of the CDF per draw is several times slower over millions of draws
+    """
+    import numpy as np
+
+    weights = np.asarray(weights, dtype=float)
+    n = weights.size
+    scaled = weights * (n / weights.sum())
+    accept = np.ones(n)
+    alias = np.arange(n)
+
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        accept[less], alias[less] = scaled[less], more
+        scaled[more] -= 1.0 - scaled[less]
+        (small if scaled[more] < 1.0 else large).append(more)
+    # anything left over is 1 up to rounding error, accept[] already says so
+
+    return accept, alias
+
+
+def alias_sample(table: tuple[np.ndarray, np.ndarray], size: int, rng: np.random.Generator) -> np.ndarray:
+    """`size` indexes drawn from an alias table (one uniform per draw picks the column and the coin)"""
+    import numpy as np
+
+    accept, alias = table
+    u = rng.random(size) * accept.size
+    column = u.astype(np.int64)
+    return np.where(u - column < accept[column], column, alias[column])
@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import url_for
+from sqlalchemy import select
+
+from app.constants import CLOUDINARY_BASE_URL
+from app.http.caching import get_data_version
+from app.models import CATALOG_DATA_VERSION, TarkovItem
+from app.services import BaseService
+
+# the positional layout of each entry in "items" - kept out of the rows to keep the payload small
+INDEX_FIELDS = ("id", "name", "category", "tokens", "image")
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+_cached_index: Optional["CatalogIndex"] = None
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    version: str  # content hash - part of the URL, so the file can be cached forever
+    data_version: int  # catalog data_version it was built from
+    item_count: int
+    body: bytes
+    gzipped: bytes
+
+
+def normalize_tokens(name: str) -> list[str]:
+    """
+    Lower case, accents stripped, split on anything that isn't a letter or digit. The typeahead
+    script normalises the query the same way (catalog-typeahead.js normalize()).
+    """
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return list(dict.fromkeys(_NON_WORD.sub(" ", stripped).split()))
+
+
+class CatalogIndexService(BaseService):
+    """
+    Builds the compact item catalog index the create / edit case pages search locally, instead of
+    a server round trip (and a rendered partial) per keystroke.
+
+    The index is a gzipped JSON document named by a hash of its content. It's rebuilt (once per
+    process) when the catalog data version moves, and otherwise served straight from memory.
+    """
+
+    def get_index(self) -> CatalogIndex:
+        global _cached_index
+        data_version, _ = get_data_version(CATALOG_DATA_VERSION)
+        index = _cached_index
+        if index is not None and index.data_version == data_version:
+            return index
+
+        with _cache_lock:
+            if _cached_index is None or _cached_index.data_version != data_version:
+                _cached_index = self.build_index(data_version)
+            return _cached_index
+
+    def build_index(self, data_version: int = 0) -> CatalogIndex:
+        rows = self.db.session.execute(
+            select(TarkovItem.tarkov_id, TarkovItem.name, TarkovItem.category)
+            .where(TarkovItem.removed_at.is_(None))
+            .order_by(TarkovItem.name, TarkovItem.id)
+        ).all()
+
+        # guns show the "<name> Default" item's image (see filters.get_actual_item), resolved here in one pass
+        default_images = {name[:-len(" Default")]: tarkov_id for tarkov_id, name, _ in rows if name.endswith(" Default")}
+
+        categories = sorted({category for _, _, category in rows if category})
+        category_index = {category: i for i, category in enumerate(categories)}
+        items = [
+            [
+                tarkov_id,
+                name,
+                category_index.get(category),
+                " ".join(normalize_tokens(name)),
+                default_images.get(name) if category == "Guns" else None,
+            ]
+            for tarkov_id, name, category in rows
+        ]
+
+        content = {"fields": INDEX_FIELDS, "categories": categories, "image_base": CLOUDINARY_BASE_URL, "items": items}
+        content_json = json.dumps(content, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        version = hashlib.sha256(content_json.encode("utf-8")).hexdigest()[:16]
+
+        body = json.dumps({"version": version, **content}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # mtime=0 so the same catalog always compresses to the same bytes
+        return CatalogIndex(version, data_version, len(items), body, gzip.compress(body, compresslevel=9, mtime=0))
+
+
+def catalog_index_url() -> str:
+    """URL of the current catalog index (a template global for the pages that search it)"""
+    return url_for("api.catalog_index_file", version=CatalogIndexService().get_index().version)
@@ -0,0 +1,47 @@
+import threading
+from functools import wraps
+from typing import Callable, Iterable, TypeVar
+
+# the sync itself lives outside the app package, so fetch_new_items.py can use it without importing the app
+from catalog_sync import CatalogItem, CatalogSyncResult, sync_catalog  # noqa: F401
+from app.http.caching import get_data_version
+from app.models import CATALOG_DATA_VERSION
+from app.services import BaseService
+
+T = TypeVar("T")
+
+
+class CatalogSyncService(BaseService):
+    """Incremental item catalog syncs (see sync_catalog) on the app's session, in one transaction"""
+
+    def sync(self, items: Iterable[CatalogItem], remove_missing: bool = True) -> CatalogSyncResult:
+        try:
+            result = sync_catalog(self.db.session.connection(), items, remove_missing=remove_missing)
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+        return result
+
+
+def catalog_cached(loader: Callable[[], T]) -> Callable[[], T]:
+    """
+    Memoise something built from the whole item catalog (e.g. the OCR name matcher), per process.
+    It's rebuilt only after the catalog data version moves - a sync that changed something, or
+    any ORM write to tarkov_item.
+    """
+    cached: list = [None, None]  # (data version, updated at), value
+    lock = threading.Lock()
+
+    @wraps(loader)
+    def wrapper() -> T:
+        version = get_data_version(CATALOG_DATA_VERSION)
+        if cached[0] == version:
+            return cached[1]
+        with lock:
+            if cached[0] != version:
+                cached[1] = loader()
+                cached[0] = version
+            return cached[1]
+
+    return wrapper
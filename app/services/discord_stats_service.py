@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+
+from app.constants import SCAV_CASE_TYPES
+from app.http.caching import get_data_version
+from app.models import ScavCase, User, UserStats
+from app.services import BaseService
+
+# users listed in the per-user breakdown
+TOP_USERS = 5
+
+
+class DiscordStatsService(BaseService):
+    """
+    Site-wide totals for the bot's !stats (and /api/discord-stats), with per case type and per user
+    breakdowns. The totals are folded from a GROUP BY type over scav_case (a handful of rows), the top
+    users are read off the user_stats rollup (an indexed ORDER BY total_profit ... LIMIT), and the
+    result is kept against the cases data version - until a case is written, every call is answered
+    from memory after a primary key lookup.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cached: Optional[tuple[int, dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def get_stats(self) -> dict[str, Any]:
+        version, _ = get_data_version()
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # one thread recomputes, any others arriving meanwhile wait for its result instead of scanning too
+        with self._lock:
+            cached = self._cached
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            stats = self._compute()
+            self._cached = (version, stats)
+            return stats
+
+    def _compute(self) -> dict[str, Any]:
+        by_type = [
+            {"type": case_type, "cases": cases, "profit": profit, "spend": spend}
+            for case_type, cases, profit, spend in self.db.session.execute(
+                select(
+                    ScavCase.type,
+                    func.count(ScavCase.id),
+                    func.coalesce(func.sum(ScavCase.profit), 0),
+                    func.coalesce(func.sum(ScavCase.cost), 0),
+                ).group_by(ScavCase.type)
+            )
+        ]
+        top_users = [
+            {"username": username, "cases": cases, "profit": profit}
+            for username, cases, profit in self.db.session.execute(
+                select(User.username, UserStats.case_count, UserStats.total_profit)
+                .join(User, User.id == UserStats.user_id)
+                .where(UserStats.case_count > 0)
+                .order_by(UserStats.total_profit.desc(), UserStats.user_id.desc())
+                .limit(TOP_USERS)
+            )
+        ]
+
+        type_order = {case_type: i for i, case_type in enumerate(SCAV_CASE_TYPES)}
+        return {
+            "total_profit": sum(row["profit"] for row in by_type),
+            "total_cases": sum(row["cases"] for row in by_type),
+            "total_spend": sum(row["spend"] for row in by_type),
+            "by_type": sorted(by_type, key=lambda row: (type_order.get(row["type"], len(type_order)), row["type"])),
+            "top_users": top_users,
+        }
@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.sql import sqltypes
+
+from app.http.errors import ValidationError
+from app.models import ScavCase, ScavCaseItem, User
+from app.services import BaseService
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_LEVELS = ("cases", "items")
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportService(BaseService):
+    """
+    Streams scav cases (or their items) out of the database as CSV, JSON Lines or Parquet.
+
+    Rows are read with `yield_per` (a server-side cursor where the driver supports one) and encoded
+    a batch at a time, so memory use depends on the batch size rather than on how many rows match.
+    Nothing is loaded as ORM objects - the statements select plain columns.
+    """
+
+    def __init__(self, batch_size: int = 5000) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+
+    def export(
+        self,
+        fmt: str = "csv",
+        level: str = "cases",
+        *,
+        user_id: Optional[int] = None,
+        case_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        compress: bool = False,
+    ) -> Iterator[bytes]:
+        """Return a generator of encoded chunks for the requested export (gzipped if `compress`)"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValidationError(f"Invalid export format: {fmt}", details={"allowed": list(EXPORT_FORMATS)})
+        if level not in EXPORT_LEVELS:
+            raise ValidationError(f"Invalid export level: {level}", details={"allowed": list(EXPORT_LEVELS)})
+        if fmt == "parquet":
+            # checked up front so the caller gets an error rather than a truncated download
+            _import_pyarrow()
+
+        statement = self._export_statement(level, user_id=user_id, case_type=case_type, since=since, until=until)
+        columns = list(statement.selected_columns.keys())
+        batches = self._iter_batches(statement)
+
+        if fmt == "parquet":
+            chunks = _encode_parquet(columns, batches, [column.type for column in statement.selected_columns])
+        else:
+            encoder = {"csv": _encode_csv, "jsonl": _encode_jsonl}[fmt]
+            chunks = encoder(columns, batches)
+        return gzip_chunks(chunks) if compress else chunks
+
+    def _export_statement(self, level: str, *, user_id=None, case_type=None, since=None, until=None):
+        if level == "cases":
+            statement = select(
+                ScavCase.id,
+                ScavCase.created_at,
+                ScavCase.type,
+                ScavCase.cost,
+                ScavCase._return.label("return"),
+                ScavCase.profit,
+                ScavCase.number_of_items,
+                ScavCase.user_id,
+                User.username,
+            ).join(User, User.id == ScavCase.user_id)
+            order_by = (ScavCase.id,)
+        else:
+            statement = select(
+                ScavCaseItem.scav_case_id.label("case_id"),
+                ScavCase.created_at,
+                ScavCase.type.label("case_type"),
+                ScavCase.user_id,
+                ScavCaseItem.tarkov_id,
+                ScavCaseItem.name,
+                ScavCaseItem.amount,
+                ScavCaseItem.price,
+            ).join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            order_by = (ScavCaseItem.scav_case_id, ScavCaseItem.id)
+
+        if user_id is not None:
+            statement = statement.where(ScavCase.user_id == user_id)
+        if case_type and case_type.lower() != "all":
+            statement = statement.where(ScavCase.type == case_type)
+        if since is not None:
+            statement = statement.where(ScavCase.created_at >= since)
+        if until is not None:
+            statement = statement.where(ScavCase.created_at < until)
+
+        return statement.order_by(*order_by)
+
+    def _iter_batches(self, statement) -> Iterator[list[tuple]]:
+        result = self.db.session.execute(statement, execution_options={"yield_per": self.batch_size})
+        try:
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+        finally:
+            result.close()
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_csv(columns: list[str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([[_json_value(value) for value in row] for row in batch])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # header only, no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_jsonl(columns: list[str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = (
+            json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False)
+            for row in batch
+        )
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValidationError("Parquet export requires pyarrow to be installed") from e
+    return pyarrow, pyarrow.parquet
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands whatever has been written so far back to the caller"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._position += len(b)
+        return len(b)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow_type(pa, sql_type):
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Float):
+        return pa.float64()
+    return pa.string()
+
+
+def _encode_parquet(columns: list[str], batches: Iterable[list[tuple]], sql_types: list) -> Iterator[bytes]:
+    """One parquet row group per batch, flushed to the client as soon as it's written"""
+    pa, pq = _import_pyarrow()
+    schema = pa.schema([(column, _arrow_type(pa, sql_type)) for column, sql_type in zip(columns, sql_types)])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    for batch in batches:
+        arrays = [pa.array([row[i] for row in batch], type=field.type) for i, field in enumerate(schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a stream of byte chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,337 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from app.cases.utils import check_achievements
+from app.constants import CASE_COST_ITEM_IDS, SCAV_CASE_TYPES
+from app.events import case_events
+from app.http.errors import ValidationError
+from app.market.utils import get_prices
+from app.models import ScavCase, ScavCaseItem, TarkovItem, User, bump_data_version, compute_profit
+from app.services import BaseService
+from app.services.achievement_service import AchievementService
+from app.services.item_stats_service import ItemStatsService
+from app.services.profit_distribution_service import ProfitDistributionService
+from app.services.user_stats_service import UserStatsService
+
+IMPORT_FORMATS = ("jsonl", "csv")
+
+# columns of a CSV import - one row per item, rows with the same case_ref (in a row) make up a case
+CSV_COLUMNS = ("case_ref", "user", "type", "created_at", "cost", "tarkov_id", "name", "quantity", "price")
+
+# tarkov.dev takes a list of ids per request, keep each one a sensible size
+PRICE_LOOKUP_CHUNK = 500
+
+
+@dataclass
+class ImportResult:
+    cases: int = 0
+    items: int = 0
+    users: int = 0
+    error_count: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "cases": self.cases,
+            "items": self.items,
+            "users": self.users,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+class _RecordError(Exception):
+    pass
+
+
+class ImportService(BaseService):
+    """
+    Bulk import of historical scav cases from JSON Lines or CSV.
+
+    Records are parsed and validated as a stream, a batch at a time. Prices that aren't supplied are
+    looked up in bulk (once per distinct item for the whole import), and every batch goes in as two
+    executemany Core inserts (cases, then items) rather than one ORM transaction per case. The stats
+    rollups and achievement counters are rebuilt for the affected users (and the item stats for the
+    affected items) once and the profit sketches get one delta per touched bucket, in the same
+    transaction, and achievements are checked once per user after the commit.
+
+    JSONL - one case per line:
+        {"user": "name", "type": "₽2500", "created_at": "2025-01-01T12:00:00", "cost": 2500,
+         "items": [{"id": "<tarkov id>", "quantity": 2, "price": 12000}]}
+    CSV - one item per row, see CSV_COLUMNS.
+    """
+
+    def __init__(self, batch_size: int = 5000, max_errors: int = 100) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self._stats_service = UserStatsService()
+        self._distribution_service = ProfitDistributionService()
+        self._item_stats_service = ItemStatsService()
+        self._achievement_service = AchievementService()
+
+    def import_cases(
+        self,
+        lines: Iterable[str],
+        fmt: str = "jsonl",
+        *,
+        owner_id: Optional[int] = None,
+        resolve_prices: bool = True,
+        strict: bool = False,
+        check_user_achievements: bool = True,
+    ) -> ImportResult:
+        """
+        Import every valid record in `lines`.
+
+        - `owner_id` - assign every case to this user (otherwise each record names its user)
+        - `resolve_prices` - look up missing item prices on tarkov.dev, otherwise they're an error
+        - `strict` - any invalid record aborts the whole import (nothing is written)
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValidationError(f"Invalid import format: {fmt}", details={"allowed": list(IMPORT_FORMATS)})
+
+        records = self._parse_jsonl(lines) if fmt == "jsonl" else self._parse_csv(lines)
+        result = ImportResult()
+        self._catalog = dict(self.db.session.execute(select(TarkovItem.tarkov_id, TarkovItem.name)).all())
+        self._users: dict[str, Optional[int]] = {}
+        self._prices: dict[str, float] = {}
+        self._resolve_prices = resolve_prices
+        affected_users: set[int] = set()
+        affected_items: set[str] = set()
+
+        try:
+            while batch := list(islice(records, self.batch_size)):
+                cases = self._validate_batch(batch, owner_id, result)
+                if strict and result.error_count:
+                    break
+                self._fill_prices(cases)
+                self._insert_batch(cases, result)
+                affected_users.update(case["user_id"] for case in cases)
+                affected_items.update(item["tarkov_id"] for case in cases for item in case["items"])
+
+            if strict and result.error_count:
+                self.db.session.rollback()
+                raise ValidationError(
+                    f"Import aborted, {result.error_count} invalid record(s)", details={"errors": result.errors},
+                )
+
+            if result.cases:
+                # the bulk inserts bypass the ORM, so do what the per-case write path does - once
+                self._stats_service.rebuild_users(affected_users)
+                self._item_stats_service.refresh_items(affected_items)
+                self._achievement_service.refresh_users(affected_users)
+                bump_data_version(self.db.session.connection())
+                case_events.publish_on_commit(self.db.session(), "resync", {"imported": result.cases})
+            self.db.session.commit()
+        except ValidationError:
+            raise
+        except Exception:
+            self.db.session.rollback()
+            current_app.logger.exception("Bulk import failed")
+            raise
+
+        result.users = len(affected_users)
+        if check_user_achievements:
+            for user in User.query.filter(User.id.in_(affected_users)):
+                try:
+                    check_achievements(user, notify=False)
+                except Exception:
+                    # the cases are already committed - don't fail the import over an achievement
+                    self.db.session.rollback()
+                    current_app.logger.exception("Achievement check failed for user %s after import", user.id)
+
+        return result
+
+    def _parse_jsonl(self, lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, _RecordError(f"Invalid JSON: {e.msg}")
+
+    def _parse_csv(self, lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+        """Group consecutive item rows that share a case_ref into one case record"""
+        reader = csv.DictReader(lines)
+        missing = {"case_ref", "type", "tarkov_id", "quantity"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValidationError("CSV import is missing required columns", details={"missing": sorted(missing)})
+
+        current_ref, current, start_line = None, None, 0
+        for row in reader:
+            line_no = reader.line_num
+            ref = (row.get("case_ref") or "").strip()
+            if current is not None and ref == current_ref:
+                current["items"].append(_csv_item(row))
+                continue
+
+            if current is not None:
+                yield start_line, current
+            current_ref, start_line = ref, line_no
+            current = {
+                "user": row.get("user"),
+                "type": row.get("type"),
+                "created_at": row.get("created_at") or None,
+                "cost": row.get("cost") or None,
+                "items": [_csv_item(row)],
+            }
+
+        if current is not None:
+            yield start_line, current
+
+    def _validate_batch(self, batch: list[tuple[int, Any]], owner_id: Optional[int], result: ImportResult) -> list[dict]:
+        if owner_id is None:
+            self._load_users({str(record.get("user", "")).strip() for _, record in batch if isinstance(record, dict)})
+
+        cases = []
+        for line_no, record in batch:
+            try:
+                if isinstance(record, _RecordError):
+                    raise record
+                cases.append(self._validate_record(record, owner_id))
+            except (_RecordError, ValueError, TypeError, KeyError) as e:
+                result.error_count += 1
+                if len(result.errors) < self.max_errors:
+                    result.errors.append({"line": line_no, "message": str(e)})
+        return cases
+
+    def _load_users(self, usernames: set[str]) -> None:
+        unknown = [name for name in usernames if name and name not in self._users]
+        if not unknown:
+            return
+        found = dict(self.db.session.execute(select(User.username, User.id).where(User.username.in_(unknown))).all())
+        for name in unknown:
+            self._users[name] = found.get(name)
+
+    def _validate_record(self, record: Any, owner_id: Optional[int]) -> dict:
+        if not isinstance(record, dict):
+            raise _RecordError("Record must be an object")
+
+        user_id = owner_id
+        if user_id is None:
+            username = str(record.get("user", "")).strip()
+            user_id = self._users.get(username)
+            if user_id is None:
+                raise _RecordError(f"Unknown user: {username!r}")
+
+        case_type = str(record.get("type", "")).strip()
+        if case_type not in SCAV_CASE_TYPES:
+            raise _RecordError(f"Invalid case type: {case_type!r}")
+
+        created_at = record.get("created_at")
+        created_at = datetime.fromisoformat(created_at) if created_at else datetime.utcnow()
+        if created_at.tzinfo is not None:
+            raise _RecordError("created_at must be a naive UTC timestamp")
+
+        raw_items = record.get("items") or []
+        if not isinstance(raw_items, list):
+            raise _RecordError("items must be a list")
+
+        items = []
+        for item in raw_items:
+            if not isinstance(item, dict):
+                raise _RecordError(f"Invalid item (expected an object): {item!r}")
+            tarkov_id = str(item.get("id") or item.get("tarkov_id") or "").strip()
+            if tarkov_id not in self._catalog:
+                raise _RecordError(f"Unknown item id: {tarkov_id!r}")
+            quantity = int(item.get("quantity", item.get("amount", 0)))
+            if quantity <= 0:
+                raise _RecordError(f"Invalid quantity for item {tarkov_id}: {quantity}")
+            price = item.get("price")
+            if price in (None, "") and not self._resolve_prices:
+                raise _RecordError(f"No price given for item {tarkov_id}")
+            items.append({
+                "tarkov_id": tarkov_id,
+                "name": item.get("name") or self._catalog[tarkov_id],
+                "amount": quantity,
+                "price": float(price) if price not in (None, "") else None,
+            })
+
+        cost = record.get("cost")
+        if cost not in (None, ""):
+            cost = float(cost)
+        elif case_type in CASE_COST_ITEM_IDS:
+            if not self._resolve_prices:
+                raise _RecordError(f"No cost given for a {case_type} case")
+            cost = None  # priced with the items
+        else:
+            cost = float(case_type.replace("₽", "").replace(",", ""))
+
+        return {"user_id": user_id, "type": case_type, "created_at": created_at, "cost": cost, "items": items}
+
+    def _fill_prices(self, cases: list[dict]) -> None:
+        """Look up every not-yet-seen item (and item-priced case cost) in bulk, then fill the gaps"""
+        needed = {item["tarkov_id"] for case in cases for item in case["items"] if item["price"] is None}
+        needed.update(CASE_COST_ITEM_IDS[case["type"]] for case in cases if case["cost"] is None)
+        needed = sorted(needed - self._prices.keys())
+
+        for start in range(0, len(needed), PRICE_LOOKUP_CHUNK):
+            chunk = needed[start:start + PRICE_LOOKUP_CHUNK]
+            try:
+                prices = get_prices(chunk)
+            except Exception:
+                current_app.logger.exception("Price lookup failed (bulk import). Falling back to 0.")
+                prices = {}
+            for tarkov_id in chunk:
+                self._prices[tarkov_id] = float(prices.get(tarkov_id) or 0.0)
+
+        for case in cases:
+            for item in case["items"]:
+                if item["price"] is None:
+                    item["price"] = self._prices[item["tarkov_id"]]
+            if case["cost"] is None:
+                case["cost"] = self._prices[CASE_COST_ITEM_IDS[case["type"]]]
+
+    def _insert_batch(self, cases: list[dict], result: ImportResult) -> None:
+        if not cases:
+            return
+
+        case_rows = []
+        for case in cases:
+            _return = sum(item["price"] * item["amount"] for item in case["items"])
+            case_rows.append({
+                "user_id": case["user_id"],
+                "type": case["type"],
+                "created_at": case["created_at"],
+                "cost": case["cost"],
+                "_return": _return,
+                "profit": compute_profit(_return, case["cost"]),
+                "number_of_items": len(case["items"]),
+            })
+
+        cases_table = ScavCase.__table__
+        case_ids = self.db.session.execute(
+            insert(cases_table).returning(cases_table.c.id, sort_by_parameter_order=True), case_rows,
+        ).scalars().all()
+
+        item_rows = [
+            {**item, "scav_case_id": case_id}
+            for case_id, case in zip(case_ids, cases)
+            for item in case["items"]
+        ]
+        if item_rows:
+            self.db.session.execute(insert(ScavCaseItem.__table__), item_rows)
+
+        self._distribution_service.record_cases_bulk(
+            (row["type"], row["user_id"], row["profit"]) for row in case_rows
+        )
+
+        result.cases += len(case_rows)
+        result.items += len(item_rows)
+
+
+def _csv_item(row: dict) -> dict:
+    return {
+        "id": row.get("tarkov_id"),
+        "name": row.get("name") or None,
+        "quantity": row.get("quantity"),
+        "price": row.get("price") or None,
+    }
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, update
+
+from app.database.search import item_name_filter
+from app.models import ItemStats, ScavCase, ScavCaseItem, TarkovItem
+from app.services import BaseService
+
+# item_stats.case_type of the rows that count every case type
+ALL_CASE_TYPES = "all"
+
+# tarkov ids per IN (...) when refreshing a set of items
+_REFRESH_CHUNK = 500
+
+
+class ItemStatsService(BaseService):
+    """
+    Keeps the item_stats table (times found / total quantity / last seen, per item per case type)
+    in step with scav case writes, and serves the item frequency pages from it.
+
+    New cases are folded in as SQL-side deltas. Edits and deletes can take away an item's latest
+    case, so those recompute just the touched items' rows instead. Like UserStatsService, nothing
+    here commits except rebuild().
+    """
+
+    def record_case_created(self, scav_case: ScavCase, items: Iterable[ScavCaseItem]) -> None:
+        """Fold a newly inserted (flushed) case's items into their stats rows"""
+        totals: dict[str, list] = defaultdict(lambda: [0, 0, None])
+        for item in items:
+            row = totals[item.tarkov_id]
+            row[0] += 1
+            row[1] += item.amount
+            row[2] = item.name
+
+        for tarkov_id, (times_found, quantity, name) in totals.items():
+            for case_type in (scav_case.type, ALL_CASE_TYPES):
+                self._apply_delta(
+                    tarkov_id, case_type, name, times_found, quantity, scav_case.id, scav_case.created_at,
+                )
+
+    def refresh_items(self, tarkov_ids: Iterable[str]) -> None:
+        """Recompute every stats row of these items from scav_case_item (after an edit / delete / import)"""
+        tarkov_ids = sorted(set(tarkov_ids))
+        for start in range(0, len(tarkov_ids), _REFRESH_CHUNK):
+            self._rebuild_rows(tarkov_ids[start:start + _REFRESH_CHUNK])
+
+    def rebuild(self) -> int:
+        """Recompute the whole table, set-based. Returns the number of distinct items."""
+        try:
+            self._rebuild_rows()
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+        return self.db.session.query(func.count(ItemStats.tarkov_id)).filter(
+            ItemStats.case_type == ALL_CASE_TYPES
+        ).scalar()
+
+    def get_item_frequency_paginated(
+        self,
+        case_type: str = "all",
+        page: int = 1,
+        per_page: int = 10,
+        search: str = "",
+        sort_order: str = "desc",
+    ):
+        """
+        Page of items ordered by how many times they've been found, for one case type or all of them.
+        An index range scan on (case_type, times_found, name) - no aggregation at request time.
+        """
+        case_type = ALL_CASE_TYPES if not case_type or case_type.lower() == "all" else case_type
+        q = (
+            self.db.session.query(
+                ItemStats.tarkov_id,
+                ItemStats.name,
+                TarkovItem.category,
+                ItemStats.times_found,
+                ItemStats.total_quantity,
+                ItemStats.last_case_id,
+                ItemStats.last_seen_at,
+            )
+            .outerjoin(TarkovItem, ItemStats.tarkov_id == TarkovItem.tarkov_id)
+            .filter(ItemStats.case_type == case_type)
+        )
+
+        if search:
+            # items that aren't (or are no longer) in the catalog are still found by their recorded name
+            q = q.filter(or_(
+                item_name_filter(search),
+                and_(TarkovItem.id.is_(None), ItemStats.name.ilike(f"%{search.strip()}%")),
+            ))
+
+        q = q.order_by(
+            ItemStats.times_found.asc() if sort_order == "asc" else ItemStats.times_found.desc(),
+            ItemStats.name.asc(),
+        )
+        return q.paginate(page=page, per_page=per_page, error_out=False)
+
+    def _apply_delta(
+        self,
+        tarkov_id: str,
+        case_type: str,
+        name: str,
+        times_found: int,
+        quantity: int,
+        case_id: int,
+        seen_at: Optional[datetime],
+    ) -> None:
+        values = {
+            "name": name,
+            "times_found": ItemStats.times_found + times_found,
+            "total_quantity": ItemStats.total_quantity + quantity,
+            "last_case_id": case(
+                (ItemStats.last_case_id.is_(None), case_id),
+                (ItemStats.last_case_id < case_id, case_id),
+                else_=ItemStats.last_case_id,
+            ),
+        }
+        if seen_at is not None:
+            values["last_seen_at"] = case(
+                (ItemStats.last_seen_at.is_(None), seen_at),
+                (ItemStats.last_seen_at < seen_at, seen_at),
+                else_=ItemStats.last_seen_at,
+            )
+
+        result = self.db.session.execute(
+            update(ItemStats)
+            .where(ItemStats.tarkov_id == tarkov_id, ItemStats.case_type == case_type)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            self.db.session.execute(
+                insert(ItemStats).values(
+                    tarkov_id=tarkov_id,
+                    case_type=case_type,
+                    name=name,
+                    times_found=times_found,
+                    total_quantity=quantity,
+                    last_case_id=case_id,
+                    last_seen_at=seen_at,
+                )
+            )
+
+    def _rebuild_rows(self, tarkov_ids: Optional[list[str]] = None) -> None:
+        stats_delete = delete(ItemStats)
+        if tarkov_ids is not None:
+            stats_delete = stats_delete.where(ItemStats.tarkov_id.in_(tarkov_ids))
+        self.db.session.execute(stats_delete)
+
+        columns = ["tarkov_id", "case_type", "name", "times_found", "total_quantity", "last_case_id", "last_seen_at"]
+        for by_type in (True, False):
+            self.db.session.execute(
+                insert(ItemStats).from_select(columns, self._aggregate_select(by_type, tarkov_ids))
+            )
+
+    def _aggregate_select(self, by_type: bool, tarkov_ids: Optional[list[str]] = None):
+        case_type = ScavCase.type if by_type else literal(ALL_CASE_TYPES)
+        statement = (
+            select(
+                ScavCaseItem.tarkov_id,
+                case_type,
+                func.max(ScavCaseItem.name),
+                func.count(ScavCaseItem.id),
+                func.sum(ScavCaseItem.amount),
+                func.max(ScavCaseItem.scav_case_id),
+                func.max(ScavCase.created_at),
+            )
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .group_by(ScavCaseItem.tarkov_id, *((ScavCase.type,) if by_type else ()))
+        )
+        if tarkov_ids is not None:
+            statement = statement.where(ScavCaseItem.tarkov_id.in_(tarkov_ids))
+        return statement
@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 
 from app.models import TarkovItem, User
+from app.database.search import search_items
 from app.services import BaseService
 from app.market.utils import get_market_information, get_price, get_prices
 
@@ -13,9 +14,7 @@ class MarketService(BaseService):
         if not query.strip():
             return []
             
-        return TarkovItem.query.filter(
-            TarkovItem.name.ilike(f"%{query}%")
-        ).limit(limit).all()
+        return search_items(query, limit=limit)
     
     def get_item_by_tarkov_id(self, tarkov_id: str) -> Optional[TarkovItem]:
         """Get item by Tarkov ID"""
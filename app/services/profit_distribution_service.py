@@ -0,0 +1,224 @@
+import math
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from app.models import ProfitSketchBucket, ScavCase
+from app.services import BaseService
+
+# relative accuracy of a percentile read from the sketch (2% -> a p50 of 100k is within +/- 2k)
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+PERCENTILES = (10, 50, 90, 99)
+
+# coarse, human readable bins the fine buckets are folded into for the histogram charts
+HISTOGRAM_EDGES = (-1_000_000, -100_000, -10_000, -1_000, 0, 1_000, 10_000, 100_000, 1_000_000)
+
+SCOPE_ALL = "all"
+SCOPE_TYPE = "type"
+SCOPE_USER = "user"
+
+
+def bucket_for(profit: float) -> int:
+    """
+    Signed log bucket for a profit: 0 holds exactly 0, bucket +/-(k+1) holds magnitudes in
+    (GAMMA^(k-1), GAMMA^k] (everything up to 1 rouble shares k=0)
+    """
+    if not profit:
+        return 0
+    k = max(0, math.ceil(math.log(abs(profit)) / _LOG_GAMMA))
+    return (k + 1) if profit > 0 else -(k + 1)
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative profit for a bucket (its midpoint in relative terms)"""
+    if bucket == 0:
+        return 0.0
+    k = abs(bucket) - 1
+    value = 2 * GAMMA ** k / (GAMMA + 1)
+    return value if bucket > 0 else -value
+
+
+def _short_roubles(value: float) -> str:
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for divisor, suffix in ((1_000_000, "M"), (1_000, "k")):
+        if value >= divisor:
+            return f"{sign}₽{value / divisor:g}{suffix}"
+    return f"{sign}₽{value:g}"
+
+
+def _bin_label(lower: Optional[float], upper: Optional[float]) -> str:
+    if lower is None:
+        return f"≤ {_short_roubles(upper)}"
+    if upper is None:
+        return f"> {_short_roubles(lower)}"
+    return f"{_short_roubles(lower)} to {_short_roubles(upper)}"
+
+
+class ProfitSketch:
+    """A mergeable bucket -> count histogram with percentile / win-rate / histogram readouts"""
+
+    def __init__(self, counts: Optional[dict[int, int]] = None) -> None:
+        self.counts = Counter({b: c for b, c in (counts or {}).items() if c > 0})
+
+    def add(self, profit: float, n: int = 1) -> None:
+        self.counts[bucket_for(profit)] += n
+
+    def merge(self, other: "ProfitSketch") -> "ProfitSketch":
+        self.counts.update(other.counts)
+        return self
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def win_rate(self) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        return sum(c for b, c in self.counts.items() if b > 0) / total
+
+    def percentile(self, p: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        # nearest-rank on the bucket representatives
+        rank = max(1, math.ceil(p / 100 * total))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return bucket_value(bucket)
+        return bucket_value(max(self.counts))
+
+    def histogram(self, edges: Iterable[float] = HISTOGRAM_EDGES) -> list[dict[str, Any]]:
+        edges = list(edges)
+        bins = [{"lower": lower, "upper": upper, "label": _bin_label(lower, upper), "count": 0}
+                for lower, upper in zip([None] + edges, edges + [None])]
+        for bucket, count in self.counts.items():
+            value = bucket_value(bucket)
+            # bins are (lower, upper] so zero profit lands in the "<= 0" bin
+            index = sum(1 for edge in edges if value > edge)
+            bins[index]["count"] += count
+        return bins
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "win_rate": self.win_rate(),
+            "percentiles": {f"p{p}": self.percentile(p) for p in PERCENTILES},
+            "histogram": self.histogram(),
+        }
+
+
+class ProfitDistributionService(BaseService):
+    """
+    Keeps the profit_sketch_bucket table up to date and serves profit percentiles, win rate and
+    histograms per case type / per user / overall from it.
+
+    Like UserStatsService, the record_* hooks run inside the caller's transaction and apply SQL-side
+    count deltas, so a percentile query only ever reads a few hundred bucket rows instead of sorting
+    the whole case history.
+    """
+
+    def record_case_created(self, scav_case: ScavCase) -> None:
+        self._apply(self._scopes(scav_case.type, scav_case.user_id), bucket_for(scav_case.profit), 1)
+
+    def record_case_updated(self, scav_case: ScavCase, old_profit: float) -> None:
+        old_bucket, new_bucket = bucket_for(old_profit), bucket_for(scav_case.profit)
+        if old_bucket == new_bucket:
+            return
+        scopes = self._scopes(scav_case.type, scav_case.user_id)
+        self._apply(scopes, old_bucket, -1)
+        self._apply(scopes, new_bucket, 1)
+
+    def record_case_deleted(self, case_type: str, user_id: int, profit: float) -> None:
+        self._apply(self._scopes(case_type, user_id), bucket_for(profit), -1)
+
+    def record_cases_bulk(self, cases: Iterable[tuple[str, int, float]]) -> None:
+        """Fold many (case_type, user_id, profit) rows in at once - one statement per touched bucket"""
+        deltas = self._count_buckets(cases)
+        for (scope, scope_key, bucket), count in deltas.items():
+            self._increment(scope, scope_key, bucket, count)
+
+    def rebuild(self) -> None:
+        """Recompute every sketch from scav_case (streams the profits, doesn't hold them in memory)"""
+        rows = self.db.session.execute(
+            select(ScavCase.type, ScavCase.user_id, ScavCase.profit), execution_options={"yield_per": 10000},
+        )
+        deltas = self._count_buckets(rows)
+        try:
+            self.db.session.execute(delete(ProfitSketchBucket))
+            if deltas:
+                self.db.session.execute(insert(ProfitSketchBucket), [
+                    {"scope": scope, "scope_key": scope_key, "bucket": bucket, "count": count}
+                    for (scope, scope_key, bucket), count in deltas.items()
+                ])
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+    def get_sketch(self, case_type: Optional[str] = None, user_id: Optional[int] = None) -> ProfitSketch:
+        """Sketch for all cases, a case type or a user (a type *and* a user isn't tracked)"""
+        if user_id is not None:
+            scope, scope_key = SCOPE_USER, str(user_id)
+        elif case_type and case_type.lower() != "all":
+            scope, scope_key = SCOPE_TYPE, case_type
+        else:
+            scope, scope_key = SCOPE_ALL, ""
+
+        rows = self.db.session.execute(
+            select(ProfitSketchBucket.bucket, ProfitSketchBucket.count)
+            .where(ProfitSketchBucket.scope == scope, ProfitSketchBucket.scope_key == scope_key)
+        ).all()
+        return ProfitSketch(dict(rows))
+
+    def get_distribution(self, case_type: Optional[str] = None, user_id: Optional[int] = None) -> dict[str, Any]:
+        return self.get_sketch(case_type=case_type, user_id=user_id).summary()
+
+    def get_distributions_by_type(self) -> dict[str, dict[str, Any]]:
+        """Summary for every case type, from a single query"""
+        rows = self.db.session.execute(
+            select(ProfitSketchBucket.scope_key, ProfitSketchBucket.bucket, ProfitSketchBucket.count)
+            .where(ProfitSketchBucket.scope == SCOPE_TYPE)
+        ).all()
+        sketches: dict[str, ProfitSketch] = {}
+        for case_type, bucket, count in rows:
+            sketches.setdefault(case_type, ProfitSketch()).counts[bucket] += count
+        return {case_type: sketch.summary() for case_type, sketch in sketches.items()}
+
+    @staticmethod
+    def _scopes(case_type: str, user_id: int) -> list[tuple[str, str]]:
+        return [(SCOPE_ALL, ""), (SCOPE_TYPE, case_type), (SCOPE_USER, str(user_id))]
+
+    def _count_buckets(self, cases: Iterable[tuple[str, int, float]]) -> Counter:
+        deltas: Counter = Counter()
+        for case_type, user_id, profit in cases:
+            bucket = bucket_for(profit)
+            for scope, scope_key in self._scopes(case_type, user_id):
+                deltas[(scope, scope_key, bucket)] += 1
+        return deltas
+
+    def _apply(self, scopes: list[tuple[str, str]], bucket: int, delta: int) -> None:
+        for scope, scope_key in scopes:
+            self._increment(scope, scope_key, bucket, delta)
+
+    def _increment(self, scope: str, scope_key: str, bucket: int, delta: int) -> None:
+        result = self.db.session.execute(
+            update(ProfitSketchBucket)
+            .where(
+                ProfitSketchBucket.scope == scope,
+                ProfitSketchBucket.scope_key == scope_key,
+                ProfitSketchBucket.bucket == bucket,
+            )
+            .values(count=ProfitSketchBucket.count + delta)
+        )
+        if result.rowcount == 0 and delta > 0:
+            self.db.session.execute(
+                insert(ProfitSketchBucket).values(scope=scope, scope_key=scope_key, bucket=bucket, count=delta)
+            )
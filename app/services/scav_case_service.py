@@ -1,15 +1,22 @@
+import io
 import json
 from typing import List, Dict, Any, Optional
 
-import requests
 from flask import url_for, current_app, jsonify
 from sqlalchemy.sql import func, case
 from sqlalchemy.orm import joinedload, selectinload
 
 from app.constants import DISCORD_BOT_USER_USERNAME
+from app.database.pagination import KeysetPage, keyset_paginate
+from app.events import case_events
 from app.models import ScavCase, ScavCaseItem, TarkovItem, User
 from app.services import BaseService
 from app.services.user_service import UserService
+from app.services.user_stats_service import UserStatsService
+from app.services.profit_distribution_service import ProfitDistributionService
+from app.services.case_simulation_service import CaseSimulationService
+from app.services.item_stats_service import ItemStatsService
+from app.services.achievement_service import AchievementService
 from app.cases.utils import (
     calculate_most_popular_categories,
     find_most_common_items,
@@ -27,6 +34,11 @@ from app.market.utils import (
 )
 
 user_service = UserService()
+user_stats_service = UserStatsService()
+profit_distribution_service = ProfitDistributionService()
+case_simulation_service = CaseSimulationService()
+item_stats_service = ItemStatsService()
+achievement_service = AchievementService()
 
 class ScavCaseService(BaseService):
     """Service class for handling biz logic for ScavCase functionality"""
@@ -39,26 +51,8 @@ class ScavCaseService(BaseService):
         case_type: Optional[str] = None,
     ):
         """Return all ScavCases (paginated) with safe sorting, including profit sorting."""
-        query = (
-            self.db.session.query(ScavCase)
-            .options(joinedload(ScavCase.author))  # template uses scav_case.author.*
-        )
-
-        if case_type and case_type != "all":
-            query = query.filter(ScavCase.type == case_type)
-
-        if sort_by == "profit":
-            sort_expr = ScavCase._return - ScavCase.cost
-        else:
-            allowed_sort_columns = {
-                "id": ScavCase.id,
-                "created_at": ScavCase.created_at,
-                "type": ScavCase.type,
-                "cost": ScavCase.cost,
-                "_return": ScavCase._return,
-                "number_of_items": ScavCase.number_of_items,
-            }
-            sort_expr = allowed_sort_columns.get(sort_by, ScavCase.type)
+        query = self._cases_list_query(case_type=case_type)
+        sort_expr = self._case_sort_expr(sort_by, default=ScavCase.type)
 
         if sort_order == "asc":
             query = query.order_by(self.db.asc(sort_expr), self.db.asc(ScavCase.id))
@@ -67,6 +61,21 @@ class ScavCaseService(BaseService):
 
         return query.paginate(page=page, per_page=per_page, error_out=False)
 
+    def get_all_cases_keyset(
+        self, cursor: Optional[str] = None, per_page: int = 10,
+        sort_by: str = "created_at", sort_order: str = "desc",
+        case_type: Optional[str] = None, count_mode: str = "estimate",
+    ) -> KeysetPage:
+        """Return a page of all ScavCases using keyset (cursor) pagination - page N costs the same as page 1."""
+        query = self._cases_list_query(case_type=case_type)
+        sort_expr = self._case_sort_expr(sort_by, default=ScavCase.created_at)
+        scope = f"cases:all:{case_type or 'all'}:{sort_by}:{sort_order}"
+
+        return keyset_paginate(
+            query, sort_expr, ScavCase.id, scope=scope, cursor=cursor,
+            per_page=per_page, sort_order=sort_order, count_mode=count_mode,
+        )
+
     def get_all_cases_by_user(self, user: User) -> list[ScavCase] | None:
         return ScavCase.query.filter_by(user_id=user.id).all()
 
@@ -76,27 +85,8 @@ class ScavCaseService(BaseService):
         case_type: Optional[str] = None,
     ):
         """Return a user's ScavCases (paginated) with optional filtering and sorting."""
-        query = (
-            self.db.session.query(ScavCase)
-            .options(joinedload(ScavCase.author))
-            .filter(ScavCase.user_id == user.id)
-        )
-
-        if case_type and case_type != "all":
-            query = query.filter(ScavCase.type == case_type)
-
-        if sort_by == "profit":
-            sort_expr = ScavCase._return - ScavCase.cost
-        else:
-            allowed_sort_columns = {
-                "id": ScavCase.id,
-                "created_at": ScavCase.created_at,
-                "type": ScavCase.type,
-                "cost": ScavCase.cost,
-                "_return": ScavCase._return,
-                "number_of_items": ScavCase.number_of_items,
-            }
-            sort_expr = allowed_sort_columns.get(sort_by, ScavCase.created_at)
+        query = self._cases_list_query(case_type=case_type, user_id=user.id)
+        sort_expr = self._case_sort_expr(sort_by, default=ScavCase.created_at)
 
         if sort_order == "asc":
             query = query.order_by(self.db.asc(sort_expr), self.db.asc(ScavCase.id))
@@ -105,6 +95,48 @@ class ScavCaseService(BaseService):
 
         return query.paginate(page=page, per_page=per_page, error_out=False)
 
+    def get_all_cases_by_user_keyset(
+        self, user: User, cursor: Optional[str] = None, per_page: int = 10,
+        sort_by: str = "created_at", sort_order: str = "desc",
+        case_type: Optional[str] = None, count_mode: str = "exact",
+    ) -> KeysetPage:
+        """Return a page of a user's ScavCases using keyset (cursor) pagination."""
+        query = self._cases_list_query(case_type=case_type, user_id=user.id)
+        sort_expr = self._case_sort_expr(sort_by, default=ScavCase.created_at)
+        scope = f"cases:user:{user.id}:{case_type or 'all'}:{sort_by}:{sort_order}"
+
+        return keyset_paginate(
+            query, sort_expr, ScavCase.id, scope=scope, cursor=cursor,
+            per_page=per_page, sort_order=sort_order, count_mode=count_mode,
+        )
+
+    def _cases_list_query(self, case_type: Optional[str] = None, user_id: Optional[int] = None):
+        """Base query for the case list pages, optionally filtered by type and/or user."""
+        query = (
+            self.db.session.query(ScavCase)
+            .options(joinedload(ScavCase.author))  # template uses scav_case.author.*
+        )
+
+        if user_id is not None:
+            query = query.filter(ScavCase.user_id == user_id)
+        if case_type and case_type != "all":
+            query = query.filter(ScavCase.type == case_type)
+
+        return query
+
+    def _case_sort_expr(self, sort_by: str, default):
+        """Map a user supplied sort key onto a whitelisted column / expression."""
+        allowed_sort_columns = {
+            "id": ScavCase.id,
+            "created_at": ScavCase.created_at,
+            "type": ScavCase.type,
+            "cost": ScavCase.cost,
+            "_return": ScavCase._return,
+            "number_of_items": ScavCase.number_of_items,
+            "profit": ScavCase.profit,
+        }
+        return allowed_sort_columns.get(sort_by, default)
+
     def get_case_by_id(self, case_id: int) -> Optional[ScavCase]:
         """Get scav case by ID or return None"""
         return ScavCase.query.get(case_id)
@@ -129,40 +161,15 @@ class ScavCaseService(BaseService):
         sort_order: str = "desc",
     ):
         """
-        Return paginated item occurrence-counts aggregated across all scav cases.
+        Return paginated item occurrence-counts across all scav cases (or one case type).
         'Occurrences' = number of scav case rows the item appeared in (not total quantity).
-        Each row: tarkov_id, name, category, times_found, last_case_id.
-        Single query — no N+1.
+        Each row: tarkov_id, name, category, times_found, total_quantity, last_case_id, last_seen_at.
+        Read from the precomputed item_stats table - an indexed lookup, not a GROUP BY per request.
         """
-        q = (
-            self.db.session.query(
-                ScavCaseItem.tarkov_id,
-                ScavCaseItem.name,
-                TarkovItem.category,
-                func.count(ScavCaseItem.id).label("times_found"),
-                func.max(ScavCaseItem.scav_case_id).label("last_case_id"),
-            )
-            .join(TarkovItem, ScavCaseItem.tarkov_id == TarkovItem.tarkov_id, isouter=True)
-        )
-
-        if case_type and case_type.lower() != "all":
-            q = q.join(ScavCase, ScavCaseItem.scav_case_id == ScavCase.id)
-            q = q.filter(ScavCase.type == case_type)
-
-        if search:
-            q = q.filter(ScavCaseItem.name.ilike(f"%{search}%"))
-
-        sort_expr = func.count(ScavCaseItem.id)
-        q = (
-            q.group_by(ScavCaseItem.tarkov_id, ScavCaseItem.name, TarkovItem.category)
-            .order_by(
-                sort_expr.asc() if sort_order == "asc" else sort_expr.desc(),
-                ScavCaseItem.name.asc(),
-            )
+        return item_stats_service.get_item_frequency_paginated(
+            case_type=case_type, page=page, per_page=per_page, search=search, sort_order=sort_order,
         )
 
-        return q.paginate(page=page, per_page=per_page, error_out=False)
-
     def calculate_insights_data(self, case_type: str = "all") -> Dict[str, Any]:
         """Calculate values and form structure for insights page, for a given case type"""
 
@@ -172,8 +179,14 @@ class ScavCaseService(BaseService):
         most_popular_categories = calculate_most_popular_categories(scav_cases)
         category_distribution = calculate_item_category_distribution(scav_cases)
         
+        # percentiles / win rate come from the incrementally maintained sketches, not from sorting scav_cases
+        profit_distribution = profit_distribution_service.get_distribution(case_type=case_type)
+
         if case_type == "all":
             return {
+                "case_simulations": case_simulation_service.simulate_all_types(),
+                "profit_distribution": profit_distribution,
+                "profit_distribution_by_type": profit_distribution_service.get_distributions_by_type(),
                 "most_popular_items": most_popular_items,
                 "most_popular_categories": most_popular_categories,
                 "category_distribution": category_distribution,
@@ -186,7 +199,11 @@ class ScavCaseService(BaseService):
                 "return_over_time_chart": None,
             }
         else:
+            simulation = case_simulation_service.simulate(case_type)
             return {
+                "case_simulations": {case_type: simulation} if simulation else {},
+                "profit_distribution": profit_distribution,
+                "profit_distribution_by_type": None,
                 "most_popular_items": most_popular_items,
                 "most_popular_categories": most_popular_categories,
                 "category_distribution": category_distribution,
@@ -199,11 +216,19 @@ class ScavCaseService(BaseService):
                 "avg_return_chart": None,
             }
     
-    def create_scav_case(self, scav_case_type: str, uploaded_image, items_data: str, user: User) -> Dict[str, Any]:
-        """Create a new scav case entry - centralised function for web and integrations (e.g. discord bot)"""
+    def create_scav_case(
+        self, scav_case_type: str, uploaded_image, items_data: str, user: User, notify_achievements: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Create a new scav case entry - centralised function for web and integrations (e.g. discord bot).
+        `uploaded_image` is an uploaded file, or the image's bytes (in-process integrations, OCR'd in memory).
+        `notify_achievements` flashes new achievements, so it needs a request context.
+        """
         try:
             # uploaded_image is for integrations such as discord bot
-            if uploaded_image:
+            if isinstance(uploaded_image, (bytes, bytearray)):
+                items = process_scav_case_image(io.BytesIO(uploaded_image))
+            elif uploaded_image:
                 # save image, and process via OCR to get items
                 file_path = save_uploaded_image(uploaded_image)
                 items = process_scav_case_image(file_path)
@@ -215,7 +240,7 @@ class ScavCaseService(BaseService):
             
             scav_case = self._create_scav_case_entry(scav_case_type, items, user.id)
 
-            check_achievements(user)
+            check_achievements(user, notify=notify_achievements)
 
             current_app.logger.info(f"Scav case createds successfully for user: '{user.username}'")
 
@@ -235,7 +260,10 @@ class ScavCaseService(BaseService):
 
     def update_scav_case_items(self, scav_case: ScavCase, items_data: List[Dict]) -> None:
         """Update items for an existing scav case"""
+        old_profit = scav_case.profit
+        before = self._case_snapshot(scav_case)
         existing_items = {item.id: item for item in scav_case.items}
+        touched_item_ids = {item.tarkov_id for item in scav_case.items}
         received_item_ids = {item["id"] for item in items_data if "id" in item}
 
         # First work out if any items were deleted
@@ -249,6 +277,7 @@ class ScavCaseService(BaseService):
             self.db.session.delete(item)
 
         total_price = 0
+        max_item_price = 0.0
         
         # Update or create items where required
         for item_data in items_data:
@@ -267,76 +296,117 @@ class ScavCaseService(BaseService):
                     amount=item_data["quantity"],
                 )
                 self.db.session.add(new_item)
+                touched_item_ids.add(new_item.tarkov_id)
                 item_price = new_item.price
             
             total_price += item_price * item_data["quantity"]
+            max_item_price = max(max_item_price, item_price or 0.0)
 
         # update scav case totals
         scav_case._return = total_price
         scav_case.number_of_items = len(items_data)
 
+        try:
+            # flush so the stored profit is recomputed, then fold the change into the owner's stats
+            self.db.session.flush()
+            user_stats_service.record_case_updated(
+                scav_case, old_profit, max_item_price=max_item_price, items_removed=bool(items_to_delete),
+            )
+            profit_distribution_service.record_case_updated(scav_case, old_profit)
+            item_stats_service.refresh_items(touched_item_ids)
+            achievement_service.refresh_users([scav_case.user_id])
+            achievement_service.revoke_unearned(scav_case.user_id)
+            self._publish_case_event("updated", scav_case, before=before)
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
         self.commit()
 
     def delete_scav_case(self, scav_case: ScavCase) -> bool:
-        """Delete a scav case"""
-        return self.delete(scav_case)
+        """Delete a scav case (and take it out of the owner's stats in the same transaction)"""
+        user_id, profit, created_at, case_type = scav_case.user_id, scav_case.profit, scav_case.created_at, scav_case.type
+        before = self._case_snapshot(scav_case)
+        item_ids = {item.tarkov_id for item in scav_case.items}
+        try:
+            self.db.session.delete(scav_case)
+            self.db.session.flush()
+            user_stats_service.record_case_deleted(user_id, profit, created_at)
+            profit_distribution_service.record_case_deleted(case_type, user_id, profit)
+            item_stats_service.refresh_items(item_ids)
+            achievement_service.refresh_users([user_id])
+            achievement_service.revoke_unearned(user_id)
+            self._publish_case_event("deleted", before=before)
+            self.db.session.commit()
+            return True
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
 
     def handle_discord_bot_submission(self, request):
         """
-        Handle Discord bot scav case submission
+        Handle Discord bot scav case submission over HTTP
         Returns: (response_dict, status_code)
         """
+        scav_case_type = request.form.get("scav_case_type")
+        uploaded_image = request.files.get("image")
+        current_app.logger.info(f"Form data - Type: {scav_case_type}, Has Image: {bool(uploaded_image)}")
+
+        payload, status = self.submit_discord_case(
+            scav_case_type, uploaded_image, items_data=request.form.get("items_data", ""), notify_achievements=True,
+        )
+        return jsonify(payload), status
+
+    def submit_discord_case(
+        self, scav_case_type: str, image, items_data: str = "", notify_achievements: bool = False,
+    ) -> tuple[Dict[str, Any], int]:
+        """
+        Create a case for the Discord bot user. The bot calls this in-process (in an app context, on
+        a worker thread) with the screenshot's bytes, so nothing is written to disk and no web worker
+        is tied up. Returns (payload, status) - the created case's summary, or {"error": ...}.
+        """
         try:
-            # Get the Discord bot user
-            discord_bot_user = User.query.filter_by(username='Discord Bot').first()
+            discord_bot_user = User.query.filter_by(username=DISCORD_BOT_USER_USERNAME).first()
             if not discord_bot_user:
                 current_app.logger.error("Discord bot user not found in database")
-                return jsonify({"error": "Discord bot user not found"}), 500
-            
-            current_app.logger.info(f"Found Discord bot user: {discord_bot_user.username}")
-            
-            # Extract form data
-            scav_case_type = request.form.get("scav_case_type")
-            uploaded_image = request.files.get("image")
-            items_data = request.form.get("items_data", "")
-            
-            current_app.logger.info(f"Form data - Type: {scav_case_type}, Has Image: {bool(uploaded_image)}")
-            
+                return {"error": "Discord bot user not found"}, 500
+
             if not scav_case_type:
-                return jsonify({"error": "scav_case_type is required"}), 400
-            
+                return {"error": "scav_case_type is required"}, 400
+
             # Create the scav case
             result = self.create_scav_case(
                 scav_case_type=scav_case_type,
-                uploaded_image=uploaded_image,
+                uploaded_image=image,
                 items_data=items_data,
-                user=discord_bot_user
+                user=discord_bot_user,
+                notify_achievements=notify_achievements,
             )
-            
+
             current_app.logger.info(f"Service result: {result}")
-            
-            if result["success"]:
-                scav_case = self.get_case_by_id(result["scav_case_id"])
-                return jsonify({
-                    "message": result["message"],
-                    "scav_case_id": scav_case.id,
-                    "cost": scav_case.cost,
-                    "total_return": scav_case._return,
-                    "items": [
-                        {
-                            "name": item.name,
-                            "quantity": item.amount,
-                            "price": item.price,
-                        }
-                        for item in scav_case.items
-                    ],
-                }), 200
-            else:
-                return jsonify({"error": result["message"]}), 400
-                
+
+            if not result["success"]:
+                return {"error": result["message"]}, 400
+
+            scav_case = self.get_case_by_id(result["scav_case_id"])
+            return {
+                "message": result["message"],
+                "scav_case_id": scav_case.id,
+                "cost": scav_case.cost,
+                "total_return": scav_case._return,
+                "items": [
+                    {
+                        "name": item.name,
+                        "quantity": item.amount,
+                        "price": item.price,
+                    }
+                    for item in scav_case.items
+                ],
+            }, 200
+
         except Exception as e:
             current_app.logger.error(f"Discord bot submission error: {e}")
-            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+            return {"error": f"Internal server error: {str(e)}"}, 500
 
     # TODO: Maybe split this into a DashboardService
     def generate_dashboard_data(self, since_date=None, case_type: str = None):
@@ -379,7 +449,7 @@ class ScavCaseService(BaseService):
             func.count(ScavCase.id).label("total_cases"),
             func.sum(
                 case(
-                    (ScavCase._return > ScavCase.cost, 1),
+                    (ScavCase.profit > 0, 1),
                     else_=0
                 )
             ).label("profitable_cases")
@@ -408,10 +478,7 @@ class ScavCaseService(BaseService):
             q = q.filter(ScavCase.user_id == user_id)
 
         case_obj = (
-            q.order_by(
-                (ScavCase._return - ScavCase.cost).desc(),
-                ScavCase.created_at.desc()
-            )
+            q.order_by(ScavCase.profit.desc(), ScavCase.id.desc())
             .first()
         )
 
@@ -427,7 +494,7 @@ class ScavCaseService(BaseService):
         """
         q = self.db.session.query(
             func.coalesce(
-                func.avg(ScavCase._return - ScavCase.cost),
+                func.avg(ScavCase.profit),
                 0.0
             )
         )
@@ -454,8 +521,8 @@ class ScavCaseService(BaseService):
 
         return (
             q.order_by(
-                (ScavCase._return - ScavCase.cost).desc(),
-                ScavCase.created_at.desc(),  # deterministic tie-breaker
+                ScavCase.profit.desc(),
+                ScavCase.id.desc(),  # deterministic tie-breaker, and keeps it an index scan
             )
             .limit(n)
             .all()
@@ -466,7 +533,7 @@ class ScavCaseService(BaseService):
             func.count(ScavCase.id),
             func.coalesce(func.sum(ScavCase.cost), 0),
             func.coalesce(func.sum(ScavCase._return), 0),
-            func.coalesce(func.sum(ScavCase._return - ScavCase.cost), 0),
+            func.coalesce(func.sum(ScavCase.profit), 0),
         )
 
         if user_id is not None:
@@ -524,7 +591,7 @@ class ScavCaseService(BaseService):
         return (
             q.group_by(ScavCase.type)
             .order_by(
-                func.avg(ScavCase._return - ScavCase.cost).desc(),
+                func.avg(ScavCase.profit).desc(),
                 ScavCase.type.asc(),
             )
             .limit(1)
@@ -572,7 +639,7 @@ class ScavCaseService(BaseService):
         """Build profit over time chart data"""
         return {
             "labels": [str(case.id) for case in scav_cases],
-            "profits": [(case._return - case.cost) for case in scav_cases],
+            "profits": [case.profit for case in scav_cases],
             "costs": [case.cost for case in scav_cases],
         }
 
@@ -591,6 +658,38 @@ class ScavCaseService(BaseService):
             "costs": [case.cost for case in scav_cases],
         }
 
+    def _case_snapshot(self, scav_case: ScavCase) -> dict[str, Any]:
+        """Compact summary of a case, as pushed to live dashboards"""
+        user = self.db.session.get(User, scav_case.user_id)
+        return {
+            "id": scav_case.id,
+            "type": scav_case.type,
+            "user_id": scav_case.user_id,
+            "username": user.username if user else None,
+            "created_at": scav_case.created_at.isoformat() if scav_case.created_at else None,
+            "cost": scav_case.cost,
+            "return": scav_case._return,
+            "profit": scav_case.profit,
+            "number_of_items": scav_case.number_of_items,
+        }
+
+    def _publish_case_event(self, action: str, scav_case: ScavCase = None, before: dict = None) -> None:
+        """Queue a "case" event (case summary + KPI deltas) to go out to SSE clients once the transaction commits"""
+        after = self._case_snapshot(scav_case) if scav_case is not None else None
+        old = before or {"cost": 0.0, "return": 0.0, "profit": 0.0}
+        new = after or {"cost": 0.0, "return": 0.0, "profit": 0.0}
+
+        case_events.publish_on_commit(self.db.session(), "case", {
+            "action": action,
+            "case": after or before,
+            "delta": {
+                "total_cases": {"created": 1, "deleted": -1}.get(action, 0),
+                "total_cost": new["cost"] - old["cost"],
+                "total_return": new["return"] - old["return"],
+                "total_profit": new["profit"] - old["profit"],
+            },
+        })
+
     def _create_scav_case_entry(
         self, scav_case_type: str, items: list[dict[str, Any]], user_id: int,
     ) -> ScavCase:
@@ -692,6 +791,15 @@ class ScavCaseService(BaseService):
                 session.add_all(case_items)
                 # compute return val
                 scav_case._return = total_return
+                # flush so the stored profit is set, then update the owner's stats in the same transaction
+                session.flush()
+                user_stats_service.record_case_created(
+                    scav_case, max_item_price=max((i.price for i in case_items), default=0.0),
+                )
+                profit_distribution_service.record_case_created(scav_case)
+                item_stats_service.record_case_created(scav_case, case_items)
+                achievement_service.record_case_created(scav_case, case_items)
+                self._publish_case_event("created", scav_case)
 
             # if the outer transaction was started then commit it. if the caller started then they can commit
             if not session.in_transaction():
@@ -0,0 +1,337 @@
+import json
+import random
+import secrets
+import time
+from bisect import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import func, insert, select, text
+
+from app.constants import CASE_COST_ITEM_IDS, DEFAULT_TRACKED_ITEMS, SCAV_CASE_TYPES
+from app.events import case_events
+from app.extensions import bcrypt
+from app.http.errors import ValidationError
+from app.models import ScavCase, ScavCaseItem, TarkovItem, User, bump_data_version, compute_profit, user_tracked_items
+from app.services import BaseService
+from app.services.achievement_service import AchievementService
+from app.services.item_stats_service import ItemStatsService
+from app.services.profit_distribution_service import ProfitDistributionService
+from app.services.user_stats_service import UserStatsService
+
+DEFAULT_SEED = 1337
+DEFAULT_USERNAME_PREFIX = "bench_"
+
+# how often each case type is run
+CASE_TYPE_WEIGHTS = {"₽2500": 30, "₽15000": 30, "₽95000": 20, "Moonshine": 12, "Intelligence": 8}
+
+
+class CaseProfile(NamedTuple):
+    min_items: int
+    max_items: int
+    # > 0 favours the valuable items of a category, < 0 the cheap ones (weight = price ** value_bias)
+    value_bias: float
+    category_weights: dict[str, float]
+
+
+# rough shape of what each case type gives back in game - with the fixture prices the average returns come
+# out around 13k / 43k / 140k / 225k / 235k
+CASE_PROFILES = {
+    "₽2500": CaseProfile(2, 6, -1.8, {
+        "Provisions": 25, "Barter Items": 30, "Medical": 15, "Ammo": 20, "Mods": 7, "Keys": 3,
+    }),
+    "₽15000": CaseProfile(3, 8, -1.0, {
+        "Barter Items": 30, "Medical": 15, "Ammo": 15, "Provisions": 10, "Mods": 15, "Keys": 8,
+        "Grenades": 4, "Containers": 3,
+    }),
+    "₽95000": CaseProfile(4, 10, -0.2, {
+        "Barter Items": 25, "Mods": 15, "Keys": 15, "Guns": 10, "Armors": 8, "Medical": 7, "Helmets": 5,
+        "Rigs": 5, "Backpacks": 5, "Suppressors": 5,
+    }),
+    "Moonshine": CaseProfile(5, 14, 0.0, {
+        "Guns": 20, "Barter Items": 20, "Mods": 15, "Armors": 10, "Keys": 10, "Ammo": 10, "Helmets": 8,
+        "Suppressors": 7,
+    }),
+    "Intelligence": CaseProfile(3, 9, 0.2, {
+        "Barter Items": 30, "Keys": 25, "Medical": 15, "Containers": 10, "Mods": 10, "Guns": 10,
+    }),
+}
+
+# (min, max) stack size of one drop, by category - anything else drops one at a time
+STACK_SIZES = {"Ammo": (10, 60), "Barter Items": (1, 3), "Provisions": (1, 2), "Medical": (1, 2)}
+
+# median price of a synthetic fixture price, by category (prices are log-normal around it)
+CATEGORY_PRICE_MEDIANS = {
+    "Ammo": 60, "Provisions": 5_000, "Medical": 6_000, "Barter Items": 7_000, "Keys": 20_000,
+    "Mods": 8_000, "Guns": 20_000, "Armors": 30_000, "Helmets": 18_000, "Rigs": 12_000, "Backpacks": 15_000,
+    "Suppressors": 18_000, "Grenades": 6_000, "Containers": 80_000, "Headsets": 14_000, "Face Cover": 5_000,
+}
+DEFAULT_PRICE_MEDIAN = 8_000
+
+# the bottle / folder, when the catalog doesn't have it
+FALLBACK_CASE_COSTS = {"Moonshine": 90_000.0, "Intelligence": 130_000.0}
+
+# weight of the n-th user (from 0) as a case owner - a few users log most of the cases
+USER_ACTIVITY_EXPONENT = 0.8
+
+
+class CatalogEntry(NamedTuple):
+    tarkov_id: str
+    name: str
+    category: str
+
+
+@dataclass
+class SyntheticDatasetResult:
+    users: int = 0
+    users_created: int = 0
+    cases: int = 0
+    items: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "users": self.users,
+            "users_created": self.users_created,
+            "cases": self.cases,
+            "items": self.items,
+            "seconds": round(self.seconds, 2),
+        }
+
+
+def fixture_price(entry: CatalogEntry) -> float:
+    """A stable made-up price for an item - the same for every run, whatever the seed"""
+    median = CATEGORY_PRICE_MEDIANS.get(entry.category, DEFAULT_PRICE_MEDIAN)
+    return float(max(1, round(median * random.Random(entry.tarkov_id).lognormvariate(0, 0.9))))
+
+
+def load_fixture_prices(path: str) -> dict[str, float]:
+    """{tarkov_id: price} from a JSON file (e.g. a saved tarkov.dev price snapshot)"""
+    with open(path, encoding="utf-8") as f:
+        return {tarkov_id: float(price) for tarkov_id, price in json.load(f).items() if price is not None}
+
+
+class SyntheticDataset:
+    """
+    Seeded generator of scav cases: case types, owners, item counts, drops and stack sizes are all
+    drawn from `random.Random(seed)`, so the same seed, catalog and prices give the same cases. No
+    database or network access - see SyntheticDatasetService for the writes.
+    """
+
+    def __init__(self, catalog: list[CatalogEntry], prices: dict[str, float], seed: int = DEFAULT_SEED) -> None:
+        if not catalog:
+            raise ValidationError("The item catalog is empty - seed it before generating a dataset")
+        self.rng = random.Random(seed)
+        self.costs = {
+            case_type: float(prices.get(CASE_COST_ITEM_IDS[case_type]) or FALLBACK_CASE_COSTS[case_type])
+            if case_type in CASE_COST_ITEM_IDS else float(case_type.replace("₽", "").replace(",", ""))
+            for case_type in SCAV_CASE_TYPES
+        }
+        self.types = list(CASE_TYPE_WEIGHTS)
+        self.type_weights = list(accumulate(CASE_TYPE_WEIGHTS.values()))
+
+        # per item: (tarkov_id, name, price, min stack, max stack)
+        self.drops = [
+            (entry.tarkov_id, entry.name, prices[entry.tarkov_id], *STACK_SIZES.get(entry.category, (1, 1)))
+            for entry in catalog
+        ]
+        self.pools = {case_type: self._pool(profile, catalog) for case_type, profile in CASE_PROFILES.items()}
+
+    def _pool(self, profile: CaseProfile, catalog: list[CatalogEntry]) -> tuple[list[int], list[float]]:
+        """(catalog indexes, cumulative weights) to draw a case type's drops from"""
+        by_category: dict[str, list[int]] = {}
+        for index, entry in enumerate(catalog):
+            if entry.category in profile.category_weights:
+                by_category.setdefault(entry.category, []).append(index)
+        if not by_category:
+            # none of the profile's categories in this catalog - draw from all of it
+            by_category = {"": list(range(len(catalog)))}
+
+        indexes, weights = [], []
+        for category, members in by_category.items():
+            # the category gets its share, split among its items by value
+            item_weights = [max(self.drops[i][2], 1.0) ** profile.value_bias for i in members]
+            share = profile.category_weights.get(category, 1.0) / sum(item_weights)
+            indexes.extend(members)
+            weights.extend(weight * share for weight in item_weights)
+        return indexes, list(accumulate(weights))
+
+    def cases(
+        self, count: int, user_ids: list[int], start: datetime, end: datetime
+    ) -> Iterator[tuple[dict[str, Any], list[tuple[str, str, int, float]]]]:
+        """
+        `count` (case row, [(tarkov_id, name, amount, price)]) pairs, created_at spread evenly (and in
+        order) from start to end, owned by user_ids weighted towards the first users
+        """
+        rng = self.rng
+        owner_weights = list(accumulate(1 / (rank + 1) ** USER_ACTIVITY_EXPONENT for rank in range(len(user_ids))))
+        step = (end - start) / max(count, 1)
+
+        for i in range(count):
+            case_type = self.types[bisect(self.type_weights, rng.random() * self.type_weights[-1])]
+            user_id = user_ids[bisect(owner_weights, rng.random() * owner_weights[-1])]
+            profile = CASE_PROFILES[case_type]
+            indexes, weights = self.pools[case_type]
+
+            items = []
+            _return = 0.0
+            # min + int(random() * span) rather than randint, which is several times slower
+            item_count = profile.min_items + int(rng.random() * (profile.max_items - profile.min_items + 1))
+            for index in rng.choices(indexes, cum_weights=weights, k=item_count):
+                tarkov_id, name, price, min_stack, max_stack = self.drops[index]
+                amount = min_stack if min_stack == max_stack else min_stack + int(rng.random() * (max_stack - min_stack + 1))
+                items.append((tarkov_id, name, amount, price))
+                _return += price * amount
+
+            cost = self.costs[case_type]
+            yield {
+                "user_id": user_id,
+                "type": case_type,
+                # jittered within its slot, so the timestamps still follow the ids
+                "created_at": start + step * (i + rng.random() * 0.9),
+                "cost": cost,
+                "_return": _return,
+                "profit": compute_profit(_return, cost),
+                "number_of_items": len(items),
+            }, items
+
+
+class SyntheticDatasetService(BaseService):
+    """
+    Reproducible, large benchmark datasets: N users and M scav cases with items drawn from the real
+    item catalog (see SyntheticDataset), priced from fixtures rather than tarkov.dev so it runs
+    offline. Users, cases and items go in as executemany Core inserts, a batch of cases (and their
+    items) per transaction, and the stats tables are rebuilt once at the end, as `flask stats rebuild`
+    does.
+
+    Case ids are assigned here (from max(id)) rather than read back with RETURNING, which SQLite can
+    only do a row at a time when the order matters - so run it against a database nothing else is
+    writing to.
+    """
+
+    def __init__(self, batch_size: int = 5000) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+
+    def generate(
+        self,
+        users: int,
+        cases: int,
+        *,
+        seed: int = DEFAULT_SEED,
+        prices: Optional[dict[str, float]] = None,
+        username_prefix: str = DEFAULT_USERNAME_PREFIX,
+        password: Optional[str] = None,
+        end: Optional[datetime] = None,
+        days: int = 365,
+        rebuild_stats: bool = True,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> SyntheticDatasetResult:
+        """
+        Add `cases` generated cases, owned by the users `<username_prefix>000001`... (created if they
+        don't exist, with `password` or else an unusable random one), spread over the `days` before
+        `end` (default: midnight today, UTC). `prices` ({tarkov_id: price}) override the synthetic
+        fixture prices. `progress` is called with the running case count after every batch.
+        """
+        if users < 1 or cases < 0:
+            raise ValidationError("Need at least one user and a non-negative number of cases")
+        if len(username_prefix) + 6 > User.username.type.length:
+            raise ValidationError(f"Username prefix {username_prefix!r} is too long")
+
+        started = time.perf_counter()
+        catalog = [
+            CatalogEntry(*row) for row in self.db.session.execute(
+                select(TarkovItem.tarkov_id, TarkovItem.name, TarkovItem.category)
+                .where(TarkovItem.removed_at.is_(None))
+                .order_by(TarkovItem.tarkov_id)
+            )
+        ]
+        prices = {entry.tarkov_id: fixture_price(entry) for entry in catalog} | (prices or {})
+        dataset = SyntheticDataset(catalog, prices, seed)
+
+        result = SyntheticDatasetResult(users=users)
+        try:
+            user_ids, result.users_created = self._ensure_users(users, username_prefix, password)
+            self.db.session.commit()
+
+            end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            generated = dataset.cases(cases, user_ids, end - timedelta(days=days), end)
+            while True:
+                batch = [case for _, case in zip(range(self.batch_size), generated)]
+                if not batch:
+                    break
+                self._insert_batch(batch, result)
+                self.db.session.commit()
+                if progress is not None:
+                    progress(result.cases)
+
+            if self.db.engine.dialect.name == "postgresql":
+                # the case ids didn't come from the sequence, move it past them
+                self.db.session.execute(text(
+                    "SELECT setval(pg_get_serial_sequence('scav_case', 'id'), (SELECT max(id) FROM scav_case))"
+                ))
+            # the bulk inserts bypass the ORM, so do what the per-case write path does
+            bump_data_version(self.db.session.connection())
+            case_events.publish_on_commit(self.db.session(), "resync", {"imported": result.cases})
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+        if rebuild_stats and result.cases:
+            UserStatsService().rebuild()
+            ProfitDistributionService().rebuild()
+            ItemStatsService().rebuild()
+            AchievementService().rebuild()
+
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _ensure_users(self, count: int, prefix: str, password: Optional[str]) -> tuple[list[int], int]:
+        """Ids of the benchmark users, in order, creating any that don't exist yet"""
+        usernames = [f"{prefix}{n:06d}" for n in range(1, count + 1)]
+        users_table = User.__table__
+        existing = dict(self.db.session.execute(
+            select(users_table.c.username, users_table.c.id).where(users_table.c.username.startswith(prefix, autoescape=True))
+        ).all())
+
+        missing = [username for username in usernames if username not in existing]
+        if missing:
+            # one hash for all of them, bcrypt is deliberately slow
+            hashed = bcrypt.generate_password_hash(password or secrets.token_hex(16)).decode("utf-8")
+            ids = self.db.session.execute(
+                insert(users_table).returning(users_table.c.id, sort_by_parameter_order=True),
+                [{"username": username, "password": hashed, "image_file": "default.jpg"} for username in missing],
+            ).scalars().all()
+            existing.update(zip(missing, ids))
+
+            # what registration does for each new user (see models.add_default_items)
+            tracked = self.db.session.execute(
+                select(TarkovItem.id).where(TarkovItem.name.in_(DEFAULT_TRACKED_ITEMS))
+            ).scalars().all()
+            if tracked:
+                self.db.session.execute(insert(user_tracked_items), [
+                    {"user_id": user_id, "item_id": item_id} for user_id in ids for item_id in tracked
+                ])
+
+        return [existing[username] for username in usernames], len(missing)
+
+    def _insert_batch(self, batch: list[tuple[dict[str, Any], list[tuple]]], result: SyntheticDatasetResult) -> None:
+        cases_table = ScavCase.__table__
+        first_id = (self.db.session.execute(select(func.max(cases_table.c.id))).scalar() or 0) + 1
+        for case_id, (case, _) in enumerate(batch, start=first_id):
+            case["id"] = case_id
+        self.db.session.execute(insert(cases_table), [case for case, _ in batch])
+
+        item_rows = [
+            {"tarkov_id": tarkov_id, "name": name, "amount": amount, "price": price, "scav_case_id": case["id"]}
+            for case, items in batch
+            for tarkov_id, name, amount, price in items
+        ]
+        if item_rows:
+            self.db.session.execute(insert(ScavCaseItem.__table__), item_rows)
+
+        result.cases += len(batch)
+        result.items += len(item_rows)
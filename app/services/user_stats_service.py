@@ -0,0 +1,403 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, case, cast, delete, func, insert, literal, select, update
+
+from app.constants import LEADERBOARD_METRICS
+from app.models import ScavCase, ScavCaseItem, User, UserDailyStats, UserStats
+from app.services import BaseService
+
+
+class UserStatsService(BaseService):
+    """
+    Keeps the user_stats table (all-time) and the user_daily_stats rollups (one bucket per user per
+    UTC day) in step with scav case writes, and serves the leaderboards from them.
+
+    The record_* hooks run inside the caller's transaction (they never commit), so the stats rows
+    are updated atomically with the case itself. Counts and sums are applied as SQL-side deltas,
+    so concurrent submissions for the same user can't lose an update.
+    """
+
+    def record_case_created(self, scav_case: ScavCase, max_item_price: float = 0.0) -> None:
+        """Fold a newly inserted case into its owner's stats"""
+        self._apply_delta(
+            scav_case.user_id,
+            case_delta=1,
+            profit_delta=scav_case.profit,
+            max_item_price=max_item_price,
+            last_case_at=scav_case.created_at,
+        )
+        self._apply_daily_delta(
+            scav_case.user_id,
+            scav_case.created_at.date(),
+            case_delta=1,
+            profit_delta=scav_case.profit,
+            max_item_price=max_item_price,
+        )
+
+    def record_case_updated(
+        self, scav_case: ScavCase, old_profit: float, max_item_price: float = 0.0, items_removed: bool = False,
+    ) -> None:
+        """Apply the profit change of an edited (flushed) case. Removed items may lower the user's best item."""
+        day = scav_case.created_at.date()
+        profit_delta = scav_case.profit - old_profit
+        self._apply_delta(scav_case.user_id, profit_delta=profit_delta, max_item_price=max_item_price)
+        self._apply_daily_delta(scav_case.user_id, day, profit_delta=profit_delta, max_item_price=max_item_price)
+        if items_removed:
+            self._refresh_extrema(scav_case.user_id)
+            self._refresh_daily_max(scav_case.user_id, day)
+
+    def record_case_deleted(self, user_id: int, profit: float, created_at: datetime) -> None:
+        """Remove a (flushed) deleted case from its owner's stats"""
+        self._apply_delta(user_id, case_delta=-1, profit_delta=-profit)
+        self._apply_daily_delta(user_id, created_at.date(), case_delta=-1, profit_delta=-profit)
+        # the deleted case may have held the user's best item / latest timestamp
+        self._refresh_extrema(user_id)
+        self._refresh_daily_max(user_id, created_at.date())
+
+    def rebuild(self) -> int:
+        """Recompute every user's stats and daily rollups from scratch, set-based. Returns the user count."""
+        try:
+            self._rebuild_rows()
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+        return self.db.session.query(func.count(UserStats.user_id)).scalar()
+
+    def rebuild_users(self, user_ids: Iterable[int]) -> None:
+        """Recompute stats and daily rollups for just these users, inside the caller's transaction (no commit)"""
+        user_ids = list(user_ids)
+        if user_ids:
+            self._rebuild_rows(user_ids)
+
+    def _rebuild_rows(self, user_ids: Optional[list[int]] = None) -> None:
+        stats_delete = delete(UserStats)
+        daily_delete = delete(UserDailyStats)
+        if user_ids is not None:
+            stats_delete = stats_delete.where(UserStats.user_id.in_(user_ids))
+            daily_delete = daily_delete.where(UserDailyStats.user_id.in_(user_ids))
+
+        self.db.session.execute(stats_delete)
+        self.db.session.execute(
+            insert(UserStats).from_select(
+                ["user_id", "total_profit", "case_count", "avg_profit", "most_expensive_item", "last_case_at"],
+                self._aggregate_select(user_ids=user_ids),
+            )
+        )
+        self.db.session.execute(daily_delete)
+        self.db.session.execute(
+            insert(UserDailyStats).from_select(
+                ["user_id", "day", "case_count", "total_profit", "most_expensive_item"],
+                self._daily_aggregate_select(user_ids=user_ids),
+            )
+        )
+
+    def get_leaderboard(
+        self, metric: str, page: int = 1, per_page: int = 25,
+        since: Optional[date] = None, until: Optional[date] = None, search: Optional[str] = None,
+    ):
+        """
+        Page of users ordered by a leaderboard metric.
+        - all-time: an indexed ORDER BY ... LIMIT on user_stats
+        - windowed [since, until): sums only the daily rollup buckets inside the window
+        - search: only usernames containing it, each row carrying its overall `rank`
+        """
+        if since is not None or until is not None:
+            return self._get_windowed_leaderboard(metric, page, per_page, since, until, search)
+
+        column = getattr(UserStats, LEADERBOARD_METRICS[metric]["column"])
+        query = (
+            self.db.session.query(
+                User.id.label("user_id"),
+                User.username.label("username"),
+                User.image_file.label("image_file"),
+                UserStats.total_profit,
+                UserStats.case_count,
+                UserStats.avg_profit,
+                UserStats.most_expensive_item,
+            )
+            .join(User, User.id == UserStats.user_id)
+            .filter(UserStats.case_count > 0)
+            .order_by(column.desc(), UserStats.user_id.desc())
+        )
+        if search:
+            query = self._search_ranked(query, (column.desc(), UserStats.user_id.desc()), search)
+        return query.paginate(page=page, per_page=per_page, error_out=False)
+
+    def _get_windowed_leaderboard(
+        self, metric: str, page: int, per_page: int, since: Optional[date], until: Optional[date],
+        search: Optional[str] = None,
+    ):
+        case_count = func.sum(UserDailyStats.case_count)
+        total_profit = func.sum(UserDailyStats.total_profit)
+        buckets = (
+            select(
+                UserDailyStats.user_id.label("user_id"),
+                total_profit.label("total_profit"),
+                case_count.label("case_count"),
+                (total_profit / case_count).label("avg_profit"),
+                func.max(UserDailyStats.most_expensive_item).label("most_expensive_item"),
+            )
+            .group_by(UserDailyStats.user_id)
+            .having(case_count > 0)
+        )
+        if since is not None:
+            buckets = buckets.where(UserDailyStats.day >= since)
+        if until is not None:
+            buckets = buckets.where(UserDailyStats.day < until)
+        buckets = buckets.subquery()
+
+        column = buckets.c[LEADERBOARD_METRICS[metric]["column"]]
+        query = (
+            self.db.session.query(
+                User.id.label("user_id"),
+                User.username.label("username"),
+                User.image_file.label("image_file"),
+                buckets.c.total_profit,
+                buckets.c.case_count,
+                buckets.c.avg_profit,
+                buckets.c.most_expensive_item,
+            )
+            .join(User, User.id == buckets.c.user_id)
+            .order_by(column.desc(), buckets.c.user_id.desc())
+        )
+        if search:
+            query = self._search_ranked(query, (column.desc(), buckets.c.user_id.desc()), search)
+        return query.paginate(page=page, per_page=per_page, error_out=False)
+
+    def _search_ranked(self, query, order_by: tuple, search: str):
+        """
+        The users of a leaderboard query whose username contains `search`. Ranks are numbered over
+        the whole leaderboard first, so a match on page 40 still shows its real position.
+        """
+        ranked = (
+            query.add_columns(func.row_number().over(order_by=order_by).label("rank"))
+            .order_by(None)
+            .subquery()
+        )
+        return (
+            self.db.session.query(ranked)
+            .filter(ranked.c.username.ilike(f"%{search.strip()}%"))
+            .order_by(ranked.c.rank)
+        )
+
+    def _apply_delta(
+        self,
+        user_id: int,
+        case_delta: int = 0,
+        profit_delta: float = 0.0,
+        max_item_price: float = 0.0,
+        last_case_at: Optional[datetime] = None,
+    ) -> None:
+        new_count = UserStats.case_count + case_delta
+        new_total = UserStats.total_profit + profit_delta
+        values = {
+            "case_count": new_count,
+            "total_profit": new_total,
+            "avg_profit": case((new_count > 0, new_total / new_count), else_=0.0),
+        }
+        if max_item_price:
+            values["most_expensive_item"] = case(
+                (UserStats.most_expensive_item < max_item_price, max_item_price),
+                else_=UserStats.most_expensive_item,
+            )
+        if last_case_at is not None:
+            values["last_case_at"] = case(
+                (UserStats.last_case_at.is_(None), last_case_at),
+                (UserStats.last_case_at < last_case_at, last_case_at),
+                else_=UserStats.last_case_at,
+            )
+
+        result = self.db.session.execute(
+            update(UserStats).where(UserStats.user_id == user_id).values(**values)
+        )
+        if result.rowcount == 0:
+            # no stats row yet (first case, or written before user_stats existed) - build it from scratch
+            self._recompute_user(user_id)
+
+    def _apply_daily_delta(
+        self, user_id: int, day: date, case_delta: int = 0, profit_delta: float = 0.0, max_item_price: float = 0.0,
+    ) -> None:
+        values = {
+            "case_count": UserDailyStats.case_count + case_delta,
+            "total_profit": UserDailyStats.total_profit + profit_delta,
+        }
+        if max_item_price:
+            values["most_expensive_item"] = case(
+                (UserDailyStats.most_expensive_item < max_item_price, max_item_price),
+                else_=UserDailyStats.most_expensive_item,
+            )
+
+        result = self.db.session.execute(
+            update(UserDailyStats)
+            .where(UserDailyStats.user_id == user_id, UserDailyStats.day == day)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            self._recompute_user_day(user_id, day)
+
+    def _refresh_daily_max(self, user_id: int, day: date) -> None:
+        start, end = self._day_bounds(day)
+        most_expensive_item = (
+            select(func.coalesce(func.max(ScavCaseItem.price), 0.0))
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .where(ScavCase.user_id == user_id, ScavCase.created_at >= start, ScavCase.created_at < end)
+            .scalar_subquery()
+        )
+        self.db.session.execute(
+            update(UserDailyStats)
+            .where(UserDailyStats.user_id == user_id, UserDailyStats.day == day)
+            .values(most_expensive_item=most_expensive_item)
+        )
+
+    def _recompute_user_day(self, user_id: int, day: date) -> None:
+        start, end = self._day_bounds(day)
+        in_day = (ScavCase.user_id == user_id, ScavCase.created_at >= start, ScavCase.created_at < end)
+        most_expensive_item = (
+            select(func.coalesce(func.max(ScavCaseItem.price), 0.0))
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .where(*in_day)
+            .scalar_subquery()
+        )
+        bucket = (
+            select(
+                ScavCase.user_id,
+                literal(day, Date),
+                func.count(ScavCase.id),
+                func.sum(ScavCase.profit),
+                most_expensive_item,
+            )
+            .where(*in_day)
+            .group_by(ScavCase.user_id)
+        )
+
+        self.db.session.execute(
+            delete(UserDailyStats).where(UserDailyStats.user_id == user_id, UserDailyStats.day == day)
+        )
+        self.db.session.execute(
+            insert(UserDailyStats).from_select(
+                ["user_id", "day", "case_count", "total_profit", "most_expensive_item"], bucket,
+            )
+        )
+
+    @staticmethod
+    def _day_bounds(day: date) -> tuple[datetime, datetime]:
+        start = datetime.combine(day, time.min)
+        return start, start + timedelta(days=1)
+
+    def _day_expr(self, column):
+        """Truncate a datetime column to its date - sqlite has no real DATE type, so use date()"""
+        if self.db.session.get_bind().dialect.name == "sqlite":
+            return func.date(column)
+        return cast(column, Date)
+
+    def _refresh_extrema(self, user_id: int) -> None:
+        """Re-derive the values that can't be maintained as deltas (max item price, latest case)"""
+        most_expensive_item = (
+            select(func.coalesce(func.max(ScavCaseItem.price), 0.0))
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .where(ScavCase.user_id == user_id)
+            .scalar_subquery()
+        )
+        last_case_at = (
+            select(func.max(ScavCase.created_at))
+            .where(ScavCase.user_id == user_id)
+            .scalar_subquery()
+        )
+        self.db.session.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(most_expensive_item=most_expensive_item, last_case_at=last_case_at)
+        )
+
+    def _recompute_user(self, user_id: int) -> None:
+        self.db.session.execute(delete(UserStats).where(UserStats.user_id == user_id))
+        self.db.session.execute(
+            insert(UserStats).from_select(
+                ["user_id", "total_profit", "case_count", "avg_profit", "most_expensive_item", "last_case_at"],
+                self._aggregate_select(user_ids=[user_id]),
+            )
+        )
+
+    def _aggregate_select(self, user_ids: Optional[list[int]] = None):
+        """SELECT producing user_stats rows from scav_case / scav_case_item, optionally for some users"""
+        cases_q = select(
+            ScavCase.user_id.label("user_id"),
+            func.sum(ScavCase.profit).label("total_profit"),
+            func.count(ScavCase.id).label("case_count"),
+            func.max(ScavCase.created_at).label("last_case_at"),
+        ).group_by(ScavCase.user_id)
+
+        items_q = (
+            select(
+                ScavCase.user_id.label("user_id"),
+                func.max(ScavCaseItem.price).label("most_expensive_item"),
+            )
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .group_by(ScavCase.user_id)
+        )
+
+        if user_ids is not None:
+            cases_q = cases_q.where(ScavCase.user_id.in_(user_ids))
+            items_q = items_q.where(ScavCase.user_id.in_(user_ids))
+
+        cases_sq = cases_q.subquery()
+        items_sq = items_q.subquery()
+
+        return (
+            select(
+                cases_sq.c.user_id,
+                cases_sq.c.total_profit,
+                cases_sq.c.case_count,
+                (cases_sq.c.total_profit / cases_sq.c.case_count).label("avg_profit"),
+                func.coalesce(items_sq.c.most_expensive_item, 0.0).label("most_expensive_item"),
+                cases_sq.c.last_case_at,
+            )
+            .outerjoin(items_sq, items_sq.c.user_id == cases_sq.c.user_id)
+        )
+
+    def _daily_aggregate_select(self, user_ids: Optional[list[int]] = None):
+        """SELECT producing user_daily_stats rows (one per user per day) from scav_case / scav_case_item"""
+        case_day = self._day_expr(ScavCase.created_at)
+
+        cases_q = (
+            select(
+                ScavCase.user_id.label("user_id"),
+                case_day.label("day"),
+                func.count(ScavCase.id).label("case_count"),
+                func.sum(ScavCase.profit).label("total_profit"),
+            )
+            .group_by(ScavCase.user_id, case_day)
+        )
+        items_q = (
+            select(
+                ScavCase.user_id.label("user_id"),
+                case_day.label("day"),
+                func.max(ScavCaseItem.price).label("most_expensive_item"),
+            )
+            .join(ScavCase, ScavCase.id == ScavCaseItem.scav_case_id)
+            .group_by(ScavCase.user_id, case_day)
+        )
+
+        if user_ids is not None:
+            cases_q = cases_q.where(ScavCase.user_id.in_(user_ids))
+            items_q = items_q.where(ScavCase.user_id.in_(user_ids))
+
+        cases_sq = cases_q.subquery()
+        items_sq = items_q.subquery()
+
+        return (
+            select(
+                cases_sq.c.user_id,
+                cases_sq.c.day,
+                cases_sq.c.case_count,
+                cases_sq.c.total_profit,
+                func.coalesce(items_sq.c.most_expensive_item, 0.0),
+            )
+            .outerjoin(
+                items_sq,
+                (items_sq.c.user_id == cases_sq.c.user_id) & (items_sq.c.day == cases_sq.c.day),
+            )
+        )
@@ -0,0 +1,139 @@
+// Client side item typeahead for the create / edit case pages.
+//
+// The whole item catalog is fetched once (a content-hashed, gzipped JSON file the browser caches
+// until the catalog changes) and searched locally, so typing doesn't hit the server at all.
+//
+// Usage: <input data-catalog-index="{{ catalog_index_url() }}" data-catalog-results="#item-list"
+//               data-catalog-select="addItemToSelected">
+// The select callback gets (tarkovId, name, quantity, imageUrl).
+
+(function () {
+    const MAX_RESULTS = 15;
+    const catalogs = {};
+
+    // must match normalize_tokens() in app/services/catalog_index_service.py
+    function normalize(text) {
+        return text
+            .toLowerCase()
+            .normalize("NFKD")
+            .replace(/\p{M}/gu, "")
+            .split(/[^\p{L}\p{N}]+/u)
+            .filter(Boolean);
+    }
+
+    function loadCatalog(url) {
+        if (!catalogs[url]) {
+            catalogs[url] = fetch(url)
+                .then(response => {
+                    if (!response.ok) throw new Error(`catalog index: HTTP ${response.status}`);
+                    return response.json();
+                })
+                .then(index => {
+                    const field = name => index.fields.indexOf(name);
+                    const [id, name, category, tokens, image] = ["id", "name", "category", "tokens", "image"].map(field);
+                    return index.items.map(row => ({
+                        id: row[id],
+                        name: row[name],
+                        category: row[category] === null ? null : index.categories[row[category]],
+                        tokens: row[tokens].split(" "),
+                        imageUrl: `${index.image_base}${row[image] || row[id]}.webp`,
+                    }));
+                })
+                .catch(error => {
+                    delete catalogs[url];  // try again on the next keystroke
+                    throw error;
+                });
+        }
+        return catalogs[url];
+    }
+
+    // every query word has to match the start of (or failing that, appear in) one of the item's words
+    function score(item, words) {
+        let total = 0;
+        for (const word of words) {
+            let best = 0;
+            for (const token of item.tokens) {
+                if (token === word) { best = 3; break; }
+                if (token.startsWith(word)) best = Math.max(best, 2);
+                else if (best === 0 && token.includes(word)) best = 1;
+            }
+            if (!best) return 0;
+            total += best;
+        }
+        // nudge items whose name starts with the first word typed
+        return item.tokens[0].startsWith(words[0]) ? total + 1 : total;
+    }
+
+    function search(items, query) {
+        const words = normalize(query);
+        if (!words.length) return [];
+
+        const matches = [];
+        for (const item of items) {
+            const s = score(item, words);
+            if (s) matches.push([s, item]);
+        }
+        matches.sort((a, b) => b[0] - a[0] || a[1].name.length - b[1].name.length || a[1].name.localeCompare(b[1].name));
+        return matches.slice(0, MAX_RESULTS).map(([, item]) => item);
+    }
+
+    function renderResult(item, onSelect) {
+        const li = document.createElement("li");
+        li.className = "list-group-item d-flex align-items-center";
+        li.style.cursor = "pointer";
+        li.addEventListener("click", () => onSelect(item.id, item.name, 1, item.imageUrl));
+
+        const left = document.createElement("div");
+        left.className = "d-flex align-items-center flex-grow-1 mr-3 overflow-hidden";
+
+        const img = document.createElement("img");
+        img.src = item.imageUrl;
+        img.alt = item.name;
+        img.loading = "lazy";
+        img.className = "mr-3 flex-shrink-0";
+        img.style.cssText = "width: 56px; height: 56px; object-fit: contain;";
+
+        const text = document.createElement("div");
+        text.className = "d-flex flex-column overflow-hidden";
+        const name = document.createElement("span");
+        name.className = "font-weight-bold text-truncate";
+        name.textContent = item.name;
+        const hint = document.createElement("span");
+        hint.className = "small text-muted";
+        hint.textContent = "Click to add (quantity 1)";
+        text.append(name, hint);
+        left.append(img, text);
+
+        const right = document.createElement("div");
+        right.className = "flex-shrink-0";
+        right.innerHTML = '<span class="badge badge-pill badge-danger px-3">Add</span>';
+
+        li.append(left, right);
+        return li;
+    }
+
+    function attach(input) {
+        const results = document.querySelector(input.dataset.catalogResults);
+        const onSelect = (...args) => window[input.dataset.catalogSelect](...args);
+        if (!results) return;
+
+        // start the (usually cached) download as soon as the user heads for the box
+        input.addEventListener("focus", () => loadCatalog(input.dataset.catalogIndex).catch(() => {}), { once: true });
+
+        input.addEventListener("input", () => {
+            const query = input.value;
+            loadCatalog(input.dataset.catalogIndex)
+                .then(items => {
+                    if (input.value !== query) return;  // a newer keystroke will render instead
+                    const list = document.createElement("ul");
+                    list.className = "list-group";
+                    list.id = "item-search-results";
+                    search(items, query).forEach(item => list.appendChild(renderResult(item, onSelect)));
+                    results.replaceChildren(list);
+                })
+                .catch(error => console.error(error));
+        });
+    }
+
+    document.querySelectorAll("input[data-catalog-index]").forEach(attach);
+})();
@@ -73,14 +73,14 @@ def account():
 def cases(user_id: int):
     user = user_service.get_user_by_id_or_404(user_id)
 
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     sort_by = request.args.get("sort_by", "created_at")
     sort_order = request.args.get("sort_order", "desc")
     case_type = request.args.get("case_type", "all")
 
-    pagination = scav_case_service.get_all_cases_by_user_paginated(
+    pagination = scav_case_service.get_all_cases_by_user_keyset(
         user=user,
-        page=page,
+        cursor=cursor,
         sort_by=sort_by,
         sort_order=sort_order,
         case_type=case_type,
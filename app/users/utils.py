@@ -2,10 +2,11 @@ import os
 import secrets
 
 from flask import current_app
-from PIL import Image
 
 
 def save_profile_picture(form_picture):
+    from PIL import Image
+
     random_hex = secrets.token_hex(8)
     _, f_ext = os.path.splitext(form_picture.filename)
     picture_fn = random_hex + f_ext
@@ -0,0 +1,71 @@
+"""
+Benchmark worker boot time: how long a fresh interpreter takes to import the app and run create_app,
+and which of the heavy optional dependencies got loaded on the way (none should be, they're imported
+on first use).
+
+    python benchmark_startup.py                    # workers as production boots them (no DB init)
+    python benchmark_startup.py --init-database    # with the per-process schema/seed step, for comparison
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# only needed by OCR, the discord bot, market lookups and the case simulator
+HEAVY_MODULES = ("discord", "aiohttp", "numpy", "pytesseract", "PIL", "rapidfuzz", "requests", "cloudinary")
+
+# run in each child - a fresh interpreter, so nothing is already imported
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure(init_database: bool) -> dict:
+    env = dict(os.environ, INIT_DATABASE_ON_STARTUP="true" if init_database else "false")
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD % (HEAVY_MODULES,)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # the app may print warnings first, the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure app import + create_app time in fresh processes")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes to time (default 10)")
+    parser.add_argument("--init-database", action="store_true", help="Also run the schema/seed step at boot")
+    args = parser.parse_args()
+
+    # the first boot writes .pyc files, don't count it
+    measure(args.init_database)
+    runs = [measure(args.init_database) for _ in range(args.runs)]
+
+    for phase in ("import", "create_app"):
+        times = [run[phase] * 1000 for run in runs]
+        print(f"{phase:>10}: median {statistics.median(times):7.1f}ms  min {min(times):7.1f}ms  max {max(times):7.1f}ms")
+    totals = [(run["import"] + run["create_app"]) * 1000 for run in runs]
+    print(f"{'total':>10}: median {statistics.median(totals):7.1f}ms")
+
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+    print(f"heavy modules loaded at boot: {', '.join(heavy) if heavy else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Incremental item catalog syncs, shared by the app (CatalogSyncService, `flask setup database`) and
+fetch_new_items.py. It only needs SQLAlchemy - importing the app package would run its config checks,
+which the script has no use for.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import bindparam, column, insert, select, table, update
+
+# tarkov ids per IN (...) when soft deleting
+_CHUNK = 500
+
+# name of the catalog's data_version row (app.models.CATALOG_DATA_VERSION)
+CATALOG_DATA_VERSION = "catalog"
+
+# the columns of the app's tables that a sync touches (app.models.TarkovItem / DataVersion)
+tarkov_item = table(
+    "tarkov_item", column("tarkov_id"), column("name"), column("category"), column("fingerprint"), column("removed_at")
+)
+data_version = table("data_version", column("name"), column("version"), column("updated_at"))
+
+CATEGORY_MAPPING = {
+    "Headphones": "Headsets",
+    "Headwear": "Helmets",
+    "Map": "Barter Items",
+    "Face Cover": "Helmets",
+    "Vis. observ. device": "Face Cover",
+    "Armor": "Armors",
+    "Armored equipment": "Armors",
+    "Armor Plate": "Armors",
+    "Chest rig": "Rigs",
+    "Backpack": "Backpacks",
+    "Assault rifle": "Guns",
+    "Handgun": "Guns",
+    "Shotgun": "Guns",
+    "Sniper rifle": "Guns",
+    "Magazine": "Mods",
+    "SMG": "Guns",
+    "Assault carbine": "Guns",
+    "Marksman rifle": "Guns",
+    "Machinegun": "Guns",
+    "Revolver": "Guns",
+    "Grenade launcher": "Guns",
+    "Flashhider": "Mods",
+    "Assault scope": "Mods",
+    "Reflex sight": "Mods",
+    "Foregrip": "Mods",
+    "Receiver": "Mods",
+    "Charging handle": "Mods",
+    "Handguard": "Mods",
+    "Mount": "Mods",
+    "Stock": "Mods",
+    "Ironsight": "Mods",
+    "Auxiliary Mod": "Mods",
+    "Scope": "Mods",
+    "Bipod": "Mods",
+    "Gas block": "Mods",
+    "Night Vision": "Mods",
+    "Compact reflex sight": "Mods",
+    "Special scope": "Mods",
+    "Thermal Vision": "Mods",
+    "UBGL": "Mods",
+    "Comb. muzzle device": "Mods",
+    "Comb. tact. device": "Mods",
+    "Knife": "Guns",
+    "Barrel": "Mods",
+    "Pistol grip": "Mods",
+    "Silencer": "Suppressors",
+    "Throwable weapon": "Grenades",
+    "Ammo container": "Ammo",
+    "Port. container": "Containers",
+    "Locking container": "Containers",
+    "Common container": "Containers",
+    "Random Loot Container": "Containers",
+    "Money": "Barter Items",
+    "Battery": "Barter Items",
+    "Electronics": "Barter Items",
+    "Lubricant": "Barter Items",
+    "Jewelry": "Barter Items",
+    "Other": "Barter Items",
+    "Building material": "Barter Items",
+    "Stimulant": "Medical",
+    "Tool": "Barter Items",
+    "Fuel": "Barter Items",
+    "Flashlight": "Mods",
+    "Household goods": "Barter Items",
+    "Flyer": "Barter Items",
+    "Multitools": "Barter Items",
+    "Compass": "Barter Items",
+    "Info": "Barter Items",
+    "Repair Kits": "Barter Items",
+    "Special item": "Barter Items",
+    "Arm Band": "Barter Items",
+    "Spring Driven Cylinder": "Mods",
+    "Cylinder Magazine": "Mods",
+    "Portable Range Finder": "Barter Items",
+    "Radio Transmitter": "Barter Items",
+    "Cultist Amulet": "Barter Items",
+    "Mark of the Unheard": "Barter Items",
+    "Planting Kits": "Barter Items",
+    "Mechanical Key": "Keys",
+    "Keycard": "Keys",
+    "Drink": "Provisions",
+    "Food": "Provisions",
+    "Medical item": "Medical",
+    "Drug": "Medical",
+    "Medikit": "Medical",
+    "Medical supplies": "Medical",
+    "Ammo": "Ammo",
+    "Ammo packs": "Ammo",
+}
+
+
+class CatalogItem(NamedTuple):
+    tarkov_id: str
+    name: str
+    category: str  # the broad category (CATEGORY_MAPPING), not tarkov.dev's
+    image_link: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        # only what's stored - the image link isn't, and the items file `flask setup database` seeds from has none
+        return hashlib.sha1(f"{self.name}\x1f{self.category}".encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_api(cls, row: dict[str, Any]) -> "CatalogItem":
+        """From a tarkov.dev items row ({id, name, image512pxLink, category {name}})"""
+        category = row.get("category")
+        category = category.get("name") if isinstance(category, dict) else category
+        return cls(row["id"], row["name"], CATEGORY_MAPPING.get(category, "Unknown"), row.get("image512pxLink"))
+
+
+@dataclass
+class CatalogSyncResult:
+    inserted: list[CatalogItem] = field(default_factory=list)
+    updated: list[CatalogItem] = field(default_factory=list)  # changed, or back in the catalog after a removal
+    removed: list[str] = field(default_factory=list)  # tarkov ids soft deleted
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.removed)
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "inserted": len(self.inserted),
+            "updated": len(self.updated),
+            "removed": len(self.removed),
+            "unchanged": self.unchanged,
+        }
+
+
+def sync_catalog(
+    connection, items: Iterable[CatalogItem], remove_missing: bool = True, dry_run: bool = False
+) -> CatalogSyncResult:
+    """
+    Bring tarkov_item in line with a catalog feed on an open SQLAlchemy connection (inside the
+    caller's transaction). Items are compared by fingerprint, so only inserts, real changes and
+    (with remove_missing, for a full feed) soft deletes of items no longer in it are written.
+    Anything written bumps the catalog data version, which is what catalog_cached caches watch.
+    """
+    local = {
+        tarkov_id: (fingerprint, removed_at)
+        for tarkov_id, fingerprint, removed_at in connection.execute(
+            select(tarkov_item.c.tarkov_id, tarkov_item.c.fingerprint, tarkov_item.c.removed_at)
+        )
+    }
+
+    result = CatalogSyncResult()
+    seen = set()
+    for item in items:
+        if item.tarkov_id in seen:
+            continue
+        seen.add(item.tarkov_id)
+        if item.tarkov_id not in local:
+            result.inserted.append(item)
+        elif local[item.tarkov_id] != (item.fingerprint, None):
+            result.updated.append(item)
+        else:
+            result.unchanged += 1
+    if remove_missing:
+        result.removed = sorted(
+            tarkov_id for tarkov_id, (_, removed_at) in local.items() if tarkov_id not in seen and removed_at is None
+        )
+
+    if dry_run or not result.changed:
+        return result
+
+    if result.inserted:
+        connection.execute(insert(tarkov_item), [
+            {"tarkov_id": item.tarkov_id, "name": item.name, "category": item.category, "fingerprint": item.fingerprint}
+            for item in result.inserted
+        ])
+    if result.updated:
+        connection.execute(
+            update(tarkov_item)
+            .where(tarkov_item.c.tarkov_id == bindparam("b_tarkov_id"))
+            .values(name=bindparam("b_name"), category=bindparam("b_category"),
+                    fingerprint=bindparam("b_fingerprint"), removed_at=None),
+            [
+                {"b_tarkov_id": item.tarkov_id, "b_name": item.name, "b_category": item.category,
+                 "b_fingerprint": item.fingerprint}
+                for item in result.updated
+            ],
+        )
+    now = datetime.utcnow()
+    for start in range(0, len(result.removed), _CHUNK):
+        connection.execute(
+            update(tarkov_item).where(tarkov_item.c.tarkov_id.in_(result.removed[start:start + _CHUNK])).values(removed_at=now)
+        )
+
+    # Core writes skip the ORM flush hook that normally does this (app.models.bump_data_version)
+    bumped = connection.execute(
+        update(data_version)
+        .where(data_version.c.name == CATALOG_DATA_VERSION)
+        .values(version=data_version.c.version + 1, updated_at=now)
+    )
+    if bumped.rowcount == 0:
+        connection.execute(insert(data_version).values(name=CATALOG_DATA_VERSION, version=1, updated_at=now))
+    return result
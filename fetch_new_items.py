@@ -6,9 +6,11 @@ It also downloads item images and uploads them to Cloudinary.
 
 Features:
 - Fetches new items from the Tarkov API
-- Adds missing items to the SQLite database
-- Downloads item images
-- Uploads images to Cloudinary
+- Syncs the SQLite database with the full catalog incrementally (catalog_sync.py, shared with the app) -
+  new items are added, renamed / recategorised ones updated and ones no longer in the catalog
+  marked removed, in one transaction, and only when something changed
+- Downloads item images and uploads them to Cloudinary, concurrently, with retries. A manifest
+  of content hashes (--manifest) skips images already on the CDN and resumes interrupted runs
 - Supports a "dry-run" mode for testing
 - Can be run manually or scheduled as a cron job
 
@@ -19,6 +21,9 @@ Usage:
 2. Run in dry-run mode (no database modifications):
     python update_items.py --db-file /path/to/scav-case.db --dry-run
 
+   Or upload images to a local directory instead of Cloudinary:
+    python update_items.py --db-file /path/to/scav-case.db --upload-dir /tmp/item-images
+
 3. Schedule in cron (every 4 days at 3 AM):
     0 3 */4 * * /usr/bin/python3 /path/to/update_items.py --db-file /path/to/scav-case.db >> /var/log/scav_case_update.log 2>&1
     Note: This script has not been tested with a cron job - you may consider implementing a lockfile to ensure that the database doesn't corrupt!
@@ -26,24 +31,25 @@ Usage:
 """
 
 import argparse
+import hashlib
+import io
+import json
 import logging
 import os
-import sqlite3
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
-import cloudinary
-import cloudinary.uploader
 from dotenv import load_dotenv
+from sqlalchemy import create_engine
 
-from app.constants import CATEGORY_MAPPING
+from catalog_sync import CatalogItem, sync_catalog
 
 load_dotenv()
 
-logging.basicConfig(
-    filename="/var/log/scav_case_update_items.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+DEFAULT_MANIFEST_FILE = os.getenv("ITEM_IMAGE_MANIFEST", "item_images_manifest.json")
 
 
 def generate_item_price_query() -> str:
@@ -53,75 +59,177 @@ def generate_item_price_query() -> str:
     }"""
 
 
-def get_local_db_item_ids(db_file: str) -> list:
-    """Retrieve existing item IDs from the database."""
+def connect(db_file: str):
+    """SQLAlchemy engine for the database file."""
     if not os.path.isfile(db_file):
         logging.error(f"[!] Database file '{db_file}' does not exist.")
         raise FileNotFoundError(f"Database file '{db_file}' not found.")
 
-    with sqlite3.connect(db_file) as connection:
-        cursor = connection.cursor()
-        query_response = cursor.execute("SELECT tarkov_id FROM tarkov_item;")
-        rows_ids = query_response.fetchall()
-        return [row[0] for row in rows_ids]  # Convert from tuple (id,) to list of IDs
+    return create_engine(f"sqlite:///{os.path.abspath(db_file)}", connect_args={"timeout": 5})  # Wait up to 5s if DB is locked
 
 
-def add_item_to_database(row: dict, db_file: str) -> None:
-    """Insert a new item into the database."""
-    with sqlite3.connect(db_file) as connection:
-        cursor = connection.cursor()
-        cursor.execute("PRAGMA busy_timeout = 5000;")  # Wait up to 5s if DB is locked
-        correct_category = CATEGORY_MAPPING.get(row["category"]["name"], "Unknown")
+def image_filename(image_link: str) -> str:
+    """CDN file name for an item image link (the 512px suffix is dropped)"""
+    return image_link.split("/")[-1].replace("-512", "")
 
-        try:
-            cursor.execute("BEGIN TRANSACTION;")
-            cursor.execute(
-                "INSERT INTO tarkov_item (name, tarkov_id, category) VALUES (?, ?, ?)",
-                (row["name"], row["id"], correct_category),
-            )
-            connection.commit()
-            logging.info(
-                f"[*] Added Tarkov item with name '{row['name']}' and ID '{row['id']}' to the database"
-            )
-        except sqlite3.Error as err:
-            connection.rollback()
-            logging.error(f"[!] Database Error: {err}")
-            raise
-
-
-def download_item_image(row: dict, output_directory: str) -> str:
-    """Download the item image and save it to the specified directory."""
-    image_link = row["image512pxLink"]
-    output_filename = image_link.split("/")[-1].replace("-512", "")
-    output_filepath = os.path.join(output_directory, output_filename)
-
-    response = requests.get(image_link, stream=True)
-    if response.status_code == 200:
-        with open(output_filepath, "wb") as output_file:
-            for chunk in response.iter_content(1024):
-                output_file.write(chunk)
-
-        logging.info(f"[*] Wrote image from {image_link} to {output_filepath}")
-    return output_filepath
-
-
-def upload_image_to_cloudinary(filepath: str) -> None:
-    """Upload the image to Cloudinary."""
-    cloudinary.config(
-        cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-        api_key=os.getenv("CLOUDINARY_API_KEY"),
-        api_secret=os.getenv("CLOUDINARY_SECRET"),
-        secure=True,
-    )
 
-    if os.path.isfile(filepath):
-        response = cloudinary.uploader.upload(
-            filepath,
-            use_filename=True,
+class CloudinaryUploader:
+    """Uploads item images to the Cloudinary CDN (configured once, shared by every upload thread)."""
+
+    def __init__(self):
+        # only needed when actually uploading, the rest of the script runs without it
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_SECRET"),
+            secure=True,
+        )
+        self._uploader = cloudinary.uploader
+
+    def upload(self, filename: str, data: bytes) -> None:
+        self._uploader.upload(
+            io.BytesIO(data),
+            public_id=os.path.splitext(filename)[0],
             unique_filename=False,
             overwrite=True,
         )
-        logging.info(f"[*] Uploaded file: {filepath} to Cloudinary CDN...")
+
+
+class LocalUploader:
+    """Stand-in for the CDN that writes images to a local directory (for testing the pipeline)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def upload(self, filename: str, data: bytes) -> None:
+        with open(os.path.join(self.directory, filename), "wb") as output_file:
+            output_file.write(data)
+
+
+class ImageManifest:
+    """
+    JSON record of item images: filename -> {"source": image link, "sha256": hash of the content last
+    uploaded, "pending": still to be uploaded}. Uploads are saved as they finish (at most every
+    `save_interval` seconds), so an interrupted run picks up the pending images where it stopped, and
+    content that's already on the CDN isn't sent again.
+    """
+
+    def __init__(self, path: str, save_interval: float = 1.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+        self.entries = {}
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def mark_pending(self, image_links) -> None:
+        with self._lock:
+            for image_link in image_links:
+                entry = self.entries.setdefault(image_filename(image_link), {"sha256": None})
+                entry.update(source=image_link, pending=True)
+            self._save()
+
+    def pending(self) -> dict:
+        """filename -> image link of every image still to be uploaded"""
+        with self._lock:
+            return {filename: entry["source"] for filename, entry in self.entries.items() if entry.get("pending")}
+
+    def is_uploaded(self, filename: str, sha256: str) -> bool:
+        with self._lock:
+            return self.entries.get(filename, {}).get("sha256") == sha256
+
+    def mark_uploaded(self, filename: str, sha256: str) -> None:
+        with self._lock:
+            self.entries[filename].update(sha256=sha256, pending=False)
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save()
+
+    def _save(self) -> None:
+        # written aside and renamed, so a crash mid-write can't corrupt it
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._saved_at = time.monotonic()
+
+
+_http = threading.local()
+
+
+def download_image(image_link: str) -> bytes:
+    """Download an image into memory (one keep-alive session per thread)."""
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = _http.session = requests.Session()
+    response = session.get(image_link, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def with_retries(func, *args, attempts: int = 3, backoff: float = 1.0, sleep=time.sleep):
+    """Call func, retrying failures with exponential backoff (plus jitter) - the last failure is raised."""
+    for attempt in range(attempts):
+        try:
+            return func(*args)
+        except Exception as err:
+            if attempt == attempts - 1:
+                raise
+            delay = backoff * 2 ** attempt * random.uniform(1, 1.5)
+            logging.warning(f"[!] {err} - retrying in {delay:.1f}s")
+            sleep(delay)
+
+
+def upload_images(
+    manifest: ImageManifest,
+    uploader,
+    workers: int = 8,
+    download=download_image,
+    attempts: int = 3,
+    backoff: float = 1.0,
+) -> dict:
+    """
+    Download and upload every pending image in the manifest on a pool of `workers` threads.
+    Returns {"uploaded", "skipped" (content already on the CDN), "failed"} counts - failed
+    images stay pending for the next run.
+    """
+    counts = {"uploaded": 0, "skipped": 0, "failed": 0}
+
+    def process(filename: str, image_link: str) -> str:
+        data = with_retries(download, image_link, attempts=attempts, backoff=backoff)
+        sha256 = hashlib.sha256(data).hexdigest()
+        if manifest.is_uploaded(filename, sha256):
+            manifest.mark_uploaded(filename, sha256)
+            return "skipped"
+        with_retries(uploader.upload, filename, data, attempts=attempts, backoff=backoff)
+        manifest.mark_uploaded(filename, sha256)
+        logging.info(f"[*] Uploaded {filename} from {image_link} to the CDN")
+        return "uploaded"
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(process, filename, image_link): filename
+                for filename, image_link in manifest.pending().items()
+            }
+            for future in as_completed(futures):
+                try:
+                    counts[future.result()] += 1
+                except Exception as err:
+                    counts["failed"] += 1
+                    logging.error(f"[!] Failed to upload {futures[future]}: {err}")
+    finally:
+        manifest.flush()
+    return counts
 
 
 def fetch_tarkov_items():
@@ -152,35 +260,81 @@ def fetch_tarkov_items():
         return []
 
 
-def add_new_items(db_file: str, dry_run: bool = False):
-    """Fetch new items and add them to the database."""
-    local_item_ids = get_local_db_item_ids(db_file)
+def add_new_items(
+    db_file: str,
+    dry_run: bool = False,
+    manifest: ImageManifest = None,
+    uploader=None,
+    workers: int = 8,
+) -> dict:
+    """Fetch the catalog, write new and changed items to the database, and upload their images."""
     rows = fetch_tarkov_items()
-    new_items_count = 0
-
-    for row in rows:
-        if row["id"] not in local_item_ids:
-            if not dry_run:
-                add_item_to_database(row, db_file)
-                image_filepath = download_item_image(row, "/tmp")
-                upload_image_to_cloudinary(image_filepath)
-                new_items_count += 1
-            else:
-                logging.info(f"[!] Would add item: '{row['name']}' (Dry-Run Mode)")
+    if not rows:
+        # an empty (failed) fetch would look like every item was removed
+        raise RuntimeError("No items fetched from the Tarkov API, not syncing")
+    items = [CatalogItem.from_api(row) for row in rows]
 
+    engine = connect(db_file)
+    try:
+        # one transaction - the diff, the writes and the catalog data version bump commit together
+        with engine.begin() as connection:
+            result = sync_catalog(connection, items, dry_run=dry_run)
+            counts = result.counts()
+
+            if dry_run:
+                for item in result.inserted:
+                    logging.info(f"[!] Would add item: '{item.name}' (Dry-Run Mode)")
+                for item in result.updated:
+                    logging.info(f"[!] Would update item: '{item.name}' (Dry-Run Mode)")
+                logging.info(f"[!] Would remove {len(result.removed)} items (Dry-Run Mode)")
+                logging.info(f"Dry-Run Complete - {counts}")
+                return counts
+
+            manifest = manifest or ImageManifest(DEFAULT_MANIFEST_FILE)
+            # recorded before the items are committed, so their images are still owed if the run dies after it.
+            # changed items are re-checked too - an unchanged image is hashed and skipped
+            manifest.mark_pending(item.image_link for item in result.inserted + result.updated if item.image_link)
+    finally:
+        engine.dispose()
+
+    for item in result.inserted:
+        logging.info(f"[*] Added Tarkov item with name '{item.name}' and ID '{item.tarkov_id}' to the database")
+    for tarkov_id in result.removed:
+        logging.info(f"[*] Tarkov item '{tarkov_id}' is no longer in the catalog, marked removed")
+
+    counts.update(upload_images(manifest, uploader or CloudinaryUploader(), workers=workers))
     logging.info(
-        f"Job Complete - {new_items_count} items were added to the database and their images uploaded to the CDN"
+        f"Job Complete - {counts['inserted']} items inserted, {counts['updated']} updated, "
+        f"{counts['removed']} removed, {counts['unchanged']} unchanged - {counts['uploaded']} images uploaded to the CDN, "
+        f"{counts['skipped']} already there, {counts['failed']} failed"
     )
+    return counts
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename="/var/log/scav_case_update_items.log",
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+
     parser = argparse.ArgumentParser(description="Fetch and update Tarkov items in the database.")
     parser.add_argument("--db-file", required=True, help="Path to the SQLite database file.")
     parser.add_argument("--dry-run", action="store_true", help="Run in dry mode without modifying the database.")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_FILE, help="Image manifest file (resumes interrupted runs).")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent image downloads / uploads.")
+    parser.add_argument("--upload-dir", default=None, help="Write images to this directory instead of Cloudinary.")
 
     args = parser.parse_args()
 
     try:
-        add_new_items(args.db_file, dry_run=args.dry_run)
+        counts = add_new_items(
+            args.db_file,
+            dry_run=args.dry_run,
+            manifest=ImageManifest(args.manifest),
+            uploader=LocalUploader(args.upload_dir) if args.upload_dir else None,
+            workers=args.workers,
+        )
+        print(" ".join(f"{name}={count}" for name, count in counts.items()))
     except Exception as e:
         logging.error(f"[!] Script execution failed: {e}")
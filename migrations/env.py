@@ -91,6 +91,18 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
+    # the item name search index (sqlite fts5 table + its shadow tables, postgres trigram index) is
+    # managed by hand in its migration, so keep autogenerate from trying to drop it
+    def include_name(name, type_, parent_names):
+        if type_ == "table":
+            return not (name or "").startswith("tarkov_item_search")
+        if type_ == "index":
+            return name != "ix_tarkov_item_name_trgm"
+        return True
+
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
@@ -0,0 +1,42 @@
+"""generalise achievement counters for the declarative achievement rules
+
+Revision ID: 0b9d4e27c5f3
+Revises: 6c1f8e3a92b5
+Create Date: 2026-10-19 22:41:08.913402
+
+The counters are now named after the rules (AchievementRule.counter), so the old rows are cleared -
+each user's are rebuilt on their next submission, or for everyone with `flask stats rebuild`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9d4e27c5f3'
+down_revision = '6c1f8e3a92b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_achievement_seen',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('counter', sa.String(length=150), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'counter', 'value')
+    )
+    op.drop_table('user_found_weapon')
+    op.execute("DELETE FROM user_achievement_counter")
+
+
+def downgrade():
+    op.create_table('user_found_weapon',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'name')
+    )
+    op.drop_table('user_achievement_seen')
+    op.execute("DELETE FROM user_achievement_counter")
@@ -0,0 +1,37 @@
+"""add stored, indexed profit column to scav_case
+
+Revision ID: 3b8f61c0d5a2
+Revises: 7d2e4b9a1f03
+Create Date: 2026-10-19 10:03:18.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f61c0d5a2'
+down_revision = '7d2e4b9a1f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scav_case', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profit', sa.Float(), nullable=False, server_default='0'))
+
+    # backfill from the existing columns, the ORM keeps it up to date from here on
+    op.execute("UPDATE scav_case SET profit = COALESCE(_return, 0) - COALESCE(cost, 0)")
+
+    with op.batch_alter_table('scav_case', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_scav_case_profit'), ['profit'], unique=False)
+        batch_op.create_index('ix_scav_case_user_id_profit', ['user_id', 'profit'], unique=False)
+        batch_op.create_index('ix_scav_case_type_profit', ['type', 'profit'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scav_case', schema=None) as batch_op:
+        batch_op.drop_index('ix_scav_case_type_profit')
+        batch_op.drop_index('ix_scav_case_user_id_profit')
+        batch_op.drop_index(batch_op.f('ix_scav_case_profit'))
+        batch_op.drop_column('profit')
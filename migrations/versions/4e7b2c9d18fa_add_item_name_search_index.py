@@ -0,0 +1,59 @@
+"""add item name search index (sqlite fts5 trigram / postgres pg_trgm)
+
+Revision ID: 4e7b2c9d18fa
+Revises: d83f5a61c2e9
+Create Date: 2026-10-19 19:10:52.770416
+
+On SQLite the index is an external content FTS5 table over tarkov_item.name, kept in sync by
+triggers. On Postgres it's a pg_trgm GIN index on lower(name). Other databases get nothing and
+search falls back to ILIKE.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7b2c9d18fa'
+down_revision = 'd83f5a61c2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE tarkov_item_search USING fts5("
+            "name, content='tarkov_item', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute("""
+            CREATE TRIGGER tarkov_item_search_ai AFTER INSERT ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER tarkov_item_search_ad AFTER DELETE ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(tarkov_item_search, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER tarkov_item_search_au AFTER UPDATE OF name ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(tarkov_item_search, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO tarkov_item_search(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        op.execute("INSERT INTO tarkov_item_search(tarkov_item_search) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_tarkov_item_name_trgm ON tarkov_item USING gin (lower(name) gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS tarkov_item_search_ai")
+        op.execute("DROP TRIGGER IF EXISTS tarkov_item_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS tarkov_item_search_au")
+        op.execute("DROP TABLE IF EXISTS tarkov_item_search")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tarkov_item_name_trgm")
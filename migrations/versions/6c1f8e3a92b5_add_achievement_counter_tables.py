@@ -0,0 +1,39 @@
+"""add per-user achievement counters
+
+Revision ID: 6c1f8e3a92b5
+Revises: 4e7b2c9d18fa
+Create Date: 2026-10-19 21:14:37.260518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1f8e3a92b5'
+down_revision = '4e7b2c9d18fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # no backfill - a user's counters are built from their history on their next submission
+    # (or for everyone at once with `flask stats rebuild`)
+    op.create_table('user_achievement_counter',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=150), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'name')
+    )
+    op.create_table('user_found_weapon',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'name')
+    )
+
+
+def downgrade():
+    op.drop_table('user_found_weapon')
+    op.drop_table('user_achievement_counter')
@@ -0,0 +1,44 @@
+"""add keyset pagination indexes
+
+Revision ID: 7d2e4b9a1f03
+Revises: 15c4ad24b6eb
+Create Date: 2026-10-19 09:12:41.204517
+
+The seek predicate (created_at < :v OR (created_at = :v AND id < :id)) never matches NULL, so legacy
+cases without a timestamp would drop out of the lists. They're given the timestamp of the case before
+them (by id) - or the earliest one there is - and created_at becomes NOT NULL.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e4b9a1f03'
+down_revision = '15c4ad24b6eb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE scav_case SET created_at = COALESCE(
+            (SELECT MAX(earlier.created_at) FROM scav_case AS earlier
+             WHERE earlier.id < scav_case.id AND earlier.created_at IS NOT NULL),
+            (SELECT MIN(known.created_at) FROM scav_case AS known WHERE known.created_at IS NOT NULL),
+            CURRENT_TIMESTAMP
+        )
+        WHERE created_at IS NULL
+    """)
+
+    with op.batch_alter_table('scav_case', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_scav_case_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_scav_case_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scav_case', schema=None) as batch_op:
+        batch_op.drop_index('ix_scav_case_user_id_created_at_id')
+        batch_op.drop_index('ix_scav_case_created_at_id')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
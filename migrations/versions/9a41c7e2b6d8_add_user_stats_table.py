@@ -0,0 +1,60 @@
+"""add user_stats table for the leaderboards
+
+Revision ID: 9a41c7e2b6d8
+Revises: 3b8f61c0d5a2
+Create Date: 2026-10-19 11:26:05.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a41c7e2b6d8'
+down_revision = '3b8f61c0d5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_profit', sa.Float(), nullable=False),
+    sa.Column('case_count', sa.Integer(), nullable=False),
+    sa.Column('avg_profit', sa.Float(), nullable=False),
+    sa.Column('most_expensive_item', sa.Float(), nullable=False),
+    sa.Column('last_case_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_stats_avg_profit'), ['avg_profit'], unique=False)
+        batch_op.create_index(batch_op.f('ix_user_stats_case_count'), ['case_count'], unique=False)
+        batch_op.create_index(batch_op.f('ix_user_stats_most_expensive_item'), ['most_expensive_item'], unique=False)
+        batch_op.create_index(batch_op.f('ix_user_stats_total_profit'), ['total_profit'], unique=False)
+
+    # backfill, same aggregate as `flask stats rebuild`
+    op.execute("""
+        INSERT INTO user_stats (user_id, total_profit, case_count, avg_profit, most_expensive_item, last_case_at)
+        SELECT c.user_id, c.total_profit, c.case_count, c.total_profit / c.case_count,
+               COALESCE(i.most_expensive_item, 0), c.last_case_at
+        FROM (
+            SELECT user_id, SUM(profit) AS total_profit, COUNT(id) AS case_count, MAX(created_at) AS last_case_at
+            FROM scav_case GROUP BY user_id
+        ) AS c
+        LEFT OUTER JOIN (
+            SELECT scav_case.user_id AS user_id, MAX(scav_case_item.price) AS most_expensive_item
+            FROM scav_case_item JOIN scav_case ON scav_case.id = scav_case_item.scav_case_id
+            GROUP BY scav_case.user_id
+        ) AS i ON i.user_id = c.user_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_stats_total_profit'))
+        batch_op.drop_index(batch_op.f('ix_user_stats_most_expensive_item'))
+        batch_op.drop_index(batch_op.f('ix_user_stats_case_count'))
+        batch_op.drop_index(batch_op.f('ix_user_stats_avg_profit'))
+
+    op.drop_table('user_stats')
@@ -0,0 +1,71 @@
+"""add tarkov_item fingerprint and removed_at for incremental catalog syncs
+
+Revision ID: a83d5f1c07e2
+Revises: 0b9d4e27c5f3
+Create Date: 2026-10-20 09:12:37.418205
+
+Existing items are fingerprinted from their stored name and category (same as catalog_sync.CatalogItem,
+copied here so the migration doesn't change if that does), so the first sync after this doesn't rewrite
+every one of them.
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83d5f1c07e2'
+down_revision = '0b9d4e27c5f3'
+branch_labels = None
+depends_on = None
+
+
+def _fingerprint(name, category):
+    return hashlib.sha1(f"{name}\x1f{category}".encode("utf-8")).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('tarkov_item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=40), nullable=True))
+        batch_op.add_column(sa.Column('removed_at', sa.DateTime(), nullable=True))
+
+    tarkov_item = sa.table('tarkov_item', sa.column('id'), sa.column('fingerprint'))
+    connection = op.get_bind()
+    rows = [
+        {'b_id': item_id, 'b_fingerprint': _fingerprint(name, category)}
+        for item_id, name, category in connection.execute(sa.text('SELECT id, name, category FROM tarkov_item'))
+    ]
+    if rows:
+        connection.execute(
+            tarkov_item.update().where(tarkov_item.c.id == sa.bindparam('b_id'))
+            .values(fingerprint=sa.bindparam('b_fingerprint')),
+            rows,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('tarkov_item', schema=None) as batch_op:
+        batch_op.drop_column('removed_at')
+        batch_op.drop_column('fingerprint')
+
+    if op.get_bind().dialect.name == 'sqlite':
+        # dropping columns rebuilds the table on SQLite, which takes the search index triggers with it
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS tarkov_item_search_ai AFTER INSERT ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS tarkov_item_search_ad AFTER DELETE ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(tarkov_item_search, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS tarkov_item_search_au AFTER UPDATE OF name ON tarkov_item BEGIN
+                INSERT INTO tarkov_item_search(tarkov_item_search, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO tarkov_item_search(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        op.execute("INSERT INTO tarkov_item_search(tarkov_item_search) VALUES ('rebuild')")
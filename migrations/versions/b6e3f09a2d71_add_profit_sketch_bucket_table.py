@@ -0,0 +1,68 @@
+"""add profit_sketch_bucket table for profit percentiles
+
+Revision ID: b6e3f09a2d71
+Revises: f2a7d81c4e60
+Create Date: 2026-10-19 16:31:40.208153
+
+The buckets are signed log buckets, which SQLite can't compute in SQL, so the backfill is a
+python pass over scav_case (same bucketing as ProfitDistributionService.rebuild, copied here so
+the migration doesn't change if the service does).
+
+"""
+import math
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3f09a2d71'
+down_revision = 'f2a7d81c4e60'
+branch_labels = None
+depends_on = None
+
+# ProfitDistributionService's bucketing at the time of this revision (2% relative accuracy)
+_LOG_GAMMA = math.log(1.02 / 0.98)
+
+
+def _bucket_for(profit):
+    if not profit:
+        return 0
+    k = max(0, math.ceil(math.log(abs(profit)) / _LOG_GAMMA))
+    return (k + 1) if profit > 0 else -(k + 1)
+
+
+def upgrade():
+    op.create_table('profit_sketch_bucket',
+    sa.Column('scope', sa.String(length=16), nullable=False),
+    sa.Column('scope_key', sa.String(length=50), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'scope_key', 'bucket')
+    )
+
+    # backfill, same sketches as `flask stats rebuild` - all cases, per case type and per user
+    counts = Counter()
+    rows = op.get_bind().execution_options(yield_per=10000).execute(
+        sa.text("SELECT type, user_id, profit FROM scav_case")
+    )
+    for case_type, user_id, profit in rows:
+        bucket = _bucket_for(profit)
+        for scope, scope_key in (("all", ""), ("type", case_type), ("user", str(user_id))):
+            counts[(scope, scope_key, bucket)] += 1
+
+    if counts:
+        buckets = sa.table(
+            'profit_sketch_bucket',
+            sa.column('scope', sa.String), sa.column('scope_key', sa.String),
+            sa.column('bucket', sa.Integer), sa.column('count', sa.Integer),
+        )
+        op.bulk_insert(buckets, [
+            {"scope": scope, "scope_key": scope_key, "bucket": bucket, "count": count}
+            for (scope, scope_key, bucket), count in counts.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('profit_sketch_bucket')
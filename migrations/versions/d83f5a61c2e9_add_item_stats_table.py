@@ -0,0 +1,48 @@
+"""add item_stats table for the item frequency pages
+
+Revision ID: d83f5a61c2e9
+Revises: b6e3f09a2d71
+Create Date: 2026-10-19 18:02:14.583120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f5a61c2e9'
+down_revision = 'b6e3f09a2d71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('item_stats',
+    sa.Column('tarkov_id', sa.String(length=50), nullable=False),
+    sa.Column('case_type', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('times_found', sa.Integer(), nullable=False),
+    sa.Column('total_quantity', sa.Integer(), nullable=False),
+    sa.Column('last_case_id', sa.Integer(), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('tarkov_id', 'case_type')
+    )
+    with op.batch_alter_table('item_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_item_stats_case_type_times_found_name', ['case_type', 'times_found', 'name'], unique=False)
+
+    # backfill, same aggregate as `flask stats rebuild` - one row per case type, plus the "all" totals
+    for case_type, group_by in (("scav_case.type", ", scav_case.type"), ("'all'", "")):
+        op.execute(f"""
+            INSERT INTO item_stats (tarkov_id, case_type, name, times_found, total_quantity, last_case_id, last_seen_at)
+            SELECT scav_case_item.tarkov_id, {case_type}, MAX(scav_case_item.name), COUNT(scav_case_item.id),
+                   SUM(scav_case_item.amount), MAX(scav_case_item.scav_case_id), MAX(scav_case.created_at)
+            FROM scav_case_item JOIN scav_case ON scav_case.id = scav_case_item.scav_case_id
+            GROUP BY scav_case_item.tarkov_id{group_by}
+        """)
+
+
+def downgrade():
+    with op.batch_alter_table('item_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_stats_case_type_times_found_name')
+
+    op.drop_table('item_stats')
@@ -0,0 +1,55 @@
+"""add user_daily_stats rollups for windowed leaderboards
+
+Revision ID: e5c09d3a7b14
+Revises: 9a41c7e2b6d8
+Create Date: 2026-10-19 12:48:51.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c09d3a7b14'
+down_revision = '9a41c7e2b6d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_daily_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('case_count', sa.Integer(), nullable=False),
+    sa.Column('total_profit', sa.Float(), nullable=False),
+    sa.Column('most_expensive_item', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    with op.batch_alter_table('user_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_user_daily_stats_day_user_id', ['day', 'user_id'], unique=False)
+
+    # backfill, same aggregate as `flask stats rebuild`. sqlite has no DATE type, so truncate with date()
+    day_expr = "date({col})" if op.get_bind().dialect.name == "sqlite" else "CAST({col} AS DATE)"
+    case_day = day_expr.format(col="created_at")
+    item_day = day_expr.format(col="scav_case.created_at")
+    op.execute(f"""
+        INSERT INTO user_daily_stats (user_id, day, case_count, total_profit, most_expensive_item)
+        SELECT c.user_id, c.day, c.case_count, c.total_profit, COALESCE(i.most_expensive_item, 0)
+        FROM (
+            SELECT user_id, {case_day} AS day, COUNT(id) AS case_count, SUM(profit) AS total_profit
+            FROM scav_case GROUP BY user_id, {case_day}
+        ) AS c
+        LEFT OUTER JOIN (
+            SELECT scav_case.user_id AS user_id, {item_day} AS day, MAX(scav_case_item.price) AS most_expensive_item
+            FROM scav_case_item JOIN scav_case ON scav_case.id = scav_case_item.scav_case_id
+            GROUP BY scav_case.user_id, {item_day}
+        ) AS i ON i.user_id = c.user_id AND i.day = c.day
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('user_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_daily_stats_day_user_id')
+
+    op.drop_table('user_daily_stats')
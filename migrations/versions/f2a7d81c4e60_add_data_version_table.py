@@ -0,0 +1,30 @@
+"""add data_version table for conditional GETs
+
+Revision ID: f2a7d81c4e60
+Revises: e5c09d3a7b14
+Create Date: 2026-10-19 14:05:12.417730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7d81c4e60'
+down_revision = 'e5c09d3a7b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table('data_version',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(data_version.insert().values(name='cases', version=1, updated_at=sa.func.now()))
+
+
+def downgrade():
+    op.drop_table('data_version')
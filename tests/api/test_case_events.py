@@ -0,0 +1,85 @@
+import json
+
+from app.events import EventBroker
+
+
+def _parse(message):
+    """Split an SSE message into {field: value}."""
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def test_publish_fans_out_to_every_subscriber():
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+
+    broker.publish("case", {"action": "created"})
+
+    for q in (first, second):
+        message = _parse(q.get_nowait())
+        assert message["event"] == "case"
+        assert message["data"] == {"action": "created"}
+
+
+def test_slow_subscriber_is_told_to_resync():
+    broker = EventBroker(max_queue=2)
+    q = broker.subscribe()
+
+    for i in range(3):
+        broker.publish("case", {"n": i})
+
+    assert _parse(q.get_nowait())["event"] == "resync"
+    assert q.empty()
+
+
+def test_reconnect_replays_missed_events():
+    broker = EventBroker()
+    first_id = broker.publish("case", {"n": 1})
+    broker.publish("case", {"n": 2})
+    broker.publish("case", {"n": 3})
+
+    q = broker.subscribe(last_event_id=first_id)
+    replayed = [_parse(q.get_nowait())["data"]["n"] for _ in range(2)]
+    assert replayed == [2, 3]
+    assert q.empty()
+
+
+def test_stream_unsubscribes_when_client_goes_away():
+    broker = EventBroker(heartbeat=0.01)
+    stream = broker.stream()
+
+    assert next(stream).startswith("retry:")
+    assert broker.subscriber_count == 1
+    assert next(stream) == ": keep-alive\n\n"
+
+    stream.close()
+    assert broker.subscriber_count == 0
+
+
+def test_stream_resyncs_on_writes_from_other_processes():
+    """A data version that moved with no event through this broker means someone else wrote"""
+    broker = EventBroker(heartbeat=0.01)
+    version = [1]
+    stream = broker.stream(data_version=lambda: version[0])
+    assert next(stream).startswith("retry:")
+
+    assert next(stream) == ": keep-alive\n\n"
+    version[0] = 2  # e.g. the discord bot saved a case
+    assert _parse(next(stream))["event"] == "resync"
+    assert next(stream) == ": keep-alive\n\n"
+
+    # a local write moves the version too, but its own event already told the client
+    version[0] = 3
+    broker.publish("case", {"n": 1})
+    assert _parse(next(stream))["event"] == "case"
+    assert next(stream) == ": keep-alive\n\n"
+    stream.close()
+
+
+def test_stream_route_is_an_event_stream(client):
+    response = client.get("/api/stream/cases")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert next(response.response).startswith(b"retry:")
+    response.close()
@@ -0,0 +1,62 @@
+import gzip
+import json
+
+from app.extensions import db
+from app.models import TarkovItem
+from app.services.catalog_index_service import normalize_tokens
+
+
+def _current_index_url(client):
+    response = client.get("/api/catalog/index")
+    assert response.status_code == 302
+    assert response.cache_control.no_cache
+    return response.headers["Location"]
+
+
+def test_normalize_tokens():
+    assert normalize_tokens("Café «Zibbo» lighter") == ["cafe", "zibbo", "lighter"]
+    assert normalize_tokens("M4A1 Assault_Rifle (M4A1)") == ["m4a1", "assault", "rifle"]
+
+
+def test_catalog_index_is_compressed_and_immutable(app, client):
+    with app.app_context():
+        db.session.add_all([
+            TarkovItem(name="Catalog Rifle", tarkov_id="catalog-rifle", category="Guns"),
+            TarkovItem(name="Catalog Rifle Default", tarkov_id="catalog-rifle-default", category="Guns"),
+            TarkovItem(name="Catalog Bolts", tarkov_id="catalog-bolts", category="Barter Items"),
+        ])
+        db.session.commit()
+
+    url = _current_index_url(client)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age >= 30 * 24 * 60 * 60
+
+    index = json.loads(gzip.decompress(response.data))
+    assert url.endswith(f"/{index['version']}.json")
+    rows = {row[0]: dict(zip(index["fields"], row)) for row in index["items"]}
+    rifle = rows["catalog-rifle"]
+    assert rifle["tokens"] == "catalog rifle"
+    assert index["categories"][rifle["category"]] == "Guns"
+    assert rifle["image"] == "catalog-rifle-default"
+
+    # same bytes uncompressed for clients that don't take gzip, and revalidation is a 304
+    assert json.loads(client.get(url).data) == index
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_catalog_index_version_follows_catalog_writes(app, client):
+    old_url = _current_index_url(client)
+    with app.app_context():
+        db.session.add(TarkovItem(name="Catalog Nuts", tarkov_id="catalog-nuts", category="Barter Items"))
+        db.session.commit()
+
+    new_url = _current_index_url(client)
+    assert new_url != old_url
+
+    # pages still pointing at the old file are sent to the current one
+    stale = client.get(old_url)
+    assert stale.status_code == 302
+    assert stale.headers["Location"] == new_url
@@ -0,0 +1,79 @@
+from app.models import User, ScavCase, DataVersion
+from app.extensions import db
+
+
+def _create_case(username):
+    """Create a user with a single ScavCase and commit it (bumps the cases data version)."""
+    user = User(username=username, password="x")
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(ScavCase(user_id=user.id, type="₽2500", cost=2500.0, _return=5000.0, number_of_items=0))
+    db.session.commit()
+
+
+def _cases_version():
+    row = db.session.get(DataVersion, "cases")
+    return row.version if row else 0
+
+
+def test_case_writes_bump_data_version(client):
+    """Inserting, updating and deleting a case each bump the version counter."""
+    before = _cases_version()
+    _create_case("etag_writer")
+    assert _cases_version() == before + 1
+
+    scav_case = ScavCase.query.join(User).filter(User.username == "etag_writer").one()
+    scav_case.cost = 1000.0
+    db.session.commit()
+    assert _cases_version() == before + 2
+
+    db.session.delete(scav_case)
+    db.session.commit()
+    assert _cases_version() == before + 3
+
+
+def test_matching_etag_returns_304(client):
+    """A repeat request with If-None-Match gets a bodyless 304 until a case is written."""
+    _create_case("etag_reader")
+
+    first = client.get("/api/scav-case-type-distribution?days=0")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+
+    repeat = client.get("/api/scav-case-type-distribution?days=0", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    # different params, different etag
+    other = client.get("/api/scav-case-type-distribution?days=7", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+    _create_case("etag_reader_2")
+    after_write = client.get("/api/scav-case-type-distribution?days=0", headers={"If-None-Match": etag})
+    assert after_write.status_code == 200
+    assert after_write.headers["ETag"] != etag
+
+
+def test_error_responses_are_not_cached(client):
+    """Validation errors pass straight through without an ETag."""
+    response = client.get("/api/get-chart-data?type=nonsense")
+    assert response.status_code == 422
+    assert "ETag" not in response.headers
+
+
+def test_items_page_supports_last_modified(client):
+    """/cases/items honours If-Modified-Since against the last case write."""
+    _create_case("etag_items")
+    user = User.query.filter_by(username="etag_items").one()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+    first = client.get("/cases/items", headers={"HX-Request": "true"})
+    assert first.status_code == 200
+    last_modified = first.headers["Last-Modified"]
+    assert "HX-Request" in first.headers["Vary"]
+
+    repeat = client.get("/cases/items", headers={"HX-Request": "true", "If-Modified-Since": last_modified})
+    assert repeat.status_code == 304
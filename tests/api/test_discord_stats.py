@@ -0,0 +1,52 @@
+from app.constants import SCAV_CASE_TYPES
+from app.extensions import db
+from app.models import ScavCase, User
+from app.services.discord_stats_service import TOP_USERS, DiscordStatsService
+from app.services.user_stats_service import UserStatsService
+
+
+def _create_cases(username, *cases):
+    user = User(username=username, password="x")
+    db.session.add(user)
+    db.session.flush()
+    for case_type, cost, _return in cases:
+        db.session.add(ScavCase(user_id=user.id, type=case_type, cost=cost, _return=_return, number_of_items=0))
+    db.session.flush()
+    # inserted around the service, so fold them into the rollups the way an import does
+    UserStatsService().rebuild_users([user.id])
+    db.session.commit()
+
+
+def test_stats_breakdowns_and_caching(app, monkeypatch):
+    service = DiscordStatsService()
+    before = service.get_stats()
+    _create_cases("stats_big", ("Moonshine", 30_000, 530_000), ("₽2500", 2500, 12_500))
+    _create_cases("stats_small", ("₽2500", 2500, 1500))
+
+    stats = service.get_stats()
+    assert stats["total_cases"] == before["total_cases"] + 3
+    assert stats["total_spend"] == before["total_spend"] + 35_000
+    assert stats["total_profit"] == before["total_profit"] + 500_000 + 10_000 - 1000
+
+    # case types in the site's usual order, users by profit
+    types = [row["type"] for row in stats["by_type"]]
+    assert types == [case_type for case_type in SCAV_CASE_TYPES if case_type in types]
+    assert {row["type"]: row["cases"] for row in stats["by_type"]}["Moonshine"] >= 1
+    top_users = [(row["username"], row["cases"], row["profit"]) for row in stats["top_users"]]
+    assert ("stats_big", 2, 510_000) in top_users
+    assert len(top_users) <= TOP_USERS
+    assert [row[2] for row in top_users] == sorted((row[2] for row in top_users), reverse=True)
+
+    # nothing written since - answered without aggregating again
+    monkeypatch.setattr(service, "_compute", lambda: (_ for _ in ()).throw(AssertionError("re-aggregated")))
+    assert service.get_stats() is stats
+
+
+def test_discord_stats_endpoint(client):
+    _create_cases("stats_endpoint", ("₽15000", 15_000, 40_000))
+
+    response = client.get("/api/discord-stats")
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert {"total_profit", "total_cases", "total_spend", "by_type", "top_users"} <= set(data)
+    assert client.get("/api/discord-stats", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
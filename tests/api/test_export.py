@@ -0,0 +1,98 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.http.errors import ValidationError
+from app.models import User, ScavCase, ScavCaseItem, TarkovItem
+from app.services.export_service import ExportService
+
+
+@pytest.fixture(scope="module")
+def seeded(app):
+    """Two users, three cases (one with items) - committed so the export's own queries can see them."""
+    alice = User(username="export_alice", password="x")
+    bob = User(username="export_bob", password="x")
+    db.session.add_all([alice, bob, TarkovItem(name="Export Item", tarkov_id="export-item")])
+    db.session.flush()
+
+    cases = [
+        ScavCase(user_id=alice.id, type="₽2500", cost=2500.0, _return=9000.0, number_of_items=2,
+                 created_at=datetime(2026, 1, 5)),
+        ScavCase(user_id=alice.id, type="₽95000", cost=95000.0, _return=1000.0, number_of_items=0,
+                 created_at=datetime(2026, 2, 5)),
+        ScavCase(user_id=bob.id, type="₽2500", cost=2500.0, _return=0.0, number_of_items=0,
+                 created_at=datetime(2026, 3, 5)),
+    ]
+    db.session.add_all(cases)
+    db.session.flush()
+    db.session.add_all([
+        ScavCaseItem(scav_case_id=cases[0].id, tarkov_id="export-item", name="Export Item", amount=1, price=4000.0),
+        ScavCaseItem(scav_case_id=cases[0].id, tarkov_id="export-item", name="Export Item", amount=1, price=5000.0),
+    ])
+    db.session.commit()
+    return {"alice": alice.id, "bob": bob.id, "cases": [c.id for c in cases]}
+
+
+def _export(**kwargs):
+    # batch_size=1 so every row goes through the batching path
+    return b"".join(ExportService(batch_size=1).export(**kwargs))
+
+
+def test_csv_export_filters_by_user(seeded):
+    rows = list(csv.DictReader(io.StringIO(_export(fmt="csv", user_id=seeded["alice"]).decode())))
+    assert [int(r["id"]) for r in rows] == seeded["cases"][:2]
+    assert rows[0]["username"] == "export_alice"
+    assert float(rows[0]["profit"]) == 6500.0
+
+
+def test_jsonl_item_export_with_type_and_date_range(seeded):
+    body = _export(
+        fmt="jsonl", level="items", case_type="₽2500",
+        since=datetime(2026, 1, 1), until=datetime(2026, 2, 1),
+    )
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert len(rows) == 2
+    assert {r["case_id"] for r in rows} == {seeded["cases"][0]}
+    assert rows[0]["created_at"] == "2026-01-05T00:00:00"
+
+
+def test_gzip_export_round_trips(seeded):
+    plain = _export(fmt="csv", user_id=seeded["bob"])
+    assert gzip.decompress(_export(fmt="csv", user_id=seeded["bob"], compress=True)) == plain
+
+
+def test_empty_csv_export_still_has_a_header(seeded):
+    body = _export(fmt="csv", user_id=999999)
+    assert body.decode().strip() == "id,created_at,type,cost,return,profit,number_of_items,user_id,username"
+
+
+def test_parquet_export(seeded):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(_export(fmt="parquet", level="items", user_id=seeded["alice"])))
+    assert table.num_rows == 2
+    assert table.column("price").to_pylist() == [4000.0, 5000.0]
+
+
+def test_invalid_format_is_rejected():
+    with pytest.raises(ValidationError):
+        ExportService().export(fmt="xlsx")
+
+
+def test_export_route_streams_attachment(client, seeded):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(seeded["alice"])
+        sess["_fresh"] = True
+
+    response = client.get(f"/api/export/cases?format=jsonl&user_id={seeded['bob']}&gzip=1")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert "scav_cases.jsonl.gz" in response.headers["Content-Disposition"]
+    rows = [json.loads(line) for line in gzip.decompress(response.data).decode().splitlines()]
+    assert [r["id"] for r in rows] == [seeded["cases"][2]]
+
+    assert client.get("/api/export/cases?since=yesterday").status_code == 422
@@ -0,0 +1,130 @@
+import io
+import json
+
+import pytest
+
+from app.extensions import db
+from app.http.errors import ValidationError
+from app.models import User, ScavCase, ScavCaseItem, TarkovItem, UserStats
+from app.services.import_service import ImportService
+
+
+@pytest.fixture(scope="module")
+def catalog(app):
+    db.session.add_all([
+        TarkovItem(name="Import Item A", tarkov_id="import-item-a", category="Keys"),
+        TarkovItem(name="Import Item B", tarkov_id="import-item-b", category="Keys"),
+    ])
+    db.session.commit()
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Record (and answer) bulk price lookups without touching tarkov.dev."""
+    calls = []
+
+    def fake_get_prices(ids):
+        calls.append(list(ids))
+        return {tarkov_id: 1000 for tarkov_id in ids}
+
+    monkeypatch.setattr("app.services.import_service.get_prices", fake_get_prices)
+    return calls
+
+
+def _user(username):
+    user = User(username=username, password="x")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def _jsonl(*records):
+    return [json.dumps(record) + "\n" for record in records]
+
+
+def test_jsonl_import_inserts_cases_items_and_stats(catalog, lookups):
+    user_id = _user("import_jsonl")
+    lines = _jsonl(*[
+        {"user": "import_jsonl", "type": "₽2500", "created_at": f"2025-01-0{day}T10:00:00",
+         "items": [{"id": "import-item-a", "quantity": 2, "price": 5000}, {"id": "import-item-b", "quantity": 1}]}
+        for day in range(1, 6)
+    ])
+
+    result = ImportService(batch_size=2).import_cases(lines, "jsonl", check_user_achievements=False)
+
+    assert (result.cases, result.items, result.users, result.error_count) == (5, 10, 1, 0)
+    # one bulk lookup for the single distinct unpriced item, not one per case
+    assert lookups == [["import-item-b"]]
+
+    cases = ScavCase.query.filter_by(user_id=user_id).all()
+    assert len(cases) == 5
+    assert all(c._return == 11000.0 and c.profit == 8500.0 and c.number_of_items == 2 for c in cases)
+    assert ScavCaseItem.query.filter_by(scav_case_id=cases[0].id, tarkov_id="import-item-b").one().name == "Import Item B"
+
+    stats = db.session.get(UserStats, user_id)
+    assert stats.case_count == 5
+    assert stats.total_profit == 5 * 8500.0
+
+
+def test_csv_import_groups_rows_by_case_ref(catalog, lookups):
+    user_id = _user("import_csv")
+    csv_text = (
+        "case_ref,user,type,created_at,cost,tarkov_id,name,quantity,price\n"
+        "1,import_csv,₽15000,2025-02-01T09:00:00,,import-item-a,,1,20000\n"
+        "1,import_csv,₽15000,2025-02-01T09:00:00,,import-item-b,,3,100\n"
+        "2,import_csv,Moonshine,2025-02-02T09:00:00,,import-item-a,,1,1\n"
+    )
+
+    result = ImportService().import_cases(io.StringIO(csv_text), "csv", check_user_achievements=False)
+
+    assert (result.cases, result.items) == (2, 3)
+    cases = ScavCase.query.filter_by(user_id=user_id).order_by(ScavCase.created_at).all()
+    assert [c.cost for c in cases] == [15000.0, 1000.0]  # moonshine cost comes from the price lookup
+    assert cases[0]._return == 20300.0
+
+
+def test_invalid_records_are_skipped_and_reported(catalog, lookups):
+    user_id = _user("import_partial")
+    lines = _jsonl(
+        {"user": "import_partial", "type": "₽2500", "items": []},
+        {"user": "nobody_by_that_name", "type": "₽2500", "items": []},
+        {"user": "import_partial", "type": "₽1", "items": []},
+        {"user": "import_partial", "type": "₽2500", "items": ["abc"]},
+        {"user": "import_partial", "type": "₽2500", "items": "abc"},
+    ) + ["{not json\n"]
+
+    result = ImportService().import_cases(lines, "jsonl", check_user_achievements=False)
+
+    assert result.cases == 1
+    assert [e["line"] for e in result.errors] == [2, 3, 4, 5, 6]
+    assert ScavCase.query.filter_by(user_id=user_id).count() == 1
+
+
+def test_strict_import_writes_nothing_on_error(catalog, lookups):
+    user_id = _user("import_strict")
+    lines = _jsonl(
+        {"user": "import_strict", "type": "₽2500", "items": []},
+        {"user": "import_strict", "type": "₽2500", "items": [{"id": "not-in-catalog", "quantity": 1}]},
+    )
+
+    with pytest.raises(ValidationError):
+        ImportService().import_cases(lines, "jsonl", strict=True)
+    assert ScavCase.query.filter_by(user_id=user_id).count() == 0
+
+
+def test_import_route_assigns_cases_to_current_user(client, catalog, lookups):
+    user_id = _user("import_route")
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+    body = "".join(_jsonl({"user": "someone_else", "type": "₽95000", "items": [{"id": "import-item-a", "quantity": 1}]}))
+    response = client.post(
+        "/api/import/cases",
+        data={"file": (io.BytesIO(body.encode()), "cases.jsonl")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["cases"] == 1
+    assert ScavCase.query.filter_by(user_id=user_id).count() == 1
@@ -0,0 +1,127 @@
+import pytest
+
+from app.achievements.rules import AchievementRule
+from app.cases.utils import check_achievements
+from app.extensions import db
+from app.models import User, UserAchievement
+from app.services.achievement_service import RULES, AchievementService
+
+ITEMS = {
+    "ach-bitcoin": ("Physical Bitcoin", "Barter Items", 400_000),
+    "ach-key": ("Dorm room 314 marked key", "Keys", 2_000_000),
+    "ach-gun-a": ("Achievement Rifle", "Guns", 30_000),
+    "ach-gun-b": ("Achievement Pistol", "Guns", 10_000),
+    "ach-bolts": ("Bolts", "Barter Items", 1_000),
+}
+
+
+@pytest.fixture
+def achievement_service():
+    return AchievementService()
+
+
+@pytest.fixture
+def prices():
+    return {tid: price for tid, (_, _, price) in ITEMS.items()}
+
+
+@pytest.fixture
+def user(app, request, make_user):
+    """A fresh user per test (case writes commit), and the catalog items the checks look at"""
+    with app.app_context():
+        user_id = make_user(
+            f"ach_{request.node.name[-14:]}",
+            {tid: (name, category) for tid, (name, category, _) in ITEMS.items()},
+        )
+        yield db.session.get(User, user_id)
+
+
+def _items(*tids):
+    return [{"id": tid, "name": ITEMS[tid][0], "quantity": 1} for tid in tids]
+
+
+def _value(counters, achievement):
+    return counters.get(RULES[achievement].counter)
+
+
+def test_counters_follow_case_writes(service, achievement_service, fixed_prices, user):
+    """The counters kept up on create, edit and delete equal a refresh from the user's cases"""
+    service._create_scav_case_entry("₽2500", _items("ach-bitcoin", "ach-bitcoin", "ach-bitcoin", "ach-gun-a"), user.id)
+    service._create_scav_case_entry("Moonshine", _items("ach-key"), user.id)
+    last = service._create_scav_case_entry("₽2500", _items("ach-gun-a", "ach-gun-b", "ach-bolts"), user.id)
+
+    counters = achievement_service.get_counters(user.id)
+    assert counters["cases"] == 3
+    assert _value(counters, "First Case") == 3
+    assert _value(counters, "Moonshine Master") == 1
+    assert _value(counters, "Bitcoin Finder") == 3
+    assert _value(counters, "Jackpot!") == 1
+    assert _value(counters, "Keymaster") == 1
+    assert _value(counters, "Weapon Collector") == 2
+    assert _value(counters, "Lone Survivor") == 1
+    assert _value(counters, "Nothing But Trash") == 41_000 - 2500
+    assert _value(counters, "Tech Scavenger") is None
+    assert _value(counters, "Intel Mogul") is None
+
+    achievement_service.refresh_users([user.id])
+    assert achievement_service.get_counters(user.id) == counters
+
+    # edits and deletes can take away a max / min, so the owner's counters are recomputed
+    service.update_scav_case_items(last, [
+        {"id": item.id, "name": item.name, "quantity": item.amount} for item in last.items if item.tarkov_id != "ach-gun-b"
+    ])
+    assert _value(achievement_service.get_counters(user.id), "Weapon Collector") == 1
+    service.delete_scav_case(last)
+    counters = achievement_service.get_counters(user.id)
+    assert counters["cases"] == 2
+    assert (_value(counters, "Rare Loot Hunter"), _value(counters, "Nothing But Trash")) == (2_000_000, 1_227_500)
+
+
+def test_check_achievements_reads_counters(app, service, achievement_service, fixed_prices, user):
+    with app.test_request_context():
+        service._create_scav_case_entry("₽2500", _items("ach-bitcoin", "ach-bitcoin", "ach-bitcoin"), user.id)
+        last = service._create_scav_case_entry("₽2500", _items("ach-key"), user.id)
+        check_achievements(user, notify=False)
+
+    unlocked = {a.achievement_name for a in UserAchievement.query.filter_by(user_id=user.id)}
+    assert {"First Case", "Bitcoin Finder", "Jackpot!", "Millionaire", "Rare Loot Hunter", "Lone Survivor"} <= unlocked
+    assert "Keymaster" not in unlocked
+    assert "Nothing But Trash" not in unlocked
+
+    # deleting the only single item case takes Lone Survivor back
+    service.delete_scav_case(last)
+    unlocked = {a.achievement_name for a in UserAchievement.query.filter_by(user_id=user.id)}
+    assert "Lone Survivor" not in unlocked
+    assert "Jackpot!" in unlocked
+
+
+def test_set_based_evaluation_matches_counters(service, achievement_service, fixed_prices, user):
+    """award() / revoke() (straight SQL, every user) agree with the per-user counters"""
+    service._create_scav_case_entry("₽2500", _items("ach-bitcoin", "ach-gun-a", "ach-gun-b"), user.id)
+    service._create_scav_case_entry("₽2500", _items("ach-bolts"), user.id)
+    db.session.add(UserAchievement(user_id=user.id, achievement_name="Scav Elite"))
+    db.session.commit()
+
+    awarded = achievement_service.award()
+    assert awarded["Bitcoin Finder"] >= 1
+    revoked = achievement_service.revoke()
+    assert revoked["Scav Elite"] >= 1
+
+    unlocked = {a.achievement_name for a in UserAchievement.query.filter_by(user_id=user.id)}
+    assert unlocked == achievement_service.earned(user.id)
+    assert {"First Case", "Bitcoin Finder", "Lone Survivor", "Nothing But Trash"} <= unlocked
+
+    # a second run has nothing left to do
+    assert not any(achievement_service.award().values())
+
+
+@pytest.mark.parametrize("spec", [
+    {"aggregate": "median", "over": "cases"},
+    {"aggregate": "sum", "over": "cases"},
+    {"aggregate": "count", "over": "items", "where": {"colour": "red"}},
+    {"aggregate": "exists", "over": "items", "op": ">", "value": 2},
+    {"aggregate": "distinct_count", "over": "items", "field": "price"},
+])
+def test_invalid_rules_are_rejected(spec):
+    with pytest.raises(ValueError):
+        AchievementRule.from_spec("Broken", spec)
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.extensions import db, bcrypt
+from app.models import ScavCase, ScavCaseItem, TarkovItem, User
+from app.services.case_simulation_service import (
+    CaseSimulationService, alias_sample, alias_table, simulate_profits,
+)
+
+
+@pytest.fixture
+def simulation_service():
+    return CaseSimulationService()
+
+
+def _add_case(user_id, case_type, cost, items):
+    scav_case = ScavCase(user_id=user_id, type=case_type, cost=cost, number_of_items=len(items))
+    scav_case.items = [ScavCaseItem(tarkov_id=tid, name=tid, amount=amount, price=price) for tid, amount, price in items]
+    scav_case._return = sum(amount * price for _, amount, price in items)
+    db.session.add(scav_case)
+    db.session.commit()
+    return scav_case
+
+
+def test_alias_table_samples_the_weights():
+    weights = np.array([1.0, 2.0, 3.0, 4.0])
+    draws = alias_sample(alias_table(weights), 1_000_000, np.random.default_rng(3))
+    assert np.bincount(draws) / draws.size == pytest.approx(weights / weights.sum(), abs=0.005)
+
+
+def test_simulated_profits_match_the_analytic_expectation():
+    rng = np.random.default_rng(11)
+    item_counts = rng.integers(1, 8, 500)
+    drop_values = rng.lognormal(9, 1, 200)
+    drop_weights = rng.integers(1, 30, 200).astype(float)
+
+    profits = simulate_profits(item_counts, drop_values, drop_weights, 15_000, 400_000, np.random.default_rng(5))
+
+    expected = item_counts.mean() * (drop_values * drop_weights).sum() / drop_weights.sum() - 15_000
+    assert profits.size == 400_000
+    assert profits.mean() == pytest.approx(expected, rel=0.01)
+
+
+def test_simulation_reprices_history_and_is_cached_until_it_changes(app, simulation_service):
+    with app.app_context():
+        hashed = bcrypt.generate_password_hash("testpass123!").decode("utf-8")
+        user = User(username="simulation_user", password=hashed)
+        db.session.add_all([user, TarkovItem(name="sim-a", tarkov_id="sim-a"), TarkovItem(name="sim-b", tarkov_id="sim-b")])
+        db.session.commit()
+
+        # every case drops exactly two stacks, the item's latest recorded price is what counts
+        _add_case(user.id, "₽15000", 15000, [("sim-a", 1, 1_000), ("sim-a", 1, 1_000)])
+        _add_case(user.id, "₽15000", 15000, [("sim-a", 1, 20_000), ("sim-a", 1, 20_000)])
+
+        result = simulation_service.simulate("₽15000", simulations=10_000)
+        assert result["sample_cases"] == 2
+        assert result["expected_value"] == pytest.approx(2 * 20_000 - 15_000)
+        assert result["variance"] == pytest.approx(0)
+        assert result["probability_of_profit"] == 1.0
+        assert simulation_service.simulate("₽15000", simulations=10_000) is result
+        assert simulation_service.simulate("₽95000") is None
+
+        _add_case(user.id, "₽15000", 15000, [("sim-b", 1, 5_000), ("sim-b", 1, 5_000)])
+        updated = simulation_service.simulate("₽15000", simulations=10_000)
+        assert updated is not result
+        assert updated["sample_cases"] == 3
+        assert 0 < updated["probability_of_profit"] < 1
+
+
+def test_only_simulations_whose_inputs_changed_are_rerun(app, simulation_service):
+    with app.app_context():
+        user = User(username="simulation_inputs", password="x")
+        db.session.add(user)
+        db.session.commit()
+        edited = _add_case(user.id, "₽95000", 95000, [("sim-c", 1, 100_000)])
+        _add_case(user.id, "₽95000", 95000, [("sim-c", 1, 100_000)])
+
+        result = simulation_service.simulate("₽95000", simulations=10_000)
+        assert result["expected_value"] == pytest.approx(100_000 - 95_000)
+
+        # a case of another type, with none of this type's items, changes nothing it was simulated from
+        _add_case(user.id, "Intelligence", 80_000, [("sim-d", 1, 200_000)])
+        assert simulation_service.simulate("₽95000", simulations=10_000) is result
+
+        # an edited quantity leaves the case count alone, but still changes the history
+        edited.items[0].amount = 2
+        edited._return = 200_000
+        db.session.commit()
+        requantified = simulation_service.simulate("₽95000", simulations=10_000)
+        assert requantified is not result
+        # (now half the drops are doubles - an estimate, within ~4 standard errors)
+        assert requantified["expected_value"] == pytest.approx(150_000 - 95_000, abs=2_500)
+
+        # and so does a newer price for one of its items, recorded by another case type
+        _add_case(user.id, "Intelligence", 80_000, [("sim-c", 1, 40_000)])
+        repriced = simulation_service.simulate("₽95000", simulations=10_000)
+        assert repriced is not requantified
+        assert repriced["expected_value"] == pytest.approx(60_000 - 95_000, abs=1_000)
+
+
+def test_case_simulation_endpoint_validates_its_arguments(client):
+    assert client.get("/api/case-simulation?case_type=nope").status_code == 422
+    assert client.get("/api/case-simulation?simulations=0").status_code == 422
+    assert client.get("/api/case-simulation?simulations=1234").status_code == 422
+    # only the default size for anonymous callers
+    assert client.get("/api/case-simulation?simulations=10000").status_code == 401
+
+    response = client.get("/api/case-simulation?case_type=₽15000")
+    assert response.status_code == 200
+    assert "₽15000" in response.get_json()["data"]
+
+
+def test_logged_in_users_can_choose_the_simulation_size(client):
+    user = User(username="simulation_endpoint", password="x")
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    response = client.get("/api/case-simulation?simulations=10000")
+    assert response.status_code == 200
+    assert "₽15000" in response.get_json()["data"]
@@ -0,0 +1,95 @@
+import json
+
+import catalog_sync
+from app.cases.utils import _ocr_catalog
+from app.database.manager import db_manager
+from app.database.search import search_items
+from app.http.caching import get_data_version
+from app.models import CATALOG_DATA_VERSION, DataVersion, TarkovItem
+from app.services.catalog_index_service import CatalogIndexService
+from app.services.catalog_sync_service import CatalogItem, CatalogSyncService
+
+
+def _row(tarkov_id, name, category="Barter item", image="https://assets.tarkov.dev/{}-512.webp"):
+    return {"id": tarkov_id, "name": name, "category": {"name": category}, "image512pxLink": image.format(tarkov_id)}
+
+
+FEED = [
+    _row("sync-bolts", "Sync Bolts"),
+    _row("sync-nuts", "Sync Nuts"),
+    _row("sync-gpu", "Sync Graphics card", category="Electronics"),
+]
+
+
+def _sync(rows):
+    return CatalogSyncService().sync([CatalogItem.from_api(row) for row in rows])
+
+
+def test_sync_applies_only_the_diff(app):
+    assert _sync(FEED).counts() == {"inserted": 3, "updated": 0, "removed": 0, "unchanged": 0}
+
+    # the same feed again writes nothing - not even a catalog data version bump
+    version = get_data_version(CATALOG_DATA_VERSION)
+    assert _sync(FEED).counts() == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    assert get_data_version(CATALOG_DATA_VERSION) == version
+
+    # a rename, a new image (not stored, so not a change), and an item dropped from the catalog
+    feed = [
+        _row("sync-bolts", "Sync Bolts (renamed)"),
+        _row("sync-gpu", "Sync Graphics card", category="Electronics", image="https://assets.tarkov.dev/{}-new.webp"),
+    ]
+    result = _sync(feed)
+    assert result.counts() == {"inserted": 0, "updated": 1, "removed": 1, "unchanged": 1}
+    assert result.removed == ["sync-nuts"]
+    assert get_data_version(CATALOG_DATA_VERSION) != version
+
+    nuts = TarkovItem.query.filter_by(tarkov_id="sync-nuts").one()
+    assert nuts.removed_at is not None
+    assert TarkovItem.query.filter_by(tarkov_id="sync-bolts").one().name == "Sync Bolts (renamed)"
+
+    # removed items are kept, but not offered any more
+    assert "sync-nuts" not in {row[0] for row in json.loads(CatalogIndexService().build_index().body)["items"]}
+    assert "Sync Nuts" not in [item.name for item in search_items("sync nuts")]
+    assert "sync-nuts" not in {tarkov_id for tarkov_id, _ in _ocr_catalog().values()}
+
+    # and come back if they return to the catalog
+    assert _sync(feed + [FEED[1]]).counts() == {"inserted": 0, "updated": 1, "removed": 0, "unchanged": 2}
+    assert TarkovItem.query.filter_by(tarkov_id="sync-nuts").one().removed_at is None
+
+
+def test_items_file_and_api_feed_agree_on_unchanged_items(app):
+    rows = [_row("agree-bolts", "Agree Bolts"), _row("agree-gpu", "Agree Graphics card", category="Electronics")]
+    # what `flask setup database` reads - no image links
+    seeded = [{"id": row["id"], "name": row["name"], "category": row["category"]["name"]} for row in rows]
+
+    def seed():
+        return CatalogSyncService().sync([db_manager._catalog_item(item) for item in seeded], remove_missing=False)
+
+    def fetch():
+        return CatalogSyncService().sync([CatalogItem.from_api(row) for row in rows], remove_missing=False)
+
+    assert seed().counts()["inserted"] == 2
+    version = get_data_version(CATALOG_DATA_VERSION)
+    assert fetch().counts() == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 2}
+    assert seed().counts() == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 2}
+    assert get_data_version(CATALOG_DATA_VERSION) == version
+
+
+def test_sync_tables_match_the_models():
+    assert catalog_sync.CATALOG_DATA_VERSION == CATALOG_DATA_VERSION
+    for light, model in ((catalog_sync.tarkov_item, TarkovItem), (catalog_sync.data_version, DataVersion)):
+        assert light.name == model.__tablename__
+        assert set(light.c.keys()) <= set(model.__table__.c.keys())
+
+
+def test_ocr_catalog_is_rebuilt_only_after_catalog_changes(app):
+    _sync(FEED)
+    matcher = _ocr_catalog()
+    assert _ocr_catalog() is matcher
+    _sync(FEED)
+    assert _ocr_catalog() is matcher
+
+    _sync(FEED + [_row("sync-wire", "Sync Wires")])
+    rebuilt = _ocr_catalog()
+    assert rebuilt is not matcher
+    assert rebuilt["sync wires"] == ("sync-wire", "Sync Wires")
@@ -0,0 +1,63 @@
+import pytest
+
+from app.database.search import item_name_filter, search_items
+from app.extensions import db
+from app.models import TarkovItem
+
+CATALOG = [
+    "Bottle of Fierce Hatchling moonshine",
+    "Graphics card",
+    "Intelligence folder",
+    "Military power filter",
+    "Gas analyzer",
+    "Water filter",
+]
+
+
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        items = [TarkovItem(name=name, tarkov_id=f"search-{i}") for i, name in enumerate(CATALOG)]
+        db.session.add_all(items)
+        db.session.flush()
+        yield items
+
+
+def _names(items):
+    return [item.name for item in items]
+
+
+def test_search_ranks_prefix_and_substring_matches(catalog):
+    assert _names(search_items("moonsh"))[0] == "Bottle of Fierce Hatchling moonshine"
+    assert _names(search_items("filter")) == ["Water filter", "Military power filter"]
+    assert _names(search_items("graphics", limit=1)) == ["Graphics card"]
+
+
+def test_search_tolerates_typos(catalog):
+    assert _names(search_items("grpahics card"))[0] == "Graphics card"
+    assert _names(search_items("inteligence"))[0] == "Intelligence folder"
+
+
+def test_index_follows_catalog_writes(catalog):
+    graphics = catalog[1]
+    graphics.name = "Graphics processing unit"
+    db.session.add(TarkovItem(name="Virtex programmable processor", tarkov_id="search-new"))
+    db.session.delete(catalog[4])
+    db.session.flush()
+
+    assert _names(search_items("processor"))[0] == "Virtex programmable processor"
+    assert "Graphics processing unit" in _names(search_items("processing"))
+    assert search_items("analyzer") == []
+
+
+def test_name_filter_matches_ilike(catalog):
+    for query in ("filter", "FOLD", "er", "zzz"):
+        indexed = TarkovItem.query.filter(item_name_filter(query)).order_by(TarkovItem.id).all()
+        scanned = TarkovItem.query.filter(TarkovItem.name.ilike(f"%{query}%")).order_by(TarkovItem.id).all()
+        assert indexed == scanned
+
+
+def test_search_items_route(client, catalog):
+    response = client.get("/cases/search-items?q=gas+anal")
+    assert response.status_code == 200
+    assert b"Gas analyzer" in response.data
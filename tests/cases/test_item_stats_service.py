@@ -0,0 +1,84 @@
+import pytest
+
+from app.extensions import db
+from app.models import ItemStats
+from app.services.item_stats_service import ALL_CASE_TYPES, ItemStatsService
+
+ITEMS = {tid: (tid, "Barter Items") for tid in ("stats-item-a", "stats-item-b")}
+
+
+@pytest.fixture
+def item_stats_service():
+    return ItemStatsService()
+
+
+@pytest.fixture
+def prices():
+    return {"stats-item-a": 1_000, "stats-item-b": 50_000}
+
+
+def _snapshot():
+    rows = db.session.query(ItemStats).order_by(ItemStats.tarkov_id, ItemStats.case_type).all()
+    return [
+        (r.tarkov_id, r.case_type, r.times_found, r.total_quantity, r.last_case_id, r.last_seen_at)
+        for r in rows
+    ]
+
+
+def test_item_stats_follow_case_writes(app, service, item_stats_service, fixed_prices, make_user):
+    """The per-item rows kept up on create, edit and delete equal a rebuild from the case history"""
+    user_id = make_user("item_stats_user", ITEMS)
+    with app.app_context():
+        first = service._create_scav_case_entry("₽2500", [
+            {"id": "stats-item-a", "name": "stats-item-a", "quantity": 2},
+            {"id": "stats-item-a", "name": "stats-item-a", "quantity": 1},
+        ], user_id)
+        second = service._create_scav_case_entry("Moonshine", [
+            {"id": "stats-item-a", "name": "stats-item-a", "quantity": 4},
+            {"id": "stats-item-b", "name": "stats-item-b", "quantity": 1},
+        ], user_id)
+
+        page = item_stats_service.get_item_frequency_paginated("all", per_page=10)
+        assert [(row.tarkov_id, row.times_found, row.total_quantity) for row in page.items] == [
+            ("stats-item-a", 3, 7), ("stats-item-b", 1, 1),
+        ]
+        assert page.items[0].last_case_id == second.id
+        assert page.items[0].category == "Barter Items"
+
+        by_type = item_stats_service.get_item_frequency_paginated("₽2500", per_page=10)
+        assert [(row.tarkov_id, row.times_found, row.last_case_id) for row in by_type.items] == [
+            ("stats-item-a", 2, first.id),
+        ]
+        assert item_stats_service.get_item_frequency_paginated("all", search="item-b").total == 1
+        incremental = _snapshot()
+        item_stats_service.rebuild()
+        assert _snapshot() == incremental
+
+        # the edit takes stats-item-b out of the Moonshine case, the delete takes away the last ₽2500 case
+        kept = [{"id": item.id, "name": item.name, "quantity": item.amount}
+                for item in second.items if item.tarkov_id == "stats-item-a"]
+        service.update_scav_case_items(second, kept)
+        service.delete_scav_case(first)
+
+        assert db.session.get(ItemStats, ("stats-item-b", ALL_CASE_TYPES)) is None
+        assert db.session.get(ItemStats, ("stats-item-a", "₽2500")) is None
+        remaining = db.session.get(ItemStats, ("stats-item-a", ALL_CASE_TYPES))
+        assert (remaining.times_found, remaining.total_quantity, remaining.last_case_id) == (1, 4, second.id)
+        incremental = _snapshot()
+        item_stats_service.rebuild()
+        assert _snapshot() == incremental
+
+
+@pytest.mark.parametrize("prices", [{"stats-uncatalogued-gpu": 1_000}])
+def test_item_frequency_search_finds_items_outside_the_catalog(app, service, item_stats_service, fixed_prices, make_user):
+    """A dropped item with no catalog row is still found by the name it was recorded under"""
+    user_id = make_user("item_stats_orphan")
+    with app.app_context():
+        service._create_scav_case_entry("₽2500", [
+            {"id": "stats-uncatalogued-gpu", "name": "Graphics card", "quantity": 1},
+        ], user_id)
+
+        for search in ("gr", "Gra", "Graphics"):
+            page = item_stats_service.get_item_frequency_paginated("all", search=search)
+            assert [row.tarkov_id for row in page.items] == ["stats-uncatalogued-gpu"], search
+        assert item_stats_service.get_item_frequency_paginated("all", search="bitcoin").total == 0
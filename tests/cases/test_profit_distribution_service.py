@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from app.services.profit_distribution_service import (
+    RELATIVE_ACCURACY, ProfitDistributionService, ProfitSketch, bucket_for, bucket_value,
+)
+
+ITEMS = {tid: (tid, "Barter Items") for tid in ("dist-item-a", "dist-item-b")}
+
+
+@pytest.fixture
+def distribution_service():
+    return ProfitDistributionService()
+
+
+@pytest.fixture
+def prices():
+    return {"dist-item-a": 10_000, "dist-item-b": 200_000}
+
+
+def test_bucket_value_is_within_relative_accuracy():
+    for profit in (-2_500_000.0, -1500.5, 0.0, 1.0, 42.0, 7_500.0, 123_456_789.0):
+        value = bucket_value(bucket_for(profit))
+        assert abs(value - profit) <= RELATIVE_ACCURACY * max(abs(profit), 1) + 1e-9
+
+
+def test_sketch_percentiles_track_exact_percentiles():
+    rng = random.Random(7)
+    profits = [rng.lognormvariate(9, 1.5) - 15_000 for _ in range(5000)]
+    sketch = ProfitSketch()
+    for profit in profits:
+        sketch.add(profit)
+
+    ordered = sorted(profits)
+    for p in (10, 50, 90, 99):
+        exact = ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+        assert abs(sketch.percentile(p) - exact) <= RELATIVE_ACCURACY * max(abs(exact), 1)
+    assert sketch.win_rate() == pytest.approx(sum(p > 0 for p in profits) / len(profits))
+    assert sum(b["count"] for b in sketch.histogram()) == len(profits)
+
+
+def test_sketches_merge_by_adding_counts():
+    left, right, combined = ProfitSketch(), ProfitSketch(), ProfitSketch()
+    for i, profit in enumerate(range(-5000, 50_000, 250)):
+        (left if i % 2 else right).add(profit)
+        combined.add(profit)
+
+    assert left.merge(right).counts == combined.counts
+
+
+def test_sketches_follow_case_writes(app, service, distribution_service, fixed_prices, make_user):
+    """Create / update / delete keep the per-user and per-type sketches in step."""
+    user_id = make_user("dist_lifecycle_user", ITEMS)
+    with app.app_context():
+        small = service._create_scav_case_entry("₽2500", [{"id": "dist-item-a", "name": "a", "quantity": 1}], user_id)
+        big = service._create_scav_case_entry("₽2500", [{"id": "dist-item-b", "name": "b", "quantity": 1}], user_id)
+
+        user_dist = distribution_service.get_distribution(user_id=user_id)
+        assert user_dist["count"] == 2
+        assert user_dist["win_rate"] == 1.0
+        assert user_dist["percentiles"]["p99"] == pytest.approx(197_500, rel=RELATIVE_ACCURACY)
+
+        # drop the 200k item: the case now loses money
+        service.update_scav_case_items(big, [])
+        user_dist = distribution_service.get_distribution(user_id=user_id)
+        assert user_dist["count"] == 2
+        assert user_dist["win_rate"] == 0.5
+
+        service.delete_scav_case(small)
+        user_dist = distribution_service.get_distribution(user_id=user_id)
+        assert user_dist["count"] == 1
+        assert user_dist["percentiles"]["p50"] == pytest.approx(-2500, rel=RELATIVE_ACCURACY)
+
+        type_counts = distribution_service.get_distributions_by_type()["₽2500"]["count"]
+        distribution_service.rebuild()
+        assert distribution_service.get_distributions_by_type()["₽2500"]["count"] == type_counts
+        assert distribution_service.get_distribution(user_id=user_id)["count"] == 1
+
+
+def test_profit_distribution_api(client):
+    response = client.get("/api/profit-distribution")
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert set(data) >= {"count", "win_rate", "percentiles", "histogram", "by_type"}
+
+    assert client.get("/api/profit-distribution?case_type=nonsense").status_code == 422
@@ -1,14 +1,10 @@
+import json
 import pytest
 from werkzeug.exceptions import NotFound
 
 from app.models import User, ScavCase
 from app.extensions import db, bcrypt
-from app.services.scav_case_service import ScavCaseService
-
-
-@pytest.fixture
-def service():
-    return ScavCaseService()
+from app.http.errors import ValidationError
 
 
 def _make_user(app, username):
@@ -122,3 +118,140 @@ def test_get_cases_by_type_items_eager_loaded(app, service):
         for sc in cases:
             state = sa_inspect(sc)
             assert "items" not in state.unloaded, "items relationship should be eagerly loaded"
+
+
+def test_keyset_pagination_walks_all_cases_once(app, service):
+    """Following next cursors visits every case exactly once, in the same order as offset pagination."""
+    user_id = _make_user(app, "svc_keyset_user")
+    for return_val in (100.0, 9000.0, 4000.0, 4000.0, 7500.0, 300.0, 4000.0):
+        _make_case(app, user_id, return_val=return_val)
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        expected = [
+            c.id for c in service.get_all_cases_by_user_paginated(
+                user, page=1, per_page=100, sort_by="profit", sort_order="desc"
+            ).items
+        ]
+
+        seen, cursor = [], None
+        while True:
+            page = service.get_all_cases_by_user_keyset(
+                user, cursor=cursor, per_page=3, sort_by="profit", sort_order="desc"
+            )
+            seen.extend(c.id for c in page.items)
+            assert page.total == len(expected)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert seen == expected
+
+
+def test_keyset_pagination_prev_cursor_returns_previous_page(app, service):
+    """A prev cursor from page 2 returns exactly page 1."""
+    user_id = _make_user(app, "svc_keyset_prev_user")
+    for _ in range(5):
+        _make_case(app, user_id)
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        first = service.get_all_cases_by_user_keyset(user, per_page=2)
+        second = service.get_all_cases_by_user_keyset(user, cursor=first.next_cursor, per_page=2)
+        assert second.has_prev
+        back = service.get_all_cases_by_user_keyset(user, cursor=second.prev_cursor, per_page=2)
+
+        assert [c.id for c in back.items] == [c.id for c in first.items]
+        assert not back.has_prev
+
+
+def test_keyset_pagination_rejects_cursor_from_other_sort(app, service):
+    """Cursors are tied to the sort/filter they were issued for."""
+    user_id = _make_user(app, "svc_keyset_scope_user")
+    for _ in range(3):
+        _make_case(app, user_id)
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        first = service.get_all_cases_by_user_keyset(user, per_page=1, sort_by="cost")
+        with pytest.raises(ValidationError):
+            service.get_all_cases_by_user_keyset(user, cursor=first.next_cursor, per_page=1, sort_by="profit")
+        with pytest.raises(ValidationError):
+            service.get_all_cases_by_user_keyset(user, cursor="not-a-real-cursor", per_page=1)
+
+
+def test_stored_profit_is_maintained_on_insert_and_update(app, service):
+    """The stored profit column tracks _return - cost through inserts and edits."""
+    user_id = _make_user(app, "svc_profit_col_user")
+    case_id = _make_case(app, user_id, cost=2500.0, return_val=6000.0)
+    with app.app_context():
+        sc = service.get_case_by_id(case_id)
+        assert sc.profit == 3500.0
+
+        sc._return = 1000.0
+        service.commit()
+        db.session.expire(sc)
+        assert sc.profit == -1500.0
+
+        best = service._get_best_cases(n=1, user_id=user_id)
+        assert [c.id for c in best] == [case_id]
+
+
+def test_delete_scav_case_publishes_event_after_commit(app, service):
+    """Deleting a case pushes a "case" event with negative KPI deltas to live dashboards."""
+    from app.events import case_events
+
+    user_id = _make_user(app, "svc_event_user")
+    case_id = _make_case(app, user_id, cost=2500.0, return_val=5000.0)
+    subscriber = case_events.subscribe()
+    try:
+        with app.app_context():
+            service.delete_scav_case(service.get_case_by_id_or_404(case_id))
+
+        message = subscriber.get_nowait()
+        payload = json.loads(message.split("data: ", 1)[1])
+        assert "event: case" in message
+        assert payload["action"] == "deleted"
+        assert payload["case"]["id"] == case_id
+        assert payload["case"]["username"] == "svc_event_user"
+        assert payload["delta"] == {
+            "total_cases": -1, "total_cost": -2500.0, "total_return": -5000.0, "total_profit": -2500.0,
+        }
+    finally:
+        case_events.unsubscribe(subscriber)
+
+
+def test_submit_discord_case_ocrs_image_bytes_in_memory(app, service, monkeypatch):
+    """The bot's in-process submission OCRs the screenshot bytes directly - nothing is saved to disk."""
+    from app.constants import DISCORD_BOT_USER_USERNAME
+    from app.models import TarkovItem
+
+    seen = {}
+
+    def fake_ocr(image):
+        seen["image"] = image.read()
+        return [{"id": "discord-item", "name": "Discord item", "quantity": 2}]
+
+    def no_disk(uploaded_image):
+        raise AssertionError("in-process submissions shouldn't touch the disk")
+
+    monkeypatch.setattr("app.services.scav_case_service.process_scav_case_image", fake_ocr)
+    monkeypatch.setattr("app.services.scav_case_service.save_uploaded_image", no_disk)
+    monkeypatch.setattr("app.services.scav_case_service.get_prices", lambda ids: {tid: 10_000 for tid in ids})
+
+    with app.app_context():
+        if not User.query.filter_by(username=DISCORD_BOT_USER_USERNAME).first():
+            _make_user(app, DISCORD_BOT_USER_USERNAME)
+        db.session.add(TarkovItem(name="Discord item", tarkov_id="discord-item", category="Barter Items"))
+        db.session.commit()
+
+        # only an app context - new achievements mustn't try to flash
+        payload, status = service.submit_discord_case("₽2500", b"fake screenshot")
+
+    assert status == 200, payload
+    assert seen["image"] == b"fake screenshot"
+    assert payload["total_return"] == 20_000
+    assert payload["items"] == [{"name": "Discord item", "quantity": 2, "price": 10_000}]
+
+    with app.app_context():
+        assert service.submit_discord_case("", b"fake screenshot")[1] == 400
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.http.errors import ValidationError
+from app.models import ScavCase, ScavCaseItem, TarkovItem, User, UserStats
+from app.services.synthetic_dataset_service import (
+    CASE_PROFILES, CatalogEntry, SyntheticDataset, SyntheticDatasetService, fixture_price,
+)
+
+CATALOG = [
+    CatalogEntry(f"synth-{category.lower().replace(' ', '-')}-{n}", f"Synth {category} {n}", category)
+    for category in ("Ammo", "Barter Items", "Provisions", "Medical", "Keys", "Guns", "Mods", "Armors")
+    for n in range(5)
+]
+START, END = datetime(2025, 1, 1), datetime(2025, 7, 1)
+
+
+@pytest.fixture(scope="module")
+def catalog(app):
+    db.session.add_all(TarkovItem(tarkov_id=e.tarkov_id, name=e.name, category=e.category) for e in CATALOG)
+    db.session.commit()
+
+
+def _cases(seed, count=500):
+    prices = {entry.tarkov_id: fixture_price(entry) for entry in CATALOG}
+    return list(SyntheticDataset(CATALOG, prices, seed).cases(count, [1, 2, 3], START, END))
+
+
+def test_generation_is_seeded_and_well_formed():
+    cases = _cases(seed=7)
+    assert cases == _cases(seed=7)
+    assert cases != _cases(seed=8)
+
+    created = [case["created_at"] for case, _ in cases]
+    assert created == sorted(created) and START <= created[0] and created[-1] < END
+    for case, items in cases:
+        profile = CASE_PROFILES[case["type"]]
+        assert profile.min_items <= len(items) == case["number_of_items"] <= profile.max_items
+        assert case["_return"] == pytest.approx(sum(amount * price for _, _, amount, price in items))
+        assert case["profit"] == pytest.approx(case["_return"] - case["cost"])
+        assert case["user_id"] in (1, 2, 3)
+
+    # the first user is the most active
+    owners = [case["user_id"] for case, _ in cases]
+    assert owners.count(1) > owners.count(3)
+
+
+def test_empty_catalog_is_rejected():
+    with pytest.raises(ValidationError):
+        SyntheticDataset([], {})
+
+
+def test_generate_writes_users_cases_items_and_stats(catalog):
+    service = SyntheticDatasetService(batch_size=40)
+    progress = []
+    result = service.generate(3, 100, seed=3, username_prefix="synth_", end=END, progress=progress.append)
+
+    assert (result.users, result.users_created, result.cases) == (3, 3, 100)
+    assert progress == [40, 80, 100]
+    users = User.query.filter(User.username.startswith("synth_")).order_by(User.username).all()
+    assert [user.username for user in users] == ["synth_000001", "synth_000002", "synth_000003"]
+
+    user_ids = [user.id for user in users]
+    cases = ScavCase.query.filter(ScavCase.user_id.in_(user_ids)).all()
+    assert len(cases) == 100
+    assert sum(case.number_of_items for case in cases) == result.items
+    assert ScavCaseItem.query.filter(ScavCaseItem.scav_case_id.in_([case.id for case in cases])).count() == result.items
+    assert sum(stats.case_count for stats in UserStats.query.filter(UserStats.user_id.in_(user_ids))) == 100
+
+    # a second run reuses the users and appends
+    again = service.generate(3, 20, seed=4, username_prefix="synth_", end=END, rebuild_stats=False)
+    assert (again.users_created, again.cases) == (0, 20)
+    assert ScavCase.query.filter(ScavCase.user_id.in_(user_ids)).count() == 120
@@ -1,7 +1,9 @@
 import pytest
 
 from app import create_app
-from app.extensions import db
+from app.extensions import bcrypt, db
+from app.models import TarkovItem, User
+from app.services.scav_case_service import ScavCaseService
 from tests.config import TestConfig
 
 
@@ -35,3 +37,42 @@ def session(app):
             # the savepoint, making rollback impossible. Clean up the session
             # instead so the next test starts with a fresh connection.
             db.session.remove()
+
+
+@pytest.fixture
+def service():
+    return ScavCaseService()
+
+
+@pytest.fixture
+def prices():
+    """tarkov_id -> price served by fixed_prices; override per module or with parametrize"""
+    return {}
+
+
+@pytest.fixture
+def fixed_prices(monkeypatch, prices):
+    """Stub the tarkov.dev price lookups so case creation / edits run offline."""
+    monkeypatch.setattr(
+        "app.services.scav_case_service.get_prices",
+        lambda ids: {tid: prices.get(tid) for tid in ids},
+    )
+    monkeypatch.setattr("app.services.scav_case_service.get_price", lambda tid: prices.get(tid))
+    return prices
+
+
+@pytest.fixture
+def make_user(app):
+    """Factory committing a user, plus any missing catalog items ({tarkov_id: (name, category)}), returning their ID"""
+    def make(username, items=None):
+        with app.app_context():
+            hashed = bcrypt.generate_password_hash("testpass123!").decode("utf-8")
+            user = User(username=username, password=hashed)
+            db.session.add(user)
+            for tid, (name, category) in (items or {}).items():
+                if not TarkovItem.query.filter_by(tarkov_id=tid).first():
+                    db.session.add(TarkovItem(name=name, tarkov_id=tid, category=category))
+            db.session.commit()
+            return user.id
+
+    return make
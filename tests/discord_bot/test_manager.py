@@ -0,0 +1,53 @@
+import json
+import time
+
+import pytest
+from flask import Flask
+
+from app.discord_bot.manager import DiscordBotManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("DISCORD_TOKEN", "test-token")
+    bot_app = Flask(__name__)
+    bot_app.config.update(
+        DISCORD_RESTART_BACKOFF=1,
+        DISCORD_RESTART_BACKOFF_MAX=4,
+        DISCORD_HEARTBEAT_FILE=str(tmp_path / "bot.heartbeat"),
+        DISCORD_HEARTBEAT_INTERVAL=30,
+    )
+    return DiscordBotManager(bot_app)
+
+
+def test_supervisor_restarts_with_capped_backoff(manager, monkeypatch):
+    runs, delays = [], []
+
+    async def crashing_run(token):
+        runs.append(token)
+        if len(runs) < 5:
+            raise ConnectionError("gateway went away")
+
+    monkeypatch.setattr(manager, "_run_once", crashing_run)
+    manager.run(sleep=delays.append)
+    assert len(runs) == 5
+    assert delays == [1, 2, 4, 4]
+
+    # and it gives up when told to
+    runs.clear()
+    with pytest.raises(RuntimeError):
+        manager.run(max_restarts=1, sleep=delays.append)
+    assert len(runs) == 2
+
+
+def test_health_follows_heartbeat(manager):
+    assert not manager.is_healthy()
+
+    with open(manager.app.config["DISCORD_HEARTBEAT_FILE"], "w") as f:
+        json.dump({"timestamp": time.time(), "latency": 0.05, "queued": 0}, f)
+    assert manager.is_healthy()
+
+    with open(manager.app.config["DISCORD_HEARTBEAT_FILE"], "w") as f:
+        json.dump({"timestamp": time.time() - 120, "latency": 0.05, "queued": 0}, f)
+    assert not manager.is_healthy()
+    assert manager.is_healthy(max_age=300)
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from app.discord_bot.queue import FairQueue, SubmissionDispatcher
+
+
+def test_fair_queue_serves_guilds_round_robin():
+    async def drain():
+        queue = FairQueue()
+        for job in ("a1", "a2", "a3"):
+            await queue.put("guild-a", job)
+        await queue.put("guild-b", "b1")
+        await queue.put("guild-c", "c1")
+        return [await queue.get() for _ in range(len(queue))]
+
+    assert asyncio.run(drain()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_dispatcher_runs_a_burst_concurrently_within_the_limit():
+    running, peak = 0, 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+
+    async def burst(limit):
+        dispatcher = SubmissionDispatcher(limit=limit)
+        dispatcher.start()
+        for _ in range(10):
+            await dispatcher.submit("guild", job)
+        while len(dispatcher.queue) or dispatcher._running:
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+
+    start = time.perf_counter()
+    asyncio.run(burst(10))
+    assert time.perf_counter() - start < 0.5
+    assert peak == 10
+
+    peak = 0
+    asyncio.run(burst(3))
+    assert peak == 3
@@ -0,0 +1,140 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.leaderboards.utils import leaderboard_window_bounds
+from app.models import UserStats, UserDailyStats
+from app.extensions import db
+from app.services.user_stats_service import UserStatsService
+
+ITEMS = {tid: (tid, "Barter Items") for tid in ("stats-item-a", "stats-item-b")}
+
+
+@pytest.fixture
+def stats_service():
+    return UserStatsService()
+
+
+@pytest.fixture
+def prices():
+    return {"stats-item-a": 10_000, "stats-item-b": 50_000}
+
+
+def _stats_row(user_id):
+    row = db.session.get(UserStats, user_id)
+    db.session.refresh(row)
+    return row
+
+
+def test_stats_follow_create_and_delete(app, service, fixed_prices, make_user):
+    """Creating and deleting cases keeps the user's stats row in step."""
+    user_id = make_user("stats_lifecycle_user", ITEMS)
+    with app.app_context():
+        first = service._create_scav_case_entry("₽2500", [{"id": "stats-item-a", "name": "a", "quantity": 1}], user_id)
+        second = service._create_scav_case_entry("₽2500", [{"id": "stats-item-b", "name": "b", "quantity": 2}], user_id)
+
+        row = _stats_row(user_id)
+        assert row.case_count == 2
+        assert row.total_profit == (10_000 - 2500) + (100_000 - 2500)
+        assert row.avg_profit == row.total_profit / 2
+        assert row.most_expensive_item == 50_000
+
+        service.delete_scav_case(second)
+        row = _stats_row(user_id)
+        assert row.case_count == 1
+        assert row.total_profit == 10_000 - 2500
+        assert row.most_expensive_item == 10_000
+        assert row.last_case_at == first.created_at
+
+
+def test_rebuild_matches_incremental_stats(app, service, stats_service, fixed_prices, make_user):
+    """A full rebuild produces the same numbers as the incremental maintenance."""
+    user_id = make_user("stats_rebuild_user", ITEMS)
+    with app.app_context():
+        service._create_scav_case_entry("₽15000", [{"id": "stats-item-b", "name": "b", "quantity": 1}], user_id)
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-a", "name": "a", "quantity": 3}], user_id)
+        incremental = _stats_row(user_id)
+        expected = (incremental.case_count, incremental.total_profit, incremental.most_expensive_item)
+
+        stats_service.rebuild()
+        rebuilt = _stats_row(user_id)
+        assert (rebuilt.case_count, rebuilt.total_profit, rebuilt.most_expensive_item) == expected
+
+
+def test_leaderboard_is_ordered_by_metric(app, service, stats_service, fixed_prices, make_user):
+    """get_leaderboard ranks users by the chosen metric, highest first."""
+    low_id = make_user("stats_lb_low", ITEMS)
+    high_id = make_user("stats_lb_high", ITEMS)
+    with app.app_context():
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-a", "name": "a", "quantity": 1}], low_id)
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-b", "name": "b", "quantity": 5}], high_id)
+
+        ranked = [r.user_id for r in stats_service.get_leaderboard("total_profit", per_page=100).items]
+        assert ranked.index(high_id) < ranked.index(low_id)
+
+
+def test_leaderboard_search_finds_users_beyond_the_first_page(app, service, stats_service, fixed_prices, make_user):
+    """A username search runs over the whole leaderboard, and matches keep their overall rank."""
+    low_id = make_user("stats_search_needle", ITEMS)
+    high_id = make_user("stats_search_top", ITEMS)
+    with app.app_context():
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-a", "name": "a", "quantity": 1}], low_id)
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-b", "name": "b", "quantity": 5}], high_id)
+
+        for since in (None, datetime.utcnow().date()):
+            ranked = [r.user_id for r in stats_service.get_leaderboard("total_profit", per_page=100, since=since).items]
+            assert ranked.index(low_id) > 0
+            found = stats_service.get_leaderboard("total_profit", per_page=1, since=since, search=" Search_Needle ")
+            assert [(r.user_id, r.rank) for r in found.items] == [(low_id, ranked.index(low_id) + 1)]
+            assert found.total == 1
+        assert not stats_service.get_leaderboard("total_profit", search="nobody by this name").items
+
+
+def test_daily_rollups_follow_case_writes(app, service, fixed_prices, make_user):
+    """Each case lands in its owner's bucket for the day it was created, and leaves it on delete."""
+    user_id = make_user("stats_daily_user", ITEMS)
+    with app.app_context():
+        sc = service._create_scav_case_entry("₽2500", [{"id": "stats-item-b", "name": "b", "quantity": 1}], user_id)
+        day = sc.created_at.date()
+
+        bucket = db.session.get(UserDailyStats, (user_id, day))
+        db.session.refresh(bucket)
+        assert (bucket.case_count, bucket.total_profit, bucket.most_expensive_item) == (1, 50_000 - 2500, 50_000)
+
+        service.delete_scav_case(sc)
+        db.session.refresh(bucket)
+        assert (bucket.case_count, bucket.total_profit, bucket.most_expensive_item) == (0, 0, 0)
+
+
+def test_windowed_leaderboard_only_counts_buckets_in_range(app, service, stats_service, fixed_prices, make_user):
+    """A window leaves out cases from days before it starts."""
+    user_id = make_user("stats_window_user", ITEMS)
+    with app.app_context():
+        old = service._create_scav_case_entry("₽2500", [{"id": "stats-item-b", "name": "b", "quantity": 1}], user_id)
+        # move the first case (and its bucket) back a fortnight, then rebuild the rollups from the cases
+        old.created_at = old.created_at - timedelta(days=14)
+        db.session.commit()
+        stats_service.rebuild()
+        service._create_scav_case_entry("₽2500", [{"id": "stats-item-a", "name": "a", "quantity": 1}], user_id)
+
+        today = datetime.utcnow().date()
+        windowed = {
+            r.user_id: r for r in stats_service.get_leaderboard(
+                "total_profit", per_page=100, since=today - timedelta(days=6)
+            ).items
+        }
+        all_time = {r.user_id: r for r in stats_service.get_leaderboard("total_profit", per_page=100).items}
+
+        assert windowed[user_id].case_count == 1
+        assert windowed[user_id].total_profit == 10_000 - 2500
+        assert all_time[user_id].case_count == 2
+
+
+def test_leaderboard_window_bounds(app):
+    """Calendar windows start on the monday / 1st, rolling windows include today."""
+    today = date(2026, 10, 15)  # a thursday
+    with app.app_context():
+        assert leaderboard_window_bounds("all", today) == (None, None)
+        assert leaderboard_window_bounds("7d", today) == (date(2026, 10, 9), None)
+        assert leaderboard_window_bounds("week", today) == (date(2026, 10, 12), None)
+        assert leaderboard_window_bounds("month", today) == (date(2026, 10, 1), None)
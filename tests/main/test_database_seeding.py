@@ -0,0 +1,63 @@
+import json
+
+from sqlalchemy import event
+
+from app.database.manager import db_manager
+from app.extensions import db
+from app.models import TarkovItem, WeaponAttachment
+
+
+def _seed_files(tmp_path, monkeypatch, prefix, count=3000):
+    """Items file of `count` items (ids `prefix`-n) with attachments for every third one, plus one unmatched"""
+    items = [{"id": f"{prefix}-{i}", "name": f"{prefix} item {i}", "category": "Ammo"} for i in range(count)]
+    attachments = [
+        {"name": f"{prefix} item {i}", "recoilModifier": -0.01 * (i % 7), "ergonomicsModifier": i % 5}
+        for i in range(0, count, 3)
+    ] + [{"name": "Not in the catalog", "recoilModifier": 0, "ergonomicsModifier": 0}]
+    (tmp_path / "all_items.json").write_text(json.dumps({"items": items}))
+    (tmp_path / "attachments.json").write_text(json.dumps(attachments))
+    monkeypatch.setattr(db_manager, "_get_data_file_path", lambda filename: str(tmp_path / filename))
+    return attachments
+
+
+def _statements(func):
+    """Run func, returning the SQL statements it sent"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_seeding_is_bulk_and_idempotent(app, tmp_path, monkeypatch):
+    attachments = _seed_files(tmp_path, monkeypatch, "seed")
+
+    # a handful of bulk statements, however many items and attachments there are
+    assert len(_statements(lambda: db_manager.seed_catalog(force_refresh=True))) < 15
+    assert TarkovItem.query.filter(TarkovItem.tarkov_id.like("seed-%")).count() == 3000
+    assert WeaponAttachment.query.count() == 1000
+
+    # and seeding the same files again only reads
+    again = _statements(lambda: db_manager.seed_catalog(force_refresh=True))
+    assert [statement for statement in again if not statement.lstrip().upper().startswith("SELECT")] == []
+    assert db_manager._upsert_weapon_attachments(attachments) == {
+        "inserted": 0, "updated": 0, "unchanged": 1000, "unmatched": 1,
+    }
+
+
+def test_items_and_attachments_are_seeded_in_one_transaction(app, tmp_path, monkeypatch):
+    _seed_files(tmp_path, monkeypatch, "atomic", count=30)
+
+    def broken_upsert(attachment_data):
+        raise RuntimeError("bad attachments file")
+
+    # the attachments fail, so the items loaded before them aren't kept either
+    monkeypatch.setattr(db_manager, "_upsert_weapon_attachments", broken_upsert)
+    db_manager.seed_catalog(force_refresh=True)
+    assert TarkovItem.query.filter(TarkovItem.tarkov_id.like("atomic-%")).count() == 0
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+from sqlalchemy import inspect
+
+from app import create_app
+from app.extensions import db
+from benchmark_startup import HEAVY_MODULES
+from tests.config import TestConfig
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class NoStartupInitConfig(TestConfig):
+    INIT_DATABASE_ON_STARTUP = False
+
+
+def test_boot_doesnt_import_heavy_dependencies():
+    """OCR, discord, market and simulation dependencies are only imported on first use"""
+    code = (
+        "import json, sys\n"
+        "from app import create_app\n"
+        "from tests.config import TestConfig\n"
+        "create_app(config_class=TestConfig)\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
+
+
+def test_database_setup_runs_from_the_cli_not_at_boot(tmp_path):
+    app = create_app(config_class=type(
+        "SetupConfig", (NoStartupInitConfig,), {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'setup.db'}"}
+    ))
+    with app.app_context():
+        assert not inspect(db.engine).has_table("scav_case")
+
+        result = app.test_cli_runner().invoke(args=["setup", "database"])
+        assert result.exit_code == 0, result.output
+        assert "Database initialised" in result.output
+        assert inspect(db.engine).has_table("scav_case")
+        db.session.remove()
+        db.engine.dispose()
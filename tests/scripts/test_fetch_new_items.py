@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fetch_new_items import ImageManifest, LocalUploader, image_filename, upload_images
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMAGES = {f"https://assets.tarkov.dev/item{i}-512.webp": f"image {i}".encode() for i in range(6)}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = ImageManifest(str(tmp_path / "manifest.json"))
+    manifest.mark_pending(IMAGES)
+    return manifest
+
+
+def test_interrupted_upload_resumes(manifest, tmp_path):
+    uploader = LocalUploader(str(tmp_path / "cdn"))
+    broken = "https://assets.tarkov.dev/item3-512.webp"
+
+    def flaky_download(image_link):
+        if image_link == broken:
+            raise ConnectionError("connection reset")
+        return IMAGES[image_link]
+
+    counts = upload_images(manifest, uploader, workers=3, download=flaky_download, attempts=2, backoff=0)
+    assert counts == {"uploaded": 5, "skipped": 0, "failed": 1}
+    assert sorted(os.listdir(uploader.directory)) == sorted(image_filename(link) for link in IMAGES if link != broken)
+
+    # a fresh run (reading the manifest back from disk) only does what's left
+    resumed = ImageManifest(manifest.path)
+    assert resumed.pending() == {"item3.webp": broken}
+    counts = upload_images(resumed, uploader, download=IMAGES.__getitem__, backoff=0)
+    assert counts == {"uploaded": 1, "skipped": 0, "failed": 0}
+    assert not resumed.pending()
+
+
+def test_unchanged_images_are_not_uploaded_again(manifest, tmp_path):
+    upload_images(manifest, LocalUploader(str(tmp_path / "cdn")), download=IMAGES.__getitem__)
+
+    uploads = []
+
+    class RecordingUploader:
+        def upload(self, filename, data):
+            uploads.append(filename)
+
+    # the same links come round again (e.g. the items were renamed) - only changed content is sent
+    manifest.mark_pending(IMAGES)
+    changed = dict(IMAGES, **{"https://assets.tarkov.dev/item0-512.webp": b"new image 0"})
+    counts = upload_images(manifest, RecordingUploader(), download=changed.__getitem__)
+    assert counts == {"uploaded": 1, "skipped": 5, "failed": 0}
+    assert uploads == ["item0.webp"]
+
+
+def test_script_doesnt_import_the_app():
+    """It runs from cron without the app's config (a production FLASK_ENV needs a SECRET_KEY to import the app)"""
+    env = dict(os.environ, FLASK_ENV="production")
+    env.pop("SECRET_KEY", None)
+    code = "import sys, fetch_new_items\nprint(sorted(name for name in sys.modules if name.split('.')[0] == 'app'))\n"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"